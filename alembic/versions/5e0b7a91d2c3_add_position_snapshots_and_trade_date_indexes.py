@@ -0,0 +1,47 @@
+"""add position snapshots and trade date indexes
+
+Revision ID: 5e0b7a91d2c3
+Revises: c4d3513a4ea6
+Create Date: 2026-10-18 11:40:05.274113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b7a91d2c3'
+down_revision: Union[str, Sequence[str], None] = 'c4d3513a4ea6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_index('ix_trades_asset_id_trade_date', 'trades', ['asset_id', 'trade_date'])
+    op.create_index('ix_trades_trade_date', 'trades', ['trade_date'])
+    op.create_index('ix_trades_settle_date', 'trades', ['settle_date'])
+
+    op.create_table(
+        'position_snapshots',
+        sa.Column('id', sa.Integer, primary_key=True, index=True),
+        sa.Column('basis', sa.String, nullable=False),
+        sa.Column('snapshot_date', sa.Date, nullable=False),
+        sa.Column('asset_id', sa.Integer, sa.ForeignKey('assets.id'), nullable=False, index=True),
+        sa.Column('fund_alloc', sa.String, nullable=False, server_default=''),
+        sa.Column('sub_alloc', sa.String, nullable=False, server_default=''),
+        sa.Column('net_quantity', sa.Numeric(38, 10), nullable=False, server_default='0'),
+        sa.Column('cost_sum', sa.Numeric(38, 10), nullable=False, server_default='0'),
+        sa.Column('trade_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('first_trade_id', sa.Integer, nullable=True),
+        sa.UniqueConstraint('basis', 'snapshot_date', 'asset_id', 'fund_alloc', 'sub_alloc',
+                            name='uq_position_snapshot_key'),
+    )
+
+
+def downgrade():
+    op.drop_table('position_snapshots')
+    op.drop_index('ix_trades_settle_date', table_name='trades')
+    op.drop_index('ix_trades_trade_date', table_name='trades')
+    op.drop_index('ix_trades_asset_id_trade_date', table_name='trades')
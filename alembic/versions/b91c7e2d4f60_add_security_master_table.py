@@ -0,0 +1,64 @@
+"""add security_master table
+
+Revision ID: b91c7e2d4f60
+Revises: 5e0b7a91d2c3
+Create Date: 2026-10-18 13:05:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b91c7e2d4f60'
+down_revision: Union[str, Sequence[str], None] = '5e0b7a91d2c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# models.AssetType member names, as SAEnum(AssetType) stores them; the
+# asset_type type itself already exists (assets.type)
+ASSET_TYPES = (
+    'BOND', 'STOCK', 'OTHER', 'CORPORATE_BOND', 'GOVERNMENT_BOND', 'TERM_LOAN',
+    'REVOLVER', 'EQUITY', 'EQUITY_OPTION', 'TRADE_CLAIM', 'SINGLE_NAME_CDS',
+    'INDEX_CDS', 'DELAYED_DRAW_TERM_LOAN',
+)
+
+
+def upgrade():
+    op.create_table(
+        'security_master',
+        sa.Column('id', sa.Integer, primary_key=True, index=True),
+        sa.Column('cusip', sa.String, nullable=False, index=True),
+        sa.Column('asset_type', sa.Enum(*ASSET_TYPES, name='asset_type', create_type=False), nullable=False),
+        sa.Column('issuer', sa.String, nullable=True),
+        sa.Column('deal_name', sa.String, nullable=True),
+        sa.Column('spread_coupon', sa.Float, nullable=True),
+        sa.Column('maturity', sa.Date, nullable=True),
+        sa.Column('px_bid', sa.Float, nullable=True),
+        sa.Column('px_ask', sa.Float, nullable=True),
+        sa.Column('ytw', sa.Float, nullable=True),
+        sa.Column('dm_zspread', sa.Float, nullable=True),
+        sa.Column('chg_net_1d', sa.Float, nullable=True),
+        sa.Column('chg_net_5d', sa.Float, nullable=True),
+        sa.Column('chg_net_1m', sa.Float, nullable=True),
+        sa.Column('chg_net_6m', sa.Float, nullable=True),
+        sa.Column('chg_net_ytd', sa.Float, nullable=True),
+        sa.Column('interval_high', sa.Float, nullable=True),
+        sa.Column('interval_low', sa.Float, nullable=True),
+        sa.Column('payment_rank', sa.String, nullable=True),
+        sa.Column('moodys_cfr', sa.String, nullable=True),
+        sa.Column('moodys_asset', sa.String, nullable=True),
+        sa.Column('sp_cfr', sa.String, nullable=True),
+        sa.Column('sp_asset', sa.String, nullable=True),
+        sa.Column('amount_outstanding', sa.BigInteger, nullable=True),
+        sa.Column('source', sa.String, nullable=False),
+        sa.Column('row_hash', sa.String(16), nullable=False),
+        sa.Column('updated_at', sa.DateTime, nullable=False),
+        sa.UniqueConstraint('cusip', 'asset_type', name='uq_security_master_key'),
+    )
+
+
+def downgrade():
+    op.drop_table('security_master')
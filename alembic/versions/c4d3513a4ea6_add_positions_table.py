@@ -0,0 +1,55 @@
+"""add positions table
+
+Revision ID: c4d3513a4ea6
+Revises: 711143b3f9ae
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d3513a4ea6'
+down_revision: Union[str, Sequence[str], None] = '711143b3f9ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        'positions',
+        sa.Column('id', sa.Integer, primary_key=True, index=True),
+        sa.Column('asset_id', sa.Integer, sa.ForeignKey('assets.id'), nullable=False, index=True),
+        sa.Column('fund_alloc', sa.String, nullable=False, server_default=''),
+        sa.Column('sub_alloc', sa.String, nullable=False, server_default=''),
+        sa.Column('net_quantity', sa.Numeric(38, 10), nullable=False, server_default='0'),
+        sa.Column('cost_sum', sa.Numeric(38, 10), nullable=False, server_default='0'),
+        sa.Column('trade_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('first_trade_id', sa.Integer, nullable=True),
+        sa.UniqueConstraint('asset_id', 'fund_alloc', 'sub_alloc', name='uq_position_key'),
+    )
+
+    # Backfill from the existing trade history
+    op.execute(
+        """
+        INSERT INTO positions
+            (asset_id, fund_alloc, sub_alloc, net_quantity, cost_sum, trade_count, first_trade_id)
+        SELECT
+            asset_id,
+            COALESCE(fund_alloc, ''),
+            COALESCE(sub_alloc, ''),
+            SUM(CASE WHEN direction IN ('Buy Long', 'Cover Short') THEN quantity ELSE -quantity END),
+            SUM(CASE WHEN direction IN ('Buy Long', 'Sell Short') THEN quantity * price ELSE 0 END),
+            COUNT(id),
+            MIN(id)
+        FROM trades
+        GROUP BY asset_id, COALESCE(fund_alloc, ''), COALESCE(sub_alloc, '')
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('positions')
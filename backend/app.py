@@ -6,7 +6,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.routers import assets, trades, holdings, macro, watchlist, auth, accesscontrol
 from backend.routers import assetdata
-from backend.database import Base, engine
+from backend.database import Base, engine, SessionLocal, create_tables
+from backend.services import macro as macro_snapshot, marketdata, positions, refdata, search, security_master
 from backend.routers.macro import router as macro_router
 
 
@@ -19,7 +20,51 @@ app = FastAPI(
 # Drop all tables
 # Base.metadata.drop_all(bind=engine)
 
-Base.metadata.create_all(bind=engine)
+create_tables()
+
+
+@app.on_event("startup")
+def backfill_positions():
+    """Populate the positions table on databases that predate it."""
+    db = SessionLocal()
+    try:
+        positions.ensure_built(db)
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def warm_refdata():
+    """
+    Ingest stale reference workbooks, memory-map their Arrow extracts and
+    start watching the workbooks for changes. Every new snapshot is loaded
+    into ``security_master`` and re-indexed for search.
+    """
+    refdata.store.listeners.append(security_master.sync_on_refresh)
+    refdata.store.listeners.append(search.index.update)
+    refdata.store.warm()
+    refdata.refresher.start()
+
+
+@app.on_event("startup")
+def start_macro_snapshot():
+    """Refresh the macro dashboard in the background; requests only read it."""
+    macro_snapshot.service.start()
+
+
+@app.on_event("shutdown")
+def stop_refdata_refresher():
+    refdata.refresher.stop()
+
+
+@app.on_event("shutdown")
+def stop_marketdata():
+    marketdata.manager.stop()
+
+
+@app.on_event("shutdown")
+def stop_macro_snapshot():
+    macro_snapshot.service.stop()
 
 
 app.add_middleware(
@@ -37,6 +82,7 @@ app.include_router(trades.router, prefix="/api/trades", tags=["Trades"])
 app.include_router(holdings.router, prefix="/api/holdings", tags=["Holdings"])
 app.include_router(macro.router)
 app.include_router(watchlist.router)
+app.include_router(watchlist.ws_router)
 app.include_router(assetdata.router, prefix="/api", tags=["AssetData"])
 app.include_router(auth.router)
 
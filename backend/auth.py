@@ -6,6 +6,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from backend import models
 from backend.database import get_db
+from backend.services.permissions import resolver
 
 import os
 
@@ -56,13 +57,13 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     return user
 
 def check_permission(user: models.User, permission: str):
-    has_permission = any(
-        action.name == permission
-        for role in user.roles
-        for action in role.actions
-    )
-    if not has_permission:
+    # Compiled once per user and cached (services/permissions.py): no SQL here
+    if not resolver.get(user).allows(permission):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"You do not have permission to {permission}",
         )
+
+def is_admin(user: models.User) -> bool:
+    """Admins see every user's assets, trades and watch lists."""
+    return resolver.get(user).is_admin
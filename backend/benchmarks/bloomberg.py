@@ -0,0 +1,143 @@
+# backend/benchmarks/bloomberg.py
+"""
+End-to-end throughput of the Bloomberg-backed lookups against the offline
+fake (backend/fake_blpapi.py), replaying the reference extracts.
+
+``threads`` concurrent callers (the way FastAPI's threadpool runs sync
+routes) look up CUSIPs from the extracts through:
+
+  * a new session per lookup (the pre-pool behaviour),
+  * the session pool, one request per lookup (get_raw_bloomberg_data),
+  * the pool plus the request batcher,
+  * the pool, batcher and field cache (fetch_watchlist_data),
+
+then the macro dashboard groups, one request per group vs one request.
+Latency and failures come from the BLP_FAKE_* settings, or the arguments.
+
+    python -m backend.benchmarks.bloomberg [lookups] [threads] [latency_ms] [start_ms] [error_rate]
+"""
+import os
+import sys
+import threading
+import time
+from typing import Callable, List
+
+os.environ.setdefault("BLP_FAKE", "1")  # before backend.bloomberg picks its blpapi
+
+import numpy as np
+
+from backend import bloomberg, fake_blpapi
+from backend.services import bloomberg as blp
+from backend.services import refdata
+from backend.services.macro import MACRO_GROUPS
+
+
+def _unpooled_lookup(security: str, fields: List[str]) -> dict:
+    client = bloomberg.BloombergClient()
+    try:
+        request = client.svc.createRequest("ReferenceDataRequest")
+        request.getElement("securities").appendValue(security)
+        for f in fields:
+            request.getElement("fields").appendValue(f)
+        return {msg.messageType(): msg for msg in client.request(request)}
+    finally:
+        client.close()
+
+
+def drive(label: str, calls: List[Callable[[], object]], threads: int) -> None:
+    fake_blpapi.reset_stats()
+    latencies: List[float] = []
+    errors = []
+    lock = threading.Lock()
+    pending = iter(calls)
+
+    def worker():
+        while True:
+            with lock:
+                call = next(pending, None)
+            if call is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                call()
+            except Exception as exc:
+                with lock:
+                    errors.append(exc)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+    ms = np.asarray(latencies or [0.0]) * 1000
+    print(
+        f"  {label:<28} {len(calls) / elapsed:8.0f}/s  p50={np.percentile(ms, 50):7.1f}ms  "
+        f"p99={np.percentile(ms, 99):7.1f}ms  upstream requests={fake_blpapi.stats['requests']:,}  "
+        f"sessions={fake_blpapi.stats['sessions_started']:,}  errors={len(errors):,}"
+    )
+
+
+def run(lookups: int = 2000, threads: int = 32, latency_ms: float = 20, start_ms: float = 200, error_rate: float = 0.0) -> None:
+    fake_blpapi.config.latency_ms = latency_ms
+    fake_blpapi.config.per_security_ms = latency_ms / 100
+    fake_blpapi.config.start_ms = start_ms
+    fake_blpapi.config.error_rate = error_rate
+
+    refdata.store.warm()
+    cusips, asset_types = [], []
+    for asset_type, path in refdata.store.files.items():
+        table = refdata.store.snapshot.tables.get(path)
+        if table is not None and asset_type in blp.FIELD_MAPS:
+            ids = list(table.index)
+            cusips += ids
+            asset_types += [asset_type] * len(ids)
+    if not cusips:
+        print("no reference extracts found")
+        return
+    rng = np.random.default_rng(0)
+    picks = rng.integers(len(cusips), size=lookups)
+    print(
+        f"{lookups:,} lookups over {len(set(cusips)):,} securities, {threads} threads, "
+        f"latency {latency_ms}ms + {latency_ms / 100}ms/security, session start {start_ms}ms"
+    )
+
+    # fetch_watchlist_data appends the yellow key; the extract IDs already carry one
+    calls = [(cusips[i].rsplit(" ", 1)[0], asset_types[i]) for i in picks]
+
+    unpooled = calls[: max(1, lookups // 10)]
+    drive(
+        f"per-call session (n={len(unpooled)})",
+        [lambda c=c, t=t: _unpooled_lookup(f"{c} Corp", blp.FIELD_MAPS[t]) for c, t in unpooled],
+        threads,
+    )
+    bloomberg.pool_for().warm()
+    drive("pooled", [lambda c=c, t=t: blp.get_raw_bloomberg_data([f"{c} Corp"], blp.FIELD_MAPS[t]) for c, t in calls], threads)
+    drive("pooled + batched", [lambda c=c, t=t: blp.batcher.lookup(f"{c} Corp", blp.FIELD_MAPS[t]) for c, t in calls], threads)
+    print(f"  batcher: {blp.batcher.stats()}")
+    blp.field_cache.clear()
+    drive("pooled + batched + cached", [lambda c=c, t=t: blp.fetch_watchlist_data(c, t) for c, t in calls], threads)
+    print(f"  field cache: {blp.field_cache.stats()}")
+
+    macro_calls = max(1, lookups // 20)
+    drive(
+        f"macro, per group (n={macro_calls})",
+        [lambda: [blp.get_raw_bloomberg_data(tickers, blp.FIELDS) for _, tickers in MACRO_GROUPS]] * macro_calls,
+        threads,
+    )
+    every_ticker = [t for _, tickers in MACRO_GROUPS for t in tickers]
+    drive(
+        f"macro, one request (n={macro_calls})",
+        [lambda: blp.get_raw_bloomberg_data(every_ticker, blp.FIELDS)] * macro_calls,
+        threads,
+    )
+    bloomberg.close_pools()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(*[int(a) for a in args[:2]], *[float(a) for a in args[2:]])
@@ -0,0 +1,96 @@
+# backend/benchmarks/blp_decode.py
+"""
+Decode time of a large ReferenceDataResponse: the previous string path
+(getElementAsString per cell, a DataFrame of strings, then per-column
+``astype(str).str.rstrip("%")`` / ``to_numeric``) vs the typed decoder in
+services/blp_decode.py. Messages come from the fake blpapi, replaying the
+reference extracts; "traversal" is the cost of just visiting every element,
+which with the pure-Python fake is a large share of both paths.
+
+    python -m backend.benchmarks.blp_decode [securities] [repeats]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("BLP_FAKE", "1")  # before backend.bloomberg picks its blpapi
+
+import numpy as np
+import pandas as pd
+
+from backend import fake_blpapi
+from backend.services import refdata
+from backend.services.blp_decode import ReferenceColumns
+from backend.services.bloomberg import FIELD_MAPS, FIELD_TYPES, STRING_ONLY
+
+
+def legacy_decode(message, fields):
+    rows = []
+    sd = message.getElement("securityData")
+    for i in range(sd.numValues()):
+        elm = sd.getValueAsElement(i)
+        fd = elm.getElement("fieldData")
+        rows.append([elm.getElementAsString("security")] + [
+            fd.getElementAsString(f) if fd.hasElement(f) else None for f in fields
+        ])
+    df = pd.DataFrame(rows, columns=["ticker"] + fields)
+    for f in fields:
+        if f not in STRING_ONLY:
+            df[f] = pd.to_numeric(df[f].astype(str).str.rstrip("%"), errors="coerce")
+    return df
+
+
+def traverse(message):
+    sd = message.getElement("securityData")
+    for i in range(sd.numValues()):
+        elm = sd.getValueAsElement(i)
+        elm.getElementAsString("security")
+        for element in elm.getElement("fieldData").elements():
+            element.name()
+
+
+def typed_decode(message, securities, fields):
+    columns = ReferenceColumns(securities, fields, FIELD_TYPES)
+    columns.decode(message)
+    return columns.to_frame()
+
+
+def best_of(repeats, fn):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def run(securities: int = 5000, repeats: int = 5) -> None:
+    refdata.store.warm()
+    ids = [i for t in refdata.store.snapshot.tables.values() for i in t.index]
+    if not ids:
+        print("no reference extracts found")
+        return
+    tickers = [ids[i % len(ids)] for i in range(securities)]
+    fields = FIELD_MAPS["Corporate Bond"]
+    message = fake_blpapi.Message(
+        "ReferenceDataResponse", {"securityData": fake_blpapi.reference_data(tickers, fields)}
+    )
+    print(f"{securities:,} securities x {len(fields)} fields")
+
+    floor = best_of(repeats, lambda: traverse(message))
+    legacy = best_of(repeats, lambda: legacy_decode(message, fields))
+    typed = best_of(repeats, lambda: typed_decode(message, tickers, fields))
+    print(f"  traversal          {floor * 1000:8.1f}ms")
+    print(f"  string round-trip  {legacy * 1000:8.1f}ms  (+{(legacy - floor) * 1000:.1f}ms over traversal)")
+    print(
+        f"  typed              {typed * 1000:8.1f}ms  (+{(typed - floor) * 1000:.1f}ms over traversal, "
+        f"{legacy / typed:.1f}x overall)"
+    )
+
+    a, b = legacy_decode(message, fields), typed_decode(message, tickers, fields)
+    numeric = [f for f in fields if FIELD_TYPES[f] == "float"]
+    assert np.allclose(a[numeric].to_numpy(float), b[numeric].to_numpy(float), equal_nan=True)
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:]])
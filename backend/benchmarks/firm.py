@@ -0,0 +1,50 @@
+# backend/benchmarks/firm.py
+"""
+Speedup of the process-pool firm valuation over the single-process path.
+
+Runs against the database configured by DATABASE_URL, checks that both paths
+produce the same per-fund totals and reports the best time of each.
+
+    python -m backend.benchmarks.firm [workers] [repeats]
+"""
+import math
+import sys
+
+from backend.database import SessionLocal, create_tables
+from backend.services import firm
+
+
+def best_of(db, workers: int, repeats: int):
+    reports = [firm.value_firm(db, workers) for _ in range(repeats)]
+    return min(reports, key=lambda r: r.elapsed_seconds)
+
+
+def run(workers: int = firm.FIRM_VALUATION_WORKERS, repeats: int = 3) -> bool:
+    create_tables()
+    db = SessionLocal()
+    try:
+        serial = best_of(db, 1, repeats)
+        parallel = best_of(db, workers, repeats)
+    finally:
+        db.close()
+
+    ok = len(serial.funds) == len(parallel.funds) and all(
+        s.fund == p.fund
+        and s.assets == p.assets
+        and math.isclose(s.market_value, p.market_value, rel_tol=1e-9, abs_tol=1e-6)
+        and math.isclose(s.mtm_pnl, p.mtm_pnl, rel_tol=1e-9, abs_tol=1e-6)
+        for s, p in zip(serial.funds, parallel.funds)
+    )
+    n_assets = sum(f.assets for f in serial.funds)
+    print(f"{len(serial.funds)} funds, {n_assets:,} fund/asset holdings")
+    print(f"  single process     {serial.elapsed_seconds:7.2f}s")
+    print(
+        f"  {parallel.workers} worker(s)        {parallel.elapsed_seconds:7.2f}s  "
+        f"speedup x{serial.elapsed_seconds / parallel.elapsed_seconds:.2f}"
+    )
+    print("  parity OK" if ok else "  PARITY MISMATCH")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run(*[int(a) for a in sys.argv[1:]]) else 1)
@@ -0,0 +1,69 @@
+# backend/benchmarks/history.py
+"""
+Backfill and window computation of the close history (services/history.py)
+against the offline fake, for the securities in the reference extracts plus
+the macro tickers:
+
+  * cold backfill, one HistoricalDataRequest per security vs batched,
+  * a week later, the incremental append (only the new closes),
+  * change / high-low windows computed locally vs requested from Bloomberg.
+
+    python -m backend.benchmarks.history [latency_ms] [per_security_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("BLP_FAKE", "1")  # before backend.bloomberg picks its blpapi
+
+
+from backend import bloomberg, fake_blpapi
+from backend.services import bloomberg as blp
+from backend.services import history, refdata
+from backend.services.macro import MACRO_GROUPS
+
+
+def timed(label: str, fn) -> float:
+    fake_blpapi.reset_stats()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"  {label:<36} {elapsed * 1000:9.1f}ms  upstream requests={fake_blpapi.stats['requests']:,}")
+    return elapsed
+
+
+def run(latency_ms: float = 20, per_security_ms: float = 0.2) -> None:
+    fake_blpapi.config.latency_ms = latency_ms
+    fake_blpapi.config.per_security_ms = per_security_ms
+
+    refdata.store.warm()
+    tickers = [t for _, group in MACRO_GROUPS for t in group]
+    tickers += [c for t in refdata.store.snapshot.tables.values() for c in t.index]
+    if len(tickers) == len([t for _, g in MACRO_GROUPS for t in g]):
+        print("no reference extracts found")
+        return
+    # Backfill as of a week ago, so "today" then has new closes to append
+    today, week_ago = date.today(), date.today() - timedelta(days=7)
+    print(f"{len(tickers):,} securities, latency {latency_ms}ms + {per_security_ms}ms/security")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        one_by_one = history.HistoryStore(cache_dir=os.path.join(tmp, "a"), batch_size=1)
+        timed("cold backfill, per security", lambda: one_by_one.backfill(tickers, week_ago))
+        store = history.HistoryStore(cache_dir=os.path.join(tmp, "b"))
+        timed("cold backfill, batched", lambda: store.backfill(tickers, week_ago))
+        timed("same day again", lambda: store.backfill(tickers, week_ago))
+        timed("a week later, incremental", lambda: store.backfill(tickers, today))
+        print(f"  {store.stats()['points']:,} closes in {os.path.getsize(store.path) / 1024:.0f} KiB")
+
+        last = blp.get_raw_bloomberg_data(tickers, ["PX_LAST"]).set_index("ticker")["PX_LAST"]
+        closes = store.closes(tickers)
+        timed("windows, computed locally", lambda: history.window_fields(closes, last))
+        fields = sorted(history.WINDOW_FIELDS)
+        timed("windows, requested", lambda: blp.get_raw_bloomberg_data(tickers, fields))
+    bloomberg.close_pools()
+
+
+if __name__ == "__main__":
+    run(*[float(a) for a in sys.argv[1:]])
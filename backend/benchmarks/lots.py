@@ -0,0 +1,48 @@
+# backend/benchmarks/lots.py
+"""
+Throughput of the lot engine on a synthetic book.
+
+    python -m backend.benchmarks.lots [trades] [assets]
+"""
+import random
+import sys
+import time
+
+from backend.services import lots
+
+DIRECTIONS = ["Buy Long", "Sell Long", "Sell Short", "Cover Short"]
+
+
+def synthetic_trades(n_trades: int, n_assets: int, seed: int = 11):
+    rng = random.Random(seed)
+    rows = [
+        (
+            rng.randrange(n_assets),
+            rng.choice(DIRECTIONS),
+            float(rng.randint(1, 10_000)),
+            round(rng.uniform(80, 120), 4),
+        )
+        for _ in range(n_trades)
+    ]
+    rows.sort(key=lambda r: r[0])  # stable: keeps generation order as the date order
+    return rows
+
+
+def run(n_trades: int = 1_000_000, n_assets: int = 5_000) -> None:
+    t0 = time.perf_counter()
+    rows = synthetic_trades(n_trades, n_assets)
+    print(f"generated {n_trades:,} trades over {n_assets:,} assets in {time.perf_counter() - t0:.2f}s")
+
+    for method in lots.METHODS:
+        t0 = time.perf_counter()
+        books = lots.process_trades(rows, method)
+        elapsed = time.perf_counter() - t0
+        open_lots = sum(len(b.lots) for b in books.values())
+        print(
+            f"  {method:<8} {elapsed:6.2f}s  "
+            f"{n_trades / elapsed / 1e6:5.2f}M trades/s  open lots={open_lots:,}"
+        )
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:]])
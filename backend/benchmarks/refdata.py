@@ -0,0 +1,121 @@
+# backend/benchmarks/refdata.py
+"""
+Reference-data path before and after the memory-mapped Arrow cache.
+
+Builds a synthetic workbook shaped like bonds.xlsx (``rows`` securities) in a
+temporary directory and reports:
+
+  * parse / ingest time: pd.read_excel versus ingest() into Arrow + sidecar
+  * per-lookup latency: DataFrame scan of the ID column versus the store
+  * RSS per worker: ``workers`` fresh processes each load the data set, once
+    as a parsed DataFrame and once as a memory-mapped table
+
+    python -m backend.benchmarks.refdata [rows] [workers] [lookups]
+"""
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from backend.services import refdata
+
+TEMPLATE = "backend/data/bonds.xlsx"
+
+
+def synthetic_workbook(path: str, rows: int, seed: int = 5) -> list:
+    """Write ``rows`` securities resampled from the bonds template; returns the CUSIPs."""
+    rng = random.Random(seed)
+    template = pd.read_excel(TEMPLATE, header=None)
+    banner, header, mnemonics, body = template.iloc[:2], template.iloc[2], template.iloc[3], template.iloc[4:]
+    sample = body.sample(n=rows, replace=True, random_state=seed).reset_index(drop=True)
+    cusips = [f"US{rng.randrange(10**10):010d} Corp" for _ in range(rows)]
+    sample[0] = cusips
+    out = pd.concat([banner, header.to_frame().T, mnemonics.to_frame().T, sample], ignore_index=True)
+    out.to_excel(path, header=False, index=False)
+    return cusips
+
+
+def rss() -> dict:
+    """Resident set size in KiB: total and private (anonymous) pages."""
+    values = {}
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                key, _, rest = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssFile"):
+                    values[key] = int(rest.split()[0])
+    except FileNotFoundError:
+        import resource
+        values["VmRSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return values
+
+
+def _worker(mode: str, xlsx: str, cache_dir: str, probe: str, queue) -> None:
+    before = rss()
+    if mode == "xlsx":
+        df = pd.read_excel(xlsx, header=refdata.HEADER_ROW)
+        assert not df.loc[df["ID"] == probe].empty
+    else:
+        store = refdata.RefDataStore({"Corporate Bond": xlsx}, cache_dir)
+        assert store.lookup(probe, "Corporate Bond") is not None
+    after = rss()
+    queue.put({k: after[k] - before.get(k, 0) for k in after})
+
+
+def worker_rss(mode: str, xlsx: str, cache_dir: str, probe: str, workers: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(mode, xlsx, cache_dir, probe, queue)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    results = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return {k: statistics.mean(r.get(k, 0) for r in results) for k in results[0]}
+
+
+def run(rows: int = 20_000, workers: int = 4, lookups: int = 2_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        xlsx = os.path.join(tmp, "bonds.xlsx")
+        cache_dir = os.path.join(tmp, "cache")
+        cusips = synthetic_workbook(xlsx, rows)
+        probes = random.Random(1).choices(cusips, k=lookups)
+        print(f"synthetic workbook: {rows:,} rows, {os.path.getsize(xlsx) / 1e6:.1f} MB")
+
+        t0 = time.perf_counter()
+        df = pd.read_excel(xlsx, header=refdata.HEADER_ROW)
+        parse = time.perf_counter() - t0
+        ingest = refdata.ingest(xlsx, cache_dir)
+        t0 = time.perf_counter()
+        table = refdata.open_table(xlsx, os.stat(xlsx).st_mtime, cache_dir)
+        open_mmap = time.perf_counter() - t0
+        print(f"  read_excel           {parse:8.3f}s")
+        print(f"  ingest (one-off)     {ingest:8.3f}s")
+        print(f"  open memory map      {open_mmap:8.4f}s  ({table.table.nbytes / 1e6:.1f} MB mapped)")
+
+        t0 = time.perf_counter()
+        for cusip in probes[:200]:
+            df.loc[df["ID"] == cusip].iloc[0].to_dict()
+        scan = (time.perf_counter() - t0) / 200
+        store = refdata.RefDataStore({"Corporate Bond": xlsx}, cache_dir)
+        store.warm()
+        t0 = time.perf_counter()
+        for cusip in probes:
+            store.lookup(cusip, "Corporate Bond")
+        indexed = (time.perf_counter() - t0) / lookups
+        print(f"  lookup, parsed scan  {scan * 1e6:8.1f}us  (excluding the per-call read_excel)")
+        print(f"  lookup, mmap + index {indexed * 1e6:8.1f}us")
+
+        for mode, label in (("xlsx", "parsed DataFrame"), ("arrow", "memory-mapped")):
+            delta = worker_rss(mode, xlsx, cache_dir, probes[0], workers)
+            detail = "  ".join(f"{k} +{v / 1024:.1f} MiB" for k, v in sorted(delta.items()))
+            print(f"  RSS per worker ({workers}), {label:<16} {detail}")
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,67 @@
+# backend/benchmarks/search.py
+"""
+Typeahead latency of the reference search index on a synthetic extract.
+
+Builds a WorkbookIndex over ``rows`` rows shaped like bonds.xlsx, then times
+a mix of queries: full and partial identifiers, bare CUSIPs, issuer and deal
+name prefixes, and short one- or two-character prefixes.
+
+    python -m backend.benchmarks.search [rows] [queries]
+"""
+import sys
+import time
+
+import numpy as np
+
+from backend.benchmarks.security_master import synthetic_extract
+from backend.services.search import WorkbookIndex, top_hits
+
+
+def sample_queries(extract, count: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    ids = extract["ID"].to_numpy()
+    issuers = extract["Issuer"].to_numpy()
+    deals = extract["Asset (Deal Name)"].to_numpy()
+    queries = []
+    for i in range(count):
+        row = int(rng.integers(len(extract)))
+        kind = i % 6
+        if kind == 0:
+            queries.append(ids[row])
+        elif kind == 1:
+            queries.append(ids[row][:6])
+        elif kind == 2:
+            queries.append(ids[row][2:11])  # bare CUSIP inside the ISIN-style ID
+        elif kind == 3:
+            queries.append(issuers[row].lower())
+        elif kind == 4:
+            queries.append(deals[row][:7])
+        else:
+            queries.append(issuers[row][:int(rng.integers(1, 3))])
+    return queries
+
+
+def run(rows: int = 100_000, queries: int = 2_000) -> None:
+    extract = synthetic_extract(rows)
+    print(f"synthetic extract: {rows:,} rows")
+
+    t0 = time.perf_counter()
+    index = WorkbookIndex(
+        ["CORPORATE_BOND"], extract["ID"], extract["Issuer"], extract["Asset (Deal Name)"]
+    )
+    print(f"  build          {time.perf_counter() - t0:8.2f}s  vocab={len(index.vocab):,}  trigrams={len(index.grams):,}")
+
+    latencies = []
+    for query in sample_queries(extract, queries):
+        t0 = time.perf_counter()
+        top_hits([index], query)
+        latencies.append(time.perf_counter() - t0)
+    ms = np.asarray(latencies) * 1000
+    print(
+        f"  {len(ms):,} queries  p50={np.percentile(ms, 50):.2f}ms  "
+        f"p99={np.percentile(ms, 99):.2f}ms  max={ms.max():.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:]])
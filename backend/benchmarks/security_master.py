@@ -0,0 +1,85 @@
+# backend/benchmarks/security_master.py
+"""
+Load time of the security_master ETL on a synthetic extract.
+
+Builds a ``rows``-row extract shaped like bonds.xlsx, loads it into a
+throwaway SQLite database, reloads it unchanged, then reloads it with 1% of
+rows modified and 0.5% removed.
+
+    python -m backend.benchmarks.security_master [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base
+from backend.services import security_master
+
+RATINGS = ["BB+", "BB", "BB-", "B+", "B", "B-", "CCC+", None]
+
+
+def synthetic_extract(rows: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {
+        "ID": [f"US{n:010d} Corp" for n in rng.choice(10**10, size=rows, replace=False)],
+        "Issuer": [f"ISSUER {n}" for n in rng.integers(0, rows // 10 + 1, size=rows)],
+        "Asset (Deal Name)": [f"DEAL {n}" for n in range(rows)],
+        "Maturity": [
+            f"{m}/{d}/{y}" for m, d, y in zip(
+                rng.integers(1, 13, rows), rng.integers(1, 29, rows), rng.integers(2026, 2040, rows)
+            )
+        ],
+        "Payment Rank": rng.choice(["Secured", "Sr Unsecured", "Subordinated"], size=rows),
+        "Moody CFR": rng.choice(RATINGS, size=rows),
+        "Moody Asset": rng.choice(RATINGS, size=rows),
+        "S&P CFR": rng.choice(RATINGS, size=rows),
+        "S&P Asset": rng.choice(RATINGS, size=rows),
+        "Amount Outstanding": rng.integers(1, 2000, size=rows) * 1_000_000,
+    }
+    for col in security_master.SECURITY_MASTER_COLUMNS:
+        if col not in data:
+            data[col] = rng.normal(100, 15, size=rows)
+    return pd.DataFrame(data)
+
+
+def timed_load(db, extract, label):
+    t0 = time.perf_counter()
+    counts = security_master.load(db, extract, models.AssetType.CORPORATE_BOND, "synthetic")
+    elapsed = time.perf_counter() - t0
+    print(f"  {label:<22} {elapsed:6.2f}s  " + "  ".join(f"{k}={v:,}" for k, v in counts.items()))
+
+
+def run(rows: int = 100_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine, tables=[models.SecurityMaster.__table__])
+        db = sessionmaker(bind=engine)()
+        extract = synthetic_extract(rows)
+        print(f"synthetic extract: {rows:,} rows")
+
+        timed_load(db, extract, "initial load")
+        timed_load(db, extract, "reload, unchanged")
+
+        changed = extract.copy()
+        rng = np.random.default_rng(9)
+        touched = rng.choice(rows, size=max(1, rows // 100), replace=False)
+        changed.loc[touched, "Bid Price"] += 0.25
+        removed = rng.choice(rows, size=max(1, rows // 200), replace=False)
+        changed = changed.drop(index=removed)
+        timed_load(db, changed, "reload, 1% changed")
+
+        total = db.scalar(select(func.count()).select_from(models.SecurityMaster))
+        print(f"  security_master rows: {total:,}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,86 @@
+# backend/benchmarks/valuation.py
+"""
+Parity and timing check for the vectorized valuation kernel.
+
+Generates randomized books, values them with both the NumPy kernel and the
+per-row Decimal reference, and reports the worst deviation and timings.
+
+    python -m backend.benchmarks.valuation [rows] [books]
+"""
+import random
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from backend.models import AssetType
+from backend.services import valuation
+
+TYPES = [t.value for t in AssetType]
+
+
+def random_book(rows: int, rng: random.Random):
+    position, total_cost, mark, types = [], [], [], []
+    for _ in range(rows):
+        qty = Decimal(str(round(rng.uniform(-5e7, 5e7), 4)))
+        if rng.random() < 0.05:
+            qty = Decimal(0)
+        price = Decimal(str(round(rng.uniform(1, 150), 4)))
+        position.append(qty)
+        total_cost.append(qty * price * Decimal(str(round(rng.uniform(0.5, 1.5), 4))))
+        mark.append(None if rng.random() < 0.03 else Decimal(str(round(rng.uniform(1, 150), 4))))
+        types.append(rng.choice(TYPES))
+    return position, total_cost, mark, types
+
+
+def run(rows: int = 10_000, books: int = 20, seed: int = 7) -> bool:
+    rng = random.Random(seed)
+    worst = 0.0
+    t_dec = t_cols = t_vec = 0.0
+    ok = True
+    for _ in range(books):
+        position, total_cost, mark, types = random_book(rows, rng)
+
+        t0 = time.perf_counter()
+        reference = [
+            valuation.value_decimal(p, c, m, t)
+            for p, c, m, t in zip(position, total_cost, mark, types)
+        ]
+        t_dec += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        pos = valuation.as_column(position)
+        cost = valuation.as_column(total_cost)
+        marks = valuation.as_column(mark)
+        scale = valuation.price_scale(types)
+        t_cols += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        avg = valuation.average_cost(cost, pos)
+        mv, pnl = valuation.value_book(pos, avg, marks, scale)
+        t_vec += time.perf_counter() - t0
+
+        for name, got, idx in (("avg_cost", avg, 0), ("market_value", mv, 1), ("pnl", pnl, 2)):
+            want = np.array([float(r[idx]) for r in reference])
+            err = np.abs(got - want)
+            bound = valuation.ABS_TOLERANCE + valuation.REL_TOLERANCE * np.abs(want)
+            if not np.all(err <= bound):
+                i = int(np.argmax(err - bound))
+                print(f"MISMATCH {name}[{i}]: kernel={got[i]!r} decimal={want[i]!r}")
+                ok = False
+            rel = err / np.maximum(np.abs(want), 1.0)
+            worst = max(worst, float(rel.max()))
+
+    print(f"{books} books x {rows} rows")
+    print(f"  decimal reference: {t_dec / books * 1e3:8.2f} ms/book")
+    print(f"  column build:      {t_cols / books * 1e3:8.2f} ms/book")
+    print(f"  numpy kernel:      {t_vec / books * 1e3:8.2f} ms/book")
+    print(f"  worst relative deviation: {worst:.3e} (tolerance {valuation.REL_TOLERANCE:.0e})")
+    print("PARITY OK" if ok else "PARITY FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    sys.exit(0 if run(*args) else 1)
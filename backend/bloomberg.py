@@ -1,23 +1,113 @@
 """
 Service layer for Bloomberg API interactions using blpapi.
 Reads environment variables for config.
+
+Sessions are expensive to start (connect, authenticate, open the service), so
+callers borrow a warm ``BloombergClient`` from a ``SessionPool`` instead of
+creating one per request:
+
+    with pool_for(host, port).session() as client:
+        for msg in client.request(req): ...
+
+A borrowed session is health-checked first (pending session-status events are
+drained without blocking); sessions that report a dropped connection, or whose
+borrower raised mid-request, are stopped and replaced. Failed connects back
+off exponentially, during which borrowers fail fast with ConnectionError.
+
+Set ``BLP_FAKE=1`` to run against backend/fake_blpapi.py instead of a
+terminal.
 """
 import os
-import blpapi
-from blpapi import SessionOptions, Session, Service
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+if os.getenv("BLP_FAKE"):
+    # Offline stand-in replaying the reference extracts (backend/fake_blpapi.py)
+    from backend import fake_blpapi as blpapi
+else:
+    import blpapi
+
+SessionOptions, Session, Service = blpapi.SessionOptions, blpapi.Session, blpapi.Service
+
+BLP_HOST = os.getenv("BLP_HOST", "localhost")
+BLP_PORT = int(os.getenv("BLP_PORT", 8194))
+BLP_POOL_SIZE = int(os.getenv("BLP_POOL_SIZE", 4))
+# Seconds a borrower waits for a free session before giving up
+BLP_POOL_TIMEOUT = float(os.getenv("BLP_POOL_TIMEOUT", 10))
+# Seconds a single request may go without an event from the session
+BLP_REQUEST_TIMEOUT = float(os.getenv("BLP_REQUEST_TIMEOUT", 30))
+BLP_RECONNECT_BACKOFF = float(os.getenv("BLP_RECONNECT_BACKOFF", 0.5))
+BLP_RECONNECT_BACKOFF_MAX = float(os.getenv("BLP_RECONNECT_BACKOFF_MAX", 30))
+
+REFDATA_SERVICE = "//blp/refdata"
+
+# Session-status messages after which a session is no longer usable
+DEAD_SESSION_MESSAGES = {"SessionTerminated", "SessionConnectionDown", "SessionStartupFailure", "ServiceDown"}
+
+# What a request through the pool raises when Bloomberg is unreachable or
+# slow: callers that can fall back catch these, not every error
+REQUEST_ERRORS = (ConnectionError, TimeoutError) + ((blpapi.Exception,) if hasattr(blpapi, "Exception") else ())
+
 
 class BloombergClient:
     """Wrapper around Bloomberg API session and requests."""
-    def __init__(self):
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, service: str = REFDATA_SERVICE):
         options = SessionOptions()
-        options.setServerHost(os.getenv("BLP_HOST", "localhost"))
-        options.setServerPort(int(os.getenv("BLP_PORT", 8194)))
+        options.setServerHost(host or BLP_HOST)
+        options.setServerPort(int(port or BLP_PORT))
         self.session = Session(options)
         if not self.session.start():
             raise ConnectionError("Failed to start Bloomberg session")
-        if not self.session.openService("//blp/refdata"):
-            raise ConnectionError("Failed to open //blp/refdata service")
-        self.svc = self.session.getService("//blp/refdata")
+        if not self.session.openService(service):
+            self.session.stop()
+            raise ConnectionError(f"Failed to open {service} service")
+        self.svc = self.session.getService(service)
+        self.alive = True
+        self.requests = 0
+
+    def _check_status(self, msg) -> None:
+        if str(msg.messageType()) in DEAD_SESSION_MESSAGES:
+            self.alive = False
+            raise ConnectionError(f"Bloomberg session lost: {msg.messageType()}")
+
+    def healthy(self) -> bool:
+        """Drain pending session-status events without blocking."""
+        try:
+            while self.alive:
+                ev = self.session.tryNextEvent()
+                if ev is None:
+                    break
+                for msg in ev:
+                    self._check_status(msg)
+        except Exception:
+            self.alive = False
+        return self.alive
+
+    def request(self, request, timeout: float = BLP_REQUEST_TIMEOUT) -> Iterator:
+        """Send ``request`` and yield its response messages until the final RESPONSE event."""
+        self.requests += 1
+        self.session.sendRequest(request)
+        while True:
+            ev = self.session.nextEvent(int(timeout * 1000))
+            if ev.eventType() == blpapi.Event.TIMEOUT:
+                self.alive = False  # a late response would leak into the next request
+                raise TimeoutError(f"No Bloomberg response within {timeout}s")
+            for msg in ev:
+                if ev.eventType() in (blpapi.Event.SESSION_STATUS, blpapi.Event.SERVICE_STATUS):
+                    self._check_status(msg)
+                else:
+                    yield msg
+            if ev.eventType() == blpapi.Event.RESPONSE:
+                return
+
+    def close(self) -> None:
+        self.alive = False
+        try:
+            self.session.stop()
+        except Exception:
+            pass
 
     def bulk_fetch(self, tickers: list, fields: list) -> dict:
         """
@@ -30,16 +120,193 @@ class BloombergClient:
         for f in fields:
             request.getElement("fields").appendValue(f)
 
-        self.session.sendRequest(request)
         results = {}
-        while True:
-            ev = self.session.nextEvent()
-            for msg in ev:
-                if msg.messageType() == "ReferenceDataResponse":
-                    for securityData in msg.getElement("securityData").values():
-                        ticker = securityData.getElementAsString("security")
-                        fldData = securityData.getElement("fieldData")
-                        results[ticker] = {f: fldData.getElementAsFloat(f) if fldData.hasElement(f) else None for f in fields}
-            if ev.eventType() == blpapi.Event.RESPONSE:
-                break
-        return results
\ No newline at end of file
+        for msg in self.request(request):
+            if msg.messageType() == "ReferenceDataResponse":
+                for securityData in msg.getElement("securityData").values():
+                    ticker = securityData.getElementAsString("security")
+                    fldData = securityData.getElement("fieldData")
+                    results[ticker] = {f: fldData.getElementAsFloat(f) if fldData.hasElement(f) else None for f in fields}
+        return results
+
+
+class SessionPool:
+    """Thread-safe pool of up to ``size`` warm BloombergClient sessions."""
+
+    def __init__(
+        self,
+        factory: Callable[[], BloombergClient] = BloombergClient,
+        size: int = BLP_POOL_SIZE,
+        timeout: float = BLP_POOL_TIMEOUT,
+        backoff: float = BLP_RECONNECT_BACKOFF,
+        backoff_max: float = BLP_RECONNECT_BACKOFF_MAX,
+    ):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self._cond = threading.Condition()
+        self._idle: List[BloombergClient] = []
+        self._open = 0  # idle + borrowed + connecting
+        self._delay = 0.0
+        self._retry_at = 0.0
+        self.closed = False
+        self.connects = 0
+        self.connect_failures = 0
+        self.discarded = 0
+        self.borrows = 0
+        self.waits = 0
+        self.last_error: Optional[str] = None
+
+    def _connect(self) -> BloombergClient:
+        """Open one session, honouring the reconnect backoff. Caller has reserved a slot."""
+        now = time.monotonic()
+        if now < self._retry_at:
+            raise ConnectionError(
+                f"Bloomberg unavailable ({self.last_error}); retrying in {self._retry_at - now:.1f}s"
+            )
+        try:
+            client = self.factory()
+        except Exception as exc:
+            with self._cond:
+                self.connect_failures += 1
+                self.last_error = str(exc)
+                self._delay = min(self.backoff_max, self._delay * 2 if self._delay else self.backoff)
+                self._retry_at = time.monotonic() + self._delay
+            raise
+        with self._cond:
+            self.connects += 1
+            self._delay = 0.0
+            self._retry_at = 0.0
+        return client
+
+    def _acquire(self) -> BloombergClient:
+        deadline = time.monotonic() + self.timeout
+        dead = []
+        try:
+            with self._cond:
+                while True:
+                    if self.closed:
+                        raise RuntimeError("Bloomberg session pool is closed")
+                    while self._idle:
+                        client = self._idle.pop()
+                        if client.healthy():
+                            self.borrows += 1
+                            return client
+                        self._discard(client)
+                        dead.append(client)
+                    if self._open < self.size:
+                        self._open += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No Bloomberg session free within {self.timeout}s")
+                    self.waits += 1
+                    self._cond.wait(remaining)
+        finally:
+            # Stopping a session blocks; never do it while holding the lock
+            for client in dead:
+                client.close()
+        try:
+            client = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.borrows += 1
+        return client
+
+    def _discard(self, client: BloombergClient) -> None:
+        """Free a dead session's slot. Caller holds the lock and closes ``client`` after releasing it."""
+        self._open -= 1
+        self.discarded += 1
+        self._cond.notify()
+
+    def _release(self, client: BloombergClient, reusable: bool) -> None:
+        with self._cond:
+            if reusable and client.alive and not self.closed:
+                self._idle.append(client)
+                self._cond.notify()
+                return
+            self._discard(client)
+        client.close()
+
+    @contextmanager
+    def session(self) -> Iterator[BloombergClient]:
+        """Borrow a session; it is replaced if the borrower raises mid-request."""
+        client = self._acquire()
+        try:
+            yield client
+        except BaseException:
+            # Unread events of an abandoned request would reach the next borrower
+            self._release(client, reusable=False)
+            raise
+        self._release(client, reusable=True)
+
+    def warm(self, count: Optional[int] = None) -> int:
+        """Open sessions up front (default: the full pool). Returns the number opened."""
+        opened = []
+        try:
+            for _ in range(self.size if count is None else count):
+                with self._cond:
+                    if self._open >= self.size:
+                        break
+                    self._open += 1
+                try:
+                    opened.append(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                    break
+        finally:
+            for client in opened:
+                self._release(client, reusable=True)
+        return len(opened)
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            for client in idle:
+                self._discard(client)
+            self._cond.notify_all()
+        for client in idle:
+            client.close()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "borrows": self.borrows,
+                "waits": self.waits,
+                "connects": self.connects,
+                "connect_failures": self.connect_failures,
+                "discarded": self.discarded,
+                "retry_in": max(0.0, self._retry_at - time.monotonic()),
+                "last_error": self.last_error,
+            }
+
+
+_pools: Dict[Tuple[str, int], SessionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def pool_for(host: str = BLP_HOST, port: int = BLP_PORT) -> SessionPool:
+    """The shared session pool for a Bloomberg endpoint (created lazily, not connected)."""
+    key = (host, int(port))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SessionPool(lambda: BloombergClient(host, port))
+        return _pools[key]
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
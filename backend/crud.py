@@ -1,21 +1,21 @@
 # backend/crud.py
 
-from typing import List
-from decimal import Decimal
+from typing import Iterator, List, Optional
+from datetime import date
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from . import models, schemas
-from backend.auth import get_password_hash, verify_password, create_access_token
-from fastapi import HTTPException, status
-from pathlib import Path
-import pandas as pd
-import math
+from .services import holdings as holdings_engine
+from .services import lots, positions, refdata, rollups, scenarios, snapshots, watchlist
+from .services.cache import bump_book_version, holdings_cache
+from .services.valuation import BOND_LIKE_TYPES  # noqa: F401 (re-exported)
+from backend.auth import get_password_hash, verify_password, create_access_token, is_admin
 
 # ----- ASSET & TRADE CRUD (unchanged) -----
 
 def get_assets(db: Session, current_user: models.User, skip: int = 0, limit: int = 100) -> List[models.Asset]:
     # Admin sees all
-    if any(role.name == "admin" for role in current_user.roles):
+    if is_admin(current_user):
         return db.query(models.Asset).offset(skip).limit(limit).all()
     
     # Trader sees only their own assets
@@ -25,6 +25,13 @@ def get_assets(db: Session, current_user: models.User, skip: int = 0, limit: int
              .limit(limit)\
              .all()
 
+def iter_assets(db: Session, created_by: Optional[int] = None, chunk_size: int = 1000) -> Iterator[models.Asset]:
+    """Stream assets in chunks of ``chunk_size``; ``created_by=None`` means all users."""
+    query = db.query(models.Asset).order_by(models.Asset.id)
+    if created_by is not None:
+        query = query.filter(models.Asset.created_by == created_by)
+    return query.yield_per(chunk_size)
+
 def get_asset(db: Session, asset_id: int) -> models.Asset | None:
     return db.query(models.Asset).filter(models.Asset.id == asset_id).first()
 
@@ -39,6 +46,7 @@ def create_asset(db: Session, asset: schemas.AssetCreate, created_by: int) -> mo
     db_asset = models.Asset(**asset.dict(exclude={"created_by"}), created_by=created_by)
     db.add(db_asset)
     db.commit()
+    bump_book_version()
     db.refresh(db_asset)
     return db_asset
 
@@ -49,20 +57,25 @@ def update_asset(db: Session, asset_id: int, asset: schemas.AssetCreate) -> mode
     for field, value in asset.dict().items():
         setattr(db_asset, field, value)
     db.commit()
+    bump_book_version()
     db.refresh(db_asset)
     return db_asset
 
 def delete_asset(db: Session, asset_id: int) -> None:
     db_asset = db.query(models.Asset).filter(models.Asset.id == asset_id).first()
     if db_asset:
+        # trades cascade with the asset, so its positions go too
+        positions.remove_asset(db, asset_id)
+        snapshots.remove_asset(db, asset_id)
         db.delete(db_asset)
         db.commit()
+        bump_book_version()
 
 def get_trades(db: Session, current_user: models.User, skip: int = 0, limit: int = 100) -> List[models.Trade]:
     # return db.query(models.Trade).offset(skip).limit(limit).all()
 
  # Admin sees all
-    if any(role.name == "admin" for role in current_user.roles):
+    if is_admin(current_user):
         return db.query(models.Trade).offset(skip).limit(limit).all()
     
     # Trader sees only their own assets
@@ -72,13 +85,24 @@ def get_trades(db: Session, current_user: models.User, skip: int = 0, limit: int
              .limit(limit)\
              .all()
 
+def iter_trades(db: Session, created_by: Optional[int] = None, chunk_size: int = 1000) -> Iterator[models.Trade]:
+    """Stream trades in chunks of ``chunk_size``; ``created_by=None`` means all users."""
+    query = db.query(models.Trade).order_by(models.Trade.id)
+    if created_by is not None:
+        query = query.filter(models.Trade.created_by == created_by)
+    return query.yield_per(chunk_size)
+
 def get_trade(db: Session, trade_id: int) -> models.Trade | None:
     return db.query(models.Trade).filter(models.Trade.id == trade_id).first()
 
 def create_trade(db: Session, trade: schemas.TradeCreate, current_user: models.User) -> models.Trade:
     db_trade = models.Trade(**trade.dict(exclude={"created_by"}), created_by=current_user.id )
     db.add(db_trade)
+    db.flush()  # assign the id before it is recorded on the position
+    positions.add(db, positions.contribution(db_trade))
+    snapshots.invalidate(db, db_trade.trade_date, db_trade.settle_date)
     db.commit()
+    bump_book_version()
     db.refresh(db_trade)
     return db_trade
 
@@ -86,71 +110,63 @@ def update_trade(db: Session, trade_id: int, trade: schemas.TradeCreate) -> mode
     db_trade = db.query(models.Trade).filter(models.Trade.id == trade_id).first()
     if not db_trade:
         raise HTTPException(status_code=404, detail="Trade not found")
+    previous = positions.contribution(db_trade)
+    previous_dates = (db_trade.trade_date, db_trade.settle_date)
     for field, value in trade.dict().items():
         setattr(db_trade, field, value)
+    positions.remove(db, previous)
+    positions.add(db, positions.contribution(db_trade))
+    snapshots.invalidate(
+        db,
+        min(previous_dates[0], db_trade.trade_date),
+        min(previous_dates[1], db_trade.settle_date),
+    )
     db.commit()
+    bump_book_version()
     db.refresh(db_trade)
     return db_trade
 
 def delete_trade(db: Session, trade_id: int) -> None:
     db_trade = db.query(models.Trade).filter(models.Trade.id == trade_id).first()
     if db_trade:
+        positions.remove(db, positions.contribution(db_trade))
+        snapshots.invalidate(db, db_trade.trade_date, db_trade.settle_date)
         db.delete(db_trade)
         db.commit()
+        bump_book_version()
 #get the bloomberg data from tha xlsx file
 def load_file(asset_type: str):
-    file_map = {
-        "Corporate Bond": "backend/data/bonds.xlsx",
-        "Government Bond": "backend/data/bonds.xlsx",
-        "Term Loan": "backend/data/loans.xlsx",
-        "Revolver": "backend/data/loans.xlsx",
-    }
-
-    file_path = file_map.get(asset_type)
-
-    # Return None if asset type not mapped or file missing
-    if not file_path or not Path(file_path).exists():
+    """The reference workbook for ``asset_type`` as a DataFrame (None if unmapped)."""
+    table = refdata.store.table(asset_type)
+    if table is None:
         return None
-
-    # Load Excel file
-    return pd.read_excel(file_path, header=2)
+    return table.to_pandas()
 # def get_bllombergData()
 
 def get_item_bloombergdata(cusip: str, asset_type: str):
-    df= load_file(asset_type)
-    if df is None:
-        return None
-    if "ID" not in df.columns:
-        return None
-    # Filter by CUSIP
-    filtered = df.loc[df['ID'] == cusip]
+    """Reference record for ``cusip`` from the in-memory CUSIP index, or None."""
+    return refdata.store.lookup(cusip, asset_type)
 
-    # Return None if no CUSIP found
-    if filtered.empty:
-        return None
-
-    # Extract row as dictionary
-    record = filtered.iloc[0].to_dict()
-
-    # Clean NaN values
-    for k, v in record.items():
-        if v is None or (isinstance(v, float) and (math.isnan(v) or math.isinf(v))):
-            record[k] = None
+def enrich_watchlist(items: List[dict]) -> List[dict]:
+    """Bloomberg data for a batch of watchlist items, one merge per workbook."""
+    return watchlist.enrich(items)
 
-    return record
+def get_watch_cusips(db: Session, current_user: models.User) -> List[str]:
+    """Distinct CUSIPs on the watch lists ``current_user`` can see."""
+    query = db.query(models.WatchListItem.cusip).distinct()
+    # Admin sees all
+    if not is_admin(current_user):
+        query = query.filter(models.WatchListItem.created_by == current_user.id)
+    return [cusip for (cusip,) in query.all()]
 
 
 # ----- HOLDINGS AGGREGATION -----
 
-BOND_LIKE_TYPES = [
-    "Corporate Bond",
-    "Government Bond",
-    "Term Loan",
-    "Revolver",
-    "Delayed Draw Term Loan",
-]
-
-def get_holdings(db: Session) -> List[schemas.Holding]:
+def get_holdings(
+    db: Session,
+    as_of: Optional[date] = None,
+    basis: str = "trade_date",
+) -> List[schemas.Holding]:
     """
     Build list of current holdings with:
       - position
@@ -158,58 +174,47 @@ def get_holdings(db: Session) -> List[schemas.Holding]:
       - mark (market price)
       - market value
       - PnL (MtM)
+
+    Positions are aggregated in one grouped query (see services/holdings.py)
+    rather than one trades query per asset. With ``as_of`` the book is
+    rebuilt from the nearest end-of-day snapshot on the given ``basis``
+    (trade_date or settle_date); marks are always current.
     """
-    holdings: List[schemas.Holding] = []
-    all_assets = db.query(models.Asset).all()
-    # print(all_assets)
-    for asset in all_assets:
-        trds = db.query(models.Trade).filter(models.Trade.asset_id == asset.id).all()
-
-        # net raw notional position
-        position = sum(
-            t.quantity if t.direction in ("Buy Long", "Cover Short") else -t.quantity
-            for t in trds
-        )
-        pos_dec = Decimal(position)
-
-        # total cost and avg cost (per unit or per 100 for bonds)
-        total_cost = sum(
-            Decimal(t.quantity) * Decimal(t.price)
-            for t in trds
-            if t.direction in ("Buy Long", "Sell Short")
-        )
-        avg_cost = (total_cost / pos_dec) if pos_dec != 0 else Decimal(0)
-
-        # mark price
-        mark_dec = Decimal(asset.mark) if asset.mark is not None else Decimal(0)
-
-        # market value & PnL
-        if asset.type in BOND_LIKE_TYPES:
-            # quoted per 100
-            market_value = (mark_dec / Decimal(100)) * pos_dec
-            pnl = ((mark_dec - avg_cost) / Decimal(100)) * pos_dec
-        else:
-            # quoted per unit
-            market_value = mark_dec * pos_dec
-            pnl = market_value - (avg_cost * pos_dec)
-
-        holdings.append(
-            schemas.Holding(
-                id=asset.id,
-                fund=trds[0].fund_alloc if trds else "",
-                sub_alloc=trds[0].sub_alloc if trds else "",
-                display_name=asset.display_name,
-                position=float(pos_dec),
-                mark=float(mark_dec),
-                market_value=float(market_value),
-                cost_basis=float(avg_cost),
-                mtm_pnl=float(pnl),
-                type=asset.type,
-                issuer=asset.issuer or "",
-                
-            )
-        )
-    return holdings
+    def compute():
+        source = snapshots.positions_as_of(db, as_of, basis) if as_of else None
+        return holdings_engine.get_holdings(db, source)
+
+    # served from cache until a write bumps the book version
+    return holdings_cache.get_or_compute(("holdings", as_of, basis), compute)
+
+def get_holdings_rollup(
+    db: Session,
+    group_by: List[str],
+    as_of: Optional[date] = None,
+    basis: str = "trade_date",
+) -> schemas.HoldingRollup:
+    """Holdings aggregated by ``group_by`` dimensions (see services/rollups.py)."""
+    def compute():
+        source = snapshots.positions_as_of(db, as_of, basis) if as_of else None
+        return rollups.get_rollup(db, group_by, source)
+
+    # maturity buckets move with the calendar, so the day is part of the key
+    key = ("rollup", tuple(group_by), as_of, basis, date.today())
+    return holdings_cache.get_or_compute(key, compute)
+
+def get_lot_holdings(db: Session, method: str = "fifo") -> List[schemas.LotHolding]:
+    """Realized / unrealized PnL per holding under FIFO, LIFO or average cost."""
+    return holdings_cache.get_or_compute(
+        ("lots", method), lambda: lots.get_lot_holdings(db, method)
+    )
+
+def run_scenarios(db: Session, request: schemas.ScenarioRequest) -> schemas.ScenarioResponse:
+    """Revalue the current book under each shock scenario (marks are not touched)."""
+    return scenarios.run_scenarios(db, request)
+
+def iter_holdings(db: Session, chunk_size: int = 1000) -> Iterator[schemas.Holding]:
+    """Stream current holdings, valued one chunk of ``chunk_size`` rows at a time."""
+    return holdings_engine.iter_holdings(db, chunk_size=chunk_size)
 
 
 
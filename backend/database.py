@@ -16,6 +16,17 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def upsert_insert(db):
+    """The dialect's ``insert`` supporting ``on_conflict_do_update``; None where there is none."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
 def get_db():
     db = SessionLocal()
     try:
@@ -26,5 +37,8 @@ def get_db():
 # 2) Import all models so they register themselves against Base
 from . import models  # noqa: E402
 
-# 3) Create tables
-Base.metadata.create_all(bind=engine)
+
+# 3) Create tables: called by the app and the CLIs, not at import, so that
+# worker processes (services/firm.py) get an engine without running DDL
+def create_tables() -> None:
+    Base.metadata.create_all(bind=engine)
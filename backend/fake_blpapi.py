@@ -0,0 +1,596 @@
+"""
+In-process stand-in for the subset of ``blpapi`` this backend uses, for
+running the Bloomberg code paths without a terminal.
+
+Selected with ``BLP_FAKE=1`` (see backend/bloomberg.py). Supports sessions,
+``openService``/``getService``, ``ReferenceDataRequest``,
+``HistoricalDataRequest`` (daily, weekdays), ``//blp/mktdata`` subscriptions
+and event iteration with the same element accessors as blpapi.
+Responses are replayed from the reference extracts (services/refdata.py):
+each workbook column is served under its Bloomberg mnemonic from the header
+row, e.g. ``PX_BID``. Tickers that are
+not security identifiers (``VIX Index``, ``EUR Curncy``) get deterministic
+synthetic values; unknown identifiers get a ``securityError``. Daily history
+is a deterministic function of (security, date) around the replayed price, so
+overlapping requests agree. Subscriptions tick as a random walk from the
+replayed values.
+
+Latency and failures are injected per ``config`` (seeded from the
+environment):
+
+    BLP_FAKE_START_MS           session start handshake
+    BLP_FAKE_LATENCY_MS         per request
+    BLP_FAKE_PER_SECURITY_MS    per security in a request
+    BLP_FAKE_ERROR_RATE         chance a security returns a securityError
+    BLP_FAKE_DROP_RATE          chance a request drops the connection
+    BLP_FAKE_TICK_MS            interval between subscription ticks
+"""
+import datetime as _dt
+import math
+import os
+import queue
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+_IDENTIFIER = re.compile(r"^[A-Z0-9]{9}([A-Z0-9]{3})?$")
+_DATE_FIELDS = {"MATURITY"}
+_PRICE_FIELDS = ("PX_LAST", "LAST_PRICE", "PX_BID", "PX_ASK")
+
+
+@dataclass
+class FakeConfig:
+    start_ms: float = 0.0
+    latency_ms: float = 0.0
+    per_security_ms: float = 0.0
+    error_rate: float = 0.0
+    drop_rate: float = 0.0
+    tick_ms: float = 250.0
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "FakeConfig":
+        return cls(
+            start_ms=float(os.getenv("BLP_FAKE_START_MS", 0)),
+            latency_ms=float(os.getenv("BLP_FAKE_LATENCY_MS", 0)),
+            per_security_ms=float(os.getenv("BLP_FAKE_PER_SECURITY_MS", 0)),
+            error_rate=float(os.getenv("BLP_FAKE_ERROR_RATE", 0)),
+            drop_rate=float(os.getenv("BLP_FAKE_DROP_RATE", 0)),
+            tick_ms=float(os.getenv("BLP_FAKE_TICK_MS", 250)),
+        )
+
+
+config = FakeConfig.from_env()
+
+# Counters across all fake sessions, for benchmarks
+stats = {"sessions_started": 0, "requests": 0, "securities": 0, "fields": 0, "drops": 0, "subscriptions": 0, "ticks": 0}
+_stats_lock = threading.Lock()
+_rng = random.Random(config.seed)
+
+
+def _count(**increments) -> None:
+    with _stats_lock:
+        for key, n in increments.items():
+            stats[key] += n
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        for key in stats:
+            stats[key] = 0
+
+
+# ----- blpapi surface -----
+
+class Name(str):
+    """blpapi.Name compares equal to the string it was built from."""
+
+
+class CorrelationId:
+    def __init__(self, value: Any = None):
+        self._value = value
+
+    def value(self) -> Any:
+        return self._value
+
+
+class DataType:
+    BOOL = 1
+    INT32 = 4
+    INT64 = 5
+    FLOAT64 = 7
+    STRING = 8
+    DATE = 10
+    DATETIME = 13
+    SEQUENCE = 15
+
+
+class Event:
+    ADMIN = 1
+    SESSION_STATUS = 2
+    SUBSCRIPTION_STATUS = 3
+    REQUEST_STATUS = 4
+    RESPONSE = 5
+    PARTIAL_RESPONSE = 6
+    SUBSCRIPTION_DATA = 8
+    SERVICE_STATUS = 9
+    TIMEOUT = 10
+
+    def __init__(self, event_type: int, messages: List["Message"] = ()):
+        self._type = event_type
+        self._messages = list(messages)
+
+    def eventType(self) -> int:
+        return self._type
+
+    def __iter__(self) -> Iterator["Message"]:
+        return iter(self._messages)
+
+
+def _datatype(value: Any) -> int:
+    if isinstance(value, dict):
+        return DataType.SEQUENCE
+    if isinstance(value, bool):
+        return DataType.BOOL
+    if isinstance(value, int):
+        return DataType.INT64
+    if isinstance(value, float):
+        return DataType.FLOAT64
+    if isinstance(value, _dt.datetime):
+        return DataType.DATETIME
+    if isinstance(value, _dt.date):
+        return DataType.DATE
+    return DataType.STRING
+
+
+class Element:
+    """A named value: a scalar, an array (list) or a sequence (dict)."""
+
+    def __init__(self, name: str, value: Any):
+        self._name = Name(name)
+        self._value = value
+
+    def name(self) -> Name:
+        return self._name
+
+    def isArray(self) -> bool:
+        return isinstance(self._value, list)
+
+    def datatype(self) -> int:
+        if self.isArray():
+            return _datatype(self._value[0]) if self._value else DataType.SEQUENCE
+        return _datatype(self._value)
+
+    # sequences
+    def hasElement(self, name: str) -> bool:
+        return isinstance(self._value, dict) and name in self._value
+
+    def getElement(self, name: str) -> "Element":
+        if not self.hasElement(name):
+            raise KeyError(f"{self._name} has no element {name!r}")
+        return Element(name, self._value[name])
+
+    def elements(self) -> Iterator["Element"]:
+        return (Element(k, v) for k, v in self._value.items())
+
+    def numElements(self) -> int:
+        return len(self._value) if isinstance(self._value, dict) else 0
+
+    def getElementValue(self, name: str) -> Any:
+        return self.getElement(name).getValue()
+
+    def getElementAsString(self, name: str) -> str:
+        return self.getElement(name).getValueAsString()
+
+    def getElementAsFloat(self, name: str) -> float:
+        return self.getElement(name).getValueAsFloat()
+
+    def getElementAsInteger(self, name: str) -> int:
+        return int(self.getElementAsFloat(name))
+
+    def getElementAsDatetime(self, name: str):
+        return self.getElement(name).getValueAsDatetime()
+
+    # arrays
+    def numValues(self) -> int:
+        if isinstance(self._value, list):
+            return len(self._value)
+        return 0 if self._value is None else 1
+
+    def _item(self, index: int) -> Any:
+        return self._value[index] if isinstance(self._value, list) else self._value
+
+    def getValue(self, index: int = 0) -> Any:
+        return self._item(index)
+
+    def getValueAsElement(self, index: int = 0) -> "Element":
+        return Element(self._name, self._item(index))
+
+    def values(self) -> Iterator[Any]:
+        items = self._value if isinstance(self._value, list) else [self._value]
+        return (Element(self._name, v) if isinstance(v, dict) else v for v in items)
+
+    def getValueAsString(self, index: int = 0) -> str:
+        value = self._item(index)
+        if isinstance(value, (_dt.date, _dt.datetime)):
+            return value.isoformat()
+        return str(value)
+
+    def getValueAsFloat(self, index: int = 0) -> float:
+        value = self._item(index)
+        if isinstance(value, (dict, list, _dt.date)):
+            raise TypeError(f"{self._name} is not numeric")
+        return float(value)
+
+    def getValueAsDatetime(self, index: int = 0):
+        value = self._item(index)
+        if not isinstance(value, (_dt.date, _dt.datetime)):
+            raise TypeError(f"{self._name} is not a date")
+        return value
+
+    # requests
+    def appendValue(self, value: Any) -> None:
+        self._value.append(value)
+
+    def setValue(self, value: Any) -> None:
+        self._value = value
+
+    def __str__(self) -> str:
+        return f"{self._name} = {self._value!r}"
+
+
+class Message:
+    def __init__(self, message_type: str, body: Optional[Dict] = None, correlation_id: Optional[CorrelationId] = None):
+        self._type = Name(message_type)
+        self._body = Element(message_type, body or {})
+        self._correlation_id = correlation_id
+
+    def messageType(self) -> Name:
+        return self._type
+
+    def correlationIds(self) -> List[CorrelationId]:
+        return [self._correlation_id] if self._correlation_id is not None else []
+
+    def asElement(self) -> Element:
+        return self._body
+
+    def hasElement(self, name: str) -> bool:
+        return self._body.hasElement(name)
+
+    def getElement(self, name: str) -> Element:
+        return self._body.getElement(name)
+
+    def __str__(self) -> str:
+        return f"{self._type} {self._body._value!r}"
+
+
+class Request:
+    def __init__(self, operation: str):
+        self.operation = operation
+        self._body: Dict[str, Any] = {"securities": [], "fields": []}
+
+    def getElement(self, name: str) -> Element:
+        element = Element(name, self._body.setdefault(name, []))
+        return element
+
+    def set(self, name: str, value: Any) -> None:
+        self._body[name] = value
+
+    def asElement(self) -> Element:
+        return Element(self.operation, self._body)
+
+
+class Service:
+    OPERATIONS = {"//blp/refdata": {"ReferenceDataRequest", "HistoricalDataRequest"}, "//blp/mktdata": set()}
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def name(self) -> str:
+        return self._name
+
+    def createRequest(self, operation: str) -> Request:
+        if operation not in self.OPERATIONS.get(self._name, ()):
+            raise ValueError(f"{self._name} does not support {operation}")
+        return Request(operation)
+
+
+class SubscriptionList:
+    def __init__(self):
+        self._entries: List[tuple] = []
+
+    def add(self, topic: str, fields=None, options=None, correlationId: Optional[CorrelationId] = None) -> None:
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(",") if f.strip()]
+        self._entries.append((topic, list(fields or []), correlationId))
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SessionOptions:
+    def __init__(self):
+        self._host = "localhost"
+        self._port = 8194
+
+    def setServerHost(self, host: str) -> None:
+        self._host = host
+
+    def setServerPort(self, port: int) -> None:
+        self._port = port
+
+    def serverHost(self) -> str:
+        return self._host
+
+    def serverPort(self) -> int:
+        return self._port
+
+
+class Session:
+    def __init__(self, options: Optional[SessionOptions] = None, eventHandler=None):
+        self.options = options or SessionOptions()
+        self._events: "queue.Queue[Event]" = queue.Queue()
+        self._services: Dict[str, Service] = {}
+        self._started = False
+        self._dropped = False
+        self._subscriptions: Dict[Any, "_Subscription"] = {}
+        self._subscriptions_lock = threading.Lock()
+        self._ticker: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        time.sleep(config.start_ms / 1000)
+        self._started = True
+        _count(sessions_started=1)
+        self._events.put(Event(Event.SESSION_STATUS, [Message("SessionStarted")]))
+        return True
+
+    def stop(self) -> bool:
+        self._started = False
+        with self._subscriptions_lock:
+            self._subscriptions.clear()
+        return True
+
+    def openService(self, name: str) -> bool:
+        if not self._started or name not in Service.OPERATIONS:
+            return False
+        self._services[name] = Service(name)
+        return True
+
+    def getService(self, name: str) -> Service:
+        if name not in self._services:
+            raise KeyError(f"Service {name} is not open")
+        return self._services[name]
+
+    def sendRequest(self, request: Request, identity=None, correlationId: Optional[CorrelationId] = None):
+        if not self._started or self._dropped:
+            raise RuntimeError("Session is not connected")
+        securities = list(request._body["securities"])
+        fields = list(request._body["fields"])
+        _count(requests=1, securities=len(securities), fields=len(securities) * len(fields))
+        delay = (config.latency_ms + config.per_security_ms * len(securities)) / 1000
+        if _rng.random() < config.drop_rate:
+            self._dropped = True
+            _count(drops=1)
+            events = [Event(Event.SESSION_STATUS, [Message("SessionConnectionDown")])]
+        elif request.operation == "HistoricalDataRequest":
+            body = request._body
+            events = [Event(Event.RESPONSE, [
+                Message("HistoricalDataResponse", {"securityData": data}, correlationId)
+                for data in historical_data(securities, fields, body.get("startDate"), body.get("endDate"))
+            ])]
+        else:
+            events = [Event(Event.RESPONSE, [
+                Message("ReferenceDataResponse", {"securityData": reference_data(securities, fields)}, correlationId)
+            ])]
+        timer = threading.Timer(delay, lambda: [self._events.put(ev) for ev in events])
+        timer.daemon = True
+        timer.start()
+        return correlationId
+
+    def subscribe(self, subscriptionList: SubscriptionList, identity=None, requestLabel: str = "") -> None:
+        if not self._started or "//blp/mktdata" not in self._services:
+            raise RuntimeError("//blp/mktdata is not open")
+        started, failed, paints = [], [], []
+        with self._subscriptions_lock:
+            for topic, fields, cid in subscriptionList._entries:
+                key = cid.value() if cid is not None else topic
+                subscription = _Subscription.create(topic, fields, cid)
+                if subscription is None:
+                    failed.append(Message("SubscriptionFailure", {"reason": {"category": "BAD_SEC"}}, cid))
+                    continue
+                self._subscriptions[key] = subscription
+                started.append(Message("SubscriptionStarted", {}, cid))
+                paints.append(subscription.message(subscription.values))
+        _count(subscriptions=len(started))
+        self._events.put(Event(Event.SUBSCRIPTION_STATUS, started + failed))
+        if paints:
+            self._events.put(Event(Event.SUBSCRIPTION_DATA, paints))
+        if self._ticker is None or not self._ticker.is_alive():
+            self._ticker = threading.Thread(target=self._tick_loop, name="fake-blp-ticks", daemon=True)
+            self._ticker.start()
+
+    def unsubscribe(self, subscriptionList: SubscriptionList) -> None:
+        terminated = []
+        with self._subscriptions_lock:
+            for topic, _, cid in subscriptionList._entries:
+                if self._subscriptions.pop(cid.value() if cid is not None else topic, None) is not None:
+                    terminated.append(Message("SubscriptionTerminated", {}, cid))
+        if terminated:
+            self._events.put(Event(Event.SUBSCRIPTION_STATUS, terminated))
+
+    def _tick_loop(self) -> None:
+        while self._started:
+            time.sleep(config.tick_ms / 1000)
+            with self._subscriptions_lock:
+                subscriptions = list(self._subscriptions.values())
+            messages = [m for m in (s.tick() for s in subscriptions) if m is not None]
+            if messages and self._started:
+                _count(ticks=len(messages))
+                self._events.put(Event(Event.SUBSCRIPTION_DATA, messages))
+
+    def nextEvent(self, timeout: int = 0) -> Event:
+        try:
+            return self._events.get(timeout=timeout / 1000 if timeout else None)
+        except queue.Empty:
+            return Event(Event.TIMEOUT)
+
+    def tryNextEvent(self) -> Optional[Event]:
+        try:
+            return self._events.get_nowait()
+        except queue.Empty:
+            return None
+
+
+# ----- replay -----
+
+def _replay_value(field: str, value: Any) -> Any:
+    if field in _DATE_FIELDS and isinstance(value, str):
+        try:
+            return _dt.datetime.strptime(value, "%m/%d/%Y").date()
+        except ValueError:
+            return value
+    return value
+
+
+def extract_record(security: str) -> Optional[Dict[str, Any]]:
+    """The security's row from the reference extracts, keyed by mnemonic."""
+    from backend.services import refdata
+
+    candidates = [security]
+    parts = security.rsplit(" ", 1)
+    if len(parts) == 2:
+        candidates.append(parts[0])  # yellow key appended to an ID that already has one
+    refdata.store.warm()
+    for table in refdata.store.snapshot.tables.values():
+        for candidate in candidates:
+            row = table.get(candidate)
+            if row is not None:
+                return {
+                    table.mnemonics.get(col, col): _replay_value(table.mnemonics.get(col, col), v)
+                    for col, v in row.items() if v is not None
+                }
+    return None
+
+
+def synthetic_value(security: str, field: str) -> float:
+    """Deterministic value per (security, field) for non-identifier tickers."""
+    if field in _PRICE_FIELDS:
+        # one price per security, whichever price field is asked for
+        return round(10 + zlib.crc32(f"{security}|price".encode()) / 2**32 * 5000, 2)
+    h = zlib.crc32(f"{security}|{field}".encode()) / 2**32
+    return round((h - 0.5) * 10, 4)
+
+
+def _security_data(sequence: int, security: str, fields: List[str]) -> Dict[str, Any]:
+    if _rng.random() < config.error_rate:
+        return {"security": security, "sequenceNumber": sequence,
+                "securityError": {"category": "BAD_SEC", "message": "Injected error"}, "fieldData": {}}
+    record = extract_record(security)
+    if record is None and not _IDENTIFIER.match(security.split(" ")[0]):
+        record = {f: synthetic_value(security, f) for f in fields}
+    if record is None:
+        return {"security": security, "sequenceNumber": sequence,
+                "securityError": {"category": "BAD_SEC", "message": "Unknown/Invalid security"}, "fieldData": {}}
+    return {"security": security, "sequenceNumber": sequence,
+            "fieldData": {f: record[f] for f in fields if record.get(f) is not None}}
+
+
+def reference_data(securities: List[str], fields: List[str]) -> List[Dict[str, Any]]:
+    return [_security_data(i, s, fields) for i, s in enumerate(securities)]
+
+
+def _parse_date(value: Any, default: _dt.date) -> _dt.date:
+    if not value:
+        return default
+    if isinstance(value, _dt.date):
+        return value
+    return _dt.datetime.strptime(str(value), "%Y%m%d").date()
+
+
+def _history_anchor(security: str) -> Optional[float]:
+    record = extract_record(security)
+    if record is None:
+        if _IDENTIFIER.match(security.split(" ")[0]):
+            return None
+        return synthetic_value(security, "PX_LAST")
+    for f in _PRICE_FIELDS:
+        if isinstance(record.get(f), (int, float)):
+            return float(record[f])
+    return 100.0
+
+
+def historical_value(security: str, field: str, day: _dt.date, anchor: float) -> float:
+    """Close of ``security`` on ``day``: slow and fast cycles plus noise around ``anchor``."""
+    phase = zlib.crc32(security.encode()) / 2**32 * 2 * math.pi
+    t = day.toordinal()
+    noise = zlib.crc32(f"{security}|{field}|{t}".encode()) / 2**32 - 0.5
+    return round(anchor * (1 + 0.06 * math.sin(t / 29 + phase) + 0.02 * math.sin(t / 5.3 + 2 * phase) + 0.01 * noise), 4)
+
+
+def historical_data(securities: List[str], fields: List[str], start: Any, end: Any) -> List[Dict[str, Any]]:
+    """One ``securityData`` per security (blpapi sends a message each)."""
+    today = _dt.date.today()
+    end_date = min(_parse_date(end, today), today)
+    start_date = _parse_date(start, end_date - _dt.timedelta(days=365))
+    days = [
+        start_date + _dt.timedelta(days=i)
+        for i in range((end_date - start_date).days + 1)
+        if (start_date + _dt.timedelta(days=i)).weekday() < 5
+    ]
+    out = []
+    for sequence, security in enumerate(securities):
+        anchor = _history_anchor(security)
+        if anchor is None or _rng.random() < config.error_rate:
+            out.append({"security": security, "sequenceNumber": sequence,
+                        "securityError": {"category": "BAD_SEC", "message": "Unknown/Invalid security"}, "fieldData": []})
+            continue
+        out.append({"security": security, "sequenceNumber": sequence, "fieldData": [
+            {"date": day, **{f: historical_value(security, f, day, anchor) for f in fields}} for day in days
+        ]})
+    return out
+
+
+class _Subscription:
+    """Random walk of one topic's numeric fields, seeded from the extracts."""
+
+    def __init__(self, topic: str, fields: List[str], correlation_id: Optional[CorrelationId], values: Dict[str, float]):
+        self.topic = topic
+        self.fields = fields
+        self.correlation_id = correlation_id
+        self.values = values
+        self.rng = random.Random(zlib.crc32(topic.encode()))
+
+    @classmethod
+    def create(cls, topic: str, fields: List[str], correlation_id: Optional[CorrelationId]) -> Optional["_Subscription"]:
+        security = topic.split("/")[-1]  # "//blp/mktdata/ticker/US... Corp" or a bare ticker
+        record = extract_record(security)
+        if record is None:
+            if _IDENTIFIER.match(security.split(" ")[0]):
+                return None
+            record = {f: synthetic_value(security, f) for f in fields}
+        values = {f: float(record[f]) for f in fields if isinstance(record.get(f), (int, float))}
+        return cls(topic, fields, correlation_id, values)
+
+    def message(self, values: Dict[str, float]) -> Message:
+        return Message("MarketDataEvents", dict(values), self.correlation_id)
+
+    def tick(self) -> Optional[Message]:
+        if not self.values or self.rng.random() < 0.5:
+            return None
+        changed = {}
+        for field, value in self.values.items():
+            if self.rng.random() < 0.7:
+                changed[field] = round(value * (1 + self.rng.gauss(0, 0.0005)), 4)
+        if "PX_BID" in self.values and "PX_ASK" in self.values:
+            bid = changed.get("PX_BID", self.values["PX_BID"])
+            ask = changed.get("PX_ASK", self.values["PX_ASK"])
+            if ask < bid:
+                changed["PX_ASK"] = bid
+        if not changed:
+            return None
+        self.values.update(changed)
+        return self.message(changed)
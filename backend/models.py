@@ -3,7 +3,7 @@ SQLAlchemy models for Assets, Trades, and related entities.
 """
 import enum
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy import Table, Column, Integer, String, Date, Numeric, ForeignKey, UniqueConstraint
+from sqlalchemy import Table, Column, Integer, BigInteger, String, Date, DateTime, Float, Numeric, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 from sqlalchemy import Enum as SAEnum
@@ -70,6 +70,91 @@ class Trade(Base):
     creator = relationship("User")
     
     asset = relationship("Asset", back_populates="trades")
+    __table_args__ = (
+        Index('ix_trades_asset_id_trade_date', 'asset_id', 'trade_date'),
+        Index('ix_trades_trade_date', 'trade_date'),
+        Index('ix_trades_settle_date', 'settle_date'),
+    )
+
+class Position(Base):
+    """
+    Materialized net position per (asset, fund, sub-allocation).
+    Maintained incrementally by the trade write paths in crud.
+    """
+    __tablename__ = "positions"
+    __table_args__ = (
+        UniqueConstraint('asset_id', 'fund_alloc', 'sub_alloc', name='uq_position_key'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False, index=True)
+    fund_alloc = Column(String, nullable=False, default="")
+    sub_alloc = Column(String, nullable=False, default="")
+    net_quantity = Column(Numeric(38, 10), nullable=False, default=0)
+    cost_sum = Column(Numeric(38, 10), nullable=False, default=0)
+    trade_count = Column(Integer, nullable=False, default=0)
+    first_trade_id = Column(Integer, nullable=True)  # lowest trade id contributing to this key
+
+class PositionSnapshot(Base):
+    """
+    End-of-day checkpoint of ``positions`` as of ``snapshot_date``,
+    on either a trade-date or settle-date basis.
+    """
+    __tablename__ = "position_snapshots"
+    __table_args__ = (
+        UniqueConstraint('basis', 'snapshot_date', 'asset_id', 'fund_alloc', 'sub_alloc',
+                         name='uq_position_snapshot_key'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    basis = Column(String, nullable=False)  # "trade_date" | "settle_date"
+    snapshot_date = Column(Date, nullable=False)
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False, index=True)
+    fund_alloc = Column(String, nullable=False, default="")
+    sub_alloc = Column(String, nullable=False, default="")
+    net_quantity = Column(Numeric(38, 10), nullable=False, default=0)
+    cost_sum = Column(Numeric(38, 10), nullable=False, default=0)
+    trade_count = Column(Integer, nullable=False, default=0)
+    first_trade_id = Column(Integer, nullable=True)
+
+class SecurityMaster(Base):
+    """
+    Bloomberg reference data loaded from the workbook extracts
+    (see services/security_master.py), one row per (cusip, asset_type) so it
+    joins directly to ``assets`` and ``watchlist``.
+    """
+    __tablename__ = "security_master"
+    __table_args__ = (
+        UniqueConstraint('cusip', 'asset_type', name='uq_security_master_key'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    cusip = Column(String, nullable=False, index=True)
+    asset_type = Column(SAEnum(AssetType, name="asset_type"), nullable=False)
+    issuer = Column(String, nullable=True)
+    deal_name = Column(String, nullable=True)
+    spread_coupon = Column(Float, nullable=True)
+    maturity = Column(Date, nullable=True)
+    px_bid = Column(Float, nullable=True)
+    px_ask = Column(Float, nullable=True)
+    ytw = Column(Float, nullable=True)
+    dm_zspread = Column(Float, nullable=True)
+    chg_net_1d = Column(Float, nullable=True)
+    chg_net_5d = Column(Float, nullable=True)
+    chg_net_1m = Column(Float, nullable=True)
+    chg_net_6m = Column(Float, nullable=True)
+    chg_net_ytd = Column(Float, nullable=True)
+    interval_high = Column(Float, nullable=True)
+    interval_low = Column(Float, nullable=True)
+    payment_rank = Column(String, nullable=True)
+    moodys_cfr = Column(String, nullable=True)
+    moodys_asset = Column(String, nullable=True)
+    sp_cfr = Column(String, nullable=True)
+    sp_asset = Column(String, nullable=True)
+    amount_outstanding = Column(BigInteger, nullable=True)
+    source = Column(String, nullable=False)
+    row_hash = Column(String(16), nullable=False)
+    updated_at = Column(DateTime, nullable=False)
 
 class WatchListItem(Base):
     __tablename__ = "watchlist"
@@ -12,13 +12,14 @@ router = APIRouter(prefix="/access", tags=["Access"])
 
 from dotenv import load_dotenv
 from backend.auth import get_current_user
+from backend.services.permissions import resolver
 
 #BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # backend/
 load_dotenv()
 
 def admin_required(current_user: models.User = Depends(get_current_user)):
     # check if user has role "Admin"
-    if not any(role.name.lower() == "admin" for role in current_user.roles):
+    if not any(role.lower() == "admin" for role in resolver.get(current_user).roles):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to access this resource",
@@ -55,6 +56,8 @@ def assign_actions_to_role(role_id: int, action_ids: list[int], db: Session = De
         raise HTTPException(status_code=404, detail="Role not found")
     role.actions = db.query(models.Action).filter(models.Action.id.in_(action_ids)).all()
     db.commit()
+    # Any user may hold the role: recompile every cached permission set
+    resolver.invalidate()
     return {"message": f"Actions updated for role {role.name}"}
 
 @router.post("/users/{user_id}/roles")
@@ -66,5 +69,6 @@ def assign_roles_to_user(user_id: int, role_ids: list[int], db: Session = Depend
     roles = db.query(models.Role).filter(models.Role.id.in_(role_ids)).all()
     user.roles = roles
     db.commit()
+    resolver.invalidate(user_id)
     db.refresh(user)
     return user
\ No newline at end of file
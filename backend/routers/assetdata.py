@@ -1,13 +1,14 @@
 # backend/routers/assetdata.py
 
 import pandas as pd
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Dict, Any, List
 from fastapi.responses import JSONResponse
 from pathlib import Path
 import math
 
-from ..schemas import AssetFetchRequest
+from ..schemas import AssetFetchRequest, SecuritySearchResult
+from ..services import refdata, search
 # from ..services.bloomberg import fetch_watchlist_data
 
 router = APIRouter(prefix="/assetdata", tags=["AssetData"])
@@ -18,36 +19,15 @@ router = APIRouter(prefix="/assetdata", tags=["AssetData"])
     status_code=status.HTTP_200_OK,
 )
 def fetch_asset_data(payload: AssetFetchRequest):
-    # Map asset types to files
-    file_map = {
-        "Corporate Bond": "backend/data/bonds.xlsx",
-        "Government Bond": "backend/data/bonds.xlsx",
-        "Term Loan": "backend/data/loans.xlsx",
-        "Revolver": "backend/data/loans.xlsx",
-    }
-
-    file_path = file_map.get(payload.asset_type)
-
-    if not file_path or not Path(file_path).exists():
+    # Parsed once per workbook and indexed by CUSIP (see services/refdata.py)
+    if refdata.store.path_for(payload.asset_type) is None:
         raise HTTPException(status_code=404, detail="File not found for given asset type")
 
-    # Load Excel file
-    df = pd.read_excel(file_path, header=2)
+    record = refdata.store.lookup(payload.cusip, payload.asset_type)
 
-    # Filter by CUSIP
-    filtered = df.loc[df['ID'] == payload.cusip]
-
-    if filtered.empty:
+    if record is None:
         raise HTTPException(status_code=404, detail=f"CUSIP {payload.cusip} not found")
 
-    # Convert DataFrame to dict
-    record = filtered.iloc[0].to_dict()  # Get first matching row
-
-    # Replace NaN / inf with None
-    for k, v in record.items():
-        if v is None or (isinstance(v, float) and (math.isnan(v) or math.isinf(v))):
-            record[k] = None
-
     # print(record)
     # Map Excel column names to front-end expected fields
     response_data = {
@@ -64,3 +44,24 @@ def fetch_asset_data(payload: AssetFetchRequest):
     }
 
     return JSONResponse(content=response_data)
+
+
+@router.get("/status", response_model=Dict[str, Any])
+def refdata_status():
+    """Current reference-data snapshot: version, load time and per-workbook detail."""
+    status = refdata.store.stats()
+    status["refresher"] = {
+        "running": refdata.refresher.running,
+        "interval_seconds": refdata.refresher.interval,
+        "last_poll": refdata.refresher.last_poll,
+    }
+    return status
+
+
+@router.get("/search", response_model=List[SecuritySearchResult])
+def search_securities(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(search.SEARCH_LIMIT, ge=1, le=100),
+):
+    """Typeahead over CUSIP, issuer and deal name; best matches first."""
+    return search.index.search(q, limit)
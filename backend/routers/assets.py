@@ -1,12 +1,14 @@
 """
 Router for Asset endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from backend import crud, schemas, database, models
 # from backend.bloomberg import BloombergClient
 from ..database import get_db
-from backend.auth import get_current_user, check_permission
+from backend.auth import get_current_user, check_permission, is_admin
+from backend.services import export
 
 
 router = APIRouter()
@@ -21,6 +23,20 @@ def read_assets(
     check_permission(current_user, "VIEW_ASSET")
     return crud.get_assets(db, current_user=current_user)
 
+@router.get("/export")
+def export_assets(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Stream every visible asset as NDJSON or CSV, read in chunks."""
+    check_permission(current_user, "VIEW_ASSET")
+    created_by = None if is_admin(current_user) else current_user.id
+    records = export.rows_from_new_session(
+        lambda s: export.model_records(crud.iter_assets(s, created_by), schemas.Asset)
+    )
+    return export.streaming_response(records, export.export_columns(schemas.Asset), fmt, "assets")
+
 # @router.post("/fetch", response_model=schemas.Asset)
 # def fetch_asset(data: schemas.AssetFetch, client: BloombergClient = Depends()):
 #     # wrap bloomberg fetch by CUSIP/type
@@ -1,10 +1,13 @@
 # backend/routers/holdings.py
 
-from typing import List
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import List, Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from .. import crud, schemas, database, models
 from backend.auth import get_current_user, check_permission
+from backend.services import export, firm, lots, rollups
+from backend.services.cache import holdings_cache
 
 router = APIRouter(
     tags=["holdings"],
@@ -12,12 +15,108 @@ router = APIRouter(
 
 @router.get("/", response_model=List[schemas.Holding])
 def read_holdings(
+    as_of: Optional[date] = None,
+    basis: Literal["trade_date", "settle_date"] = "trade_date",
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user)
     ):
     """
-    Fetch the current portfolio holdings.
+    Fetch the current portfolio holdings, or the book as of ``as_of``
+    on a trade-date or settle-date basis.
     """
     # print(current_user)
     # check_permission(current_user,"VIEW_HOLDING")
-    return crud.get_holdings(db)
+    return crud.get_holdings(db, as_of=as_of, basis=basis)
+
+
+@router.get("/rollup", response_model=schemas.HoldingRollup)
+def read_holdings_rollup(
+    group_by: List[Literal[rollups.DIMENSIONS]] = Query(default=[]),
+    as_of: Optional[date] = None,
+    basis: Literal["trade_date", "settle_date"] = "trade_date",
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(get_current_user)
+    ):
+    """
+    Aggregated position, market value and PnL grouped by any of
+    fund_alloc, sub_alloc, type, issuer, rating and maturity_bucket,
+    with subtotals per level and a grand total.
+    """
+    return crud.get_holdings_rollup(db, group_by, as_of=as_of, basis=basis)
+
+
+@router.get("/lots", response_model=List[schemas.LotHolding])
+def read_lot_holdings(
+    method: Literal[lots.METHODS] = "fifo",
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(get_current_user)
+    ):
+    """
+    Holdings with realized and unrealized PnL from lot accounting
+    (fifo, lifo or average cost).
+    """
+    return crud.get_lot_holdings(db, method)
+
+
+@router.post("/scenarios", response_model=schemas.ScenarioResponse)
+def run_scenarios(
+    request: schemas.ScenarioRequest,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(get_current_user)
+    ):
+    """
+    Revalue the whole book under a batch of mark shocks selected by asset
+    type, issuer, rating or asset id, without editing any marks.
+    """
+    return crud.run_scenarios(db, request)
+
+
+@router.post("/firm-valuation", response_model=schemas.FirmValuationJob, status_code=202)
+def start_firm_valuation(
+    background_tasks: BackgroundTasks,
+    workers: Optional[int] = Query(default=None, ge=1),
+    current_user: models.User = Depends(get_current_user)
+    ):
+    """
+    Start a firm-wide valuation, split by fund across a process pool.
+    Poll ``/firm-valuation/{job_id}`` for the result.
+    """
+    job = firm.submit_job(workers)
+    background_tasks.add_task(firm.run_job, job.id)
+    return job
+
+
+@router.get("/firm-valuation", response_model=List[schemas.FirmValuationJob])
+def list_firm_valuations(current_user: models.User = Depends(get_current_user)):
+    """Recent firm valuation jobs (without their results)."""
+    return firm.list_jobs()
+
+
+@router.get("/firm-valuation/{job_id}", response_model=schemas.FirmValuationJob)
+def read_firm_valuation(job_id: str, current_user: models.User = Depends(get_current_user)):
+    job = firm.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Firm valuation job not found")
+    return job
+
+
+@router.get("/cache/stats")
+def read_holdings_cache_stats(current_user: models.User = Depends(get_current_user)):
+    """
+    Hit / miss / eviction counters of the holdings result cache.
+    """
+    return holdings_cache.stats()
+
+
+@router.get("/export")
+def export_holdings(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    current_user: models.User = Depends(get_current_user)
+    ):
+    """
+    Stream the current holdings as NDJSON or CSV, valued chunk by chunk.
+    """
+    records = export.rows_from_new_session(
+        lambda s: export.model_records(crud.iter_holdings(s), schemas.Holding)
+    )
+    return export.streaming_response(records, export.export_columns(schemas.Holding), fmt, "holdings")
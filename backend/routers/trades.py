@@ -3,8 +3,10 @@ from sqlalchemy.orm import Session
 from .. import crud, schemas
 from ..database import get_db
 from backend import crud, schemas, database, models
-from typing import List
-from backend.auth import get_current_user, check_permission
+from typing import List, Literal
+from fastapi import Query
+from backend.auth import get_current_user, check_permission, is_admin
+from backend.services import export
 
 
 router = APIRouter()
@@ -17,6 +19,22 @@ def read_trades(
     check_permission(current_user, "VIEW_TRADE")
     return crud.get_trades(db, current_user=current_user)
 
+@router.get("/export")
+def export_trades(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+    ):
+    """
+    Stream every visible trade as NDJSON or CSV, read in chunks.
+    """
+    check_permission(current_user, "VIEW_TRADE")
+    created_by = None if is_admin(current_user) else current_user.id
+    records = export.rows_from_new_session(
+        lambda s: export.model_records(crud.iter_trades(s, created_by), schemas.Trade)
+    )
+    return export.streaming_response(records, export.export_columns(schemas.Trade), fmt, "trades")
+
 @router.post("/", response_model=schemas.Trade)
 def create_trade(
     trade: schemas.TradeCreate, 
@@ -1,20 +1,25 @@
 # backend/routers/watchlist.py
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Any, Dict
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 import math
 
-from ..database import get_db
+from ..database import get_db, SessionLocal
 from ..models import WatchListItem
 from ..schemas import WatchItemCreate, WatchItem, WatchItemWithData
-from backend.auth import get_current_user, check_permission
+from backend.auth import get_current_user, check_permission, is_admin
 from backend import crud, schemas, database, models
+from backend.services import marketdata
 # from ..services.bloomberg import fetch_watchlist_data
 
 router = APIRouter(prefix="/api/watchlist", tags=["WatchList"])
+ws_router = APIRouter(tags=["WatchList"])
 
 
 @router.post("", response_model=WatchItem)
@@ -131,61 +136,95 @@ async def list_watch(
     ):
     check_permission(current_user, "VIEW_WATCHLIST")
     # Admin sees all
-    if any(role.name == "admin" for role in current_user.roles):
-        watchListItems = db.query(models.WatchListItem).offset(skip).limit(limit).all()
+    query = db.query(models.WatchListItem).options(joinedload(models.WatchListItem.user))
+    # Admin sees all
+    if is_admin(current_user):
+        watchListItems = query.offset(skip).limit(limit).all()
     
     # Trader sees only their own assets
     else:
-        watchListItems= db.query(models.WatchListItem)\
+        watchListItems= query\
                 .filter(models.WatchListItem.created_by == current_user.id)\
                 .offset(skip)\
                 .limit(limit)\
                 .all()
-   # Get WatchListItems from DB
-    # watchListItems = db.query(models.WatchListItem).offset(skip).limit(limit).all()
-
-    result = []
-
-    # # Loop through each WatchListItem
-    for item in watchListItems:
-        # Fetch dynamic data from Bloomberg
-        bloomberg_data = crud.get_item_bloombergdata(item.cusip, item.asset_type)
-        #print(bloomberg_data)
-        # Merge static DB fields with dynamic Bloomberg data
-        item_data = {
+
+    items = [
+        {
             "id": item.id,
             "cusip": item.cusip,
             "created_by": item.user.username,
-            # "user":item.user,
             "asset_type": item.asset_type.value,
-            "issuer": bloomberg_data.get('Issuer') if bloomberg_data else None,
-            "deal_name": bloomberg_data.get('Asset (Deal Name)') if bloomberg_data else None,
-            "spread_coupon": bloomberg_data.get('Spread/Coupon') if bloomberg_data else None,
-            "maturity": bloomberg_data.get('Maturity') if bloomberg_data else None,
-            "px_bid": bloomberg_data.get('Bid Price') if bloomberg_data else None,
-            "px_ask": bloomberg_data.get('Offer Price') if bloomberg_data else None,
-            "yld_cnv_bid": bloomberg_data.get('YTW') if bloomberg_data else None,
-            "dm_zspread": bloomberg_data.get('DM/Zspread') if bloomberg_data else None,
-            "chg_net_1d": bloomberg_data.get('1d Net Px Chg') if bloomberg_data else None,
-            "chg_net_5d": bloomberg_data.get('5d Net Px Chg') if bloomberg_data else None,
-            "chg_net_1m": bloomberg_data.get('30d Net Px Chg') if bloomberg_data else None,
-            "chg_net_6m": bloomberg_data.get('6m Net Px Chg') if bloomberg_data else None,
-            "chg_net_ytd": bloomberg_data.get('YTD Net Px Chg') if bloomberg_data else None,
-            "interval_high": bloomberg_data.get('12m High') if bloomberg_data else None,
-            "interval_low": bloomberg_data.get('12m Low') if bloomberg_data else None,
-            "payment_rank": bloomberg_data.get('Payment Rank') if bloomberg_data else None,
-            "rtg_moody_long_term": bloomberg_data.get('Moody CFR') if bloomberg_data else None,
-            "rtg_moody": bloomberg_data.get('Moody Asset') if bloomberg_data else None,
-            "rtg_sp_lt_lc_issuer_credit": bloomberg_data.get('S&P CFR') if bloomberg_data else None,
-            "rtg_sp": bloomberg_data.get('S&P Asset') if bloomberg_data else None,
-            "amt_outstanding": bloomberg_data.get('Amount Outstanding') if bloomberg_data else None,
-
-            # Bloomberg error fallback
-           "error": None if bloomberg_data else f"{item.id} Bloomberg data not found"  
         }
-        result.append(item_data)
-    #print(result)
-    return result
+        for item in watchListItems
+    ]
+    # Bloomberg data is merged in one batch per reference workbook
+    return crud.enrich_watchlist(items)
+
+
+def _watch_cusips(token: str) -> List[str]:
+    """Authenticate a socket's token; the CUSIPs on the watch lists it can see."""
+    db = SessionLocal()
+    try:
+        user = get_current_user(token, db)
+        check_permission(user, "VIEW_WATCHLIST")
+        return crud.get_watch_cusips(db, user)
+    finally:
+        db.close()
+
+
+@ws_router.websocket("/ws/watchlist")
+async def stream_watch(websocket: WebSocket, token: str = Query(...)):
+    """
+    Live PX_BID / PX_ASK / YLD_CNV_BID for the user's watch list.
+
+    Sends ``{"type": "snapshot", "data": {cusip: {field: value}}}`` with the
+    last known values, then ``{"type": "delta", ...}`` messages carrying only
+    changed fields. Send ``{"action": "resync"}`` after editing the watch list.
+    """
+    try:
+        cusips = await run_in_threadpool(_watch_cusips, token)
+    except HTTPException as exc:
+        await websocket.close(code=1008, reason=str(exc.detail))
+        return
+    await websocket.accept()
+
+    watcher = marketdata.Watcher(asyncio.get_running_loop())
+    try:
+        snapshot = await run_in_threadpool(marketdata.manager.watch, watcher, cusips)
+    except Exception as exc:
+        await websocket.close(code=1011, reason=f"Market data unavailable: {exc}")
+        return
+
+    async def send_deltas():
+        await websocket.send_json({"type": "snapshot", "data": snapshot})
+        while True:
+            await websocket.send_json({"type": "delta", "data": await watcher.next_delta()})
+
+    async def receive_actions():
+        while True:
+            message = await websocket.receive_json()
+            if message.get("action") == "resync":
+                try:
+                    current = set(await run_in_threadpool(_watch_cusips, token))
+                except HTTPException as exc:
+                    await websocket.close(code=1008, reason=str(exc.detail))
+                    return
+                await run_in_threadpool(marketdata.manager.unwatch, watcher, watcher.cusips - current)
+                added = await run_in_threadpool(marketdata.manager.watch, watcher, current)
+                await websocket.send_json({"type": "snapshot", "data": added})
+
+    # Either side ending (disconnect, failed resync) closes the stream
+    tasks = [asyncio.create_task(send_deltas()), asyncio.create_task(receive_actions())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Off the event loop (it can block on the source); shielded so it still
+        # completes when the handler itself is cancelled
+        unwatch = asyncio.get_running_loop().run_in_executor(None, marketdata.manager.unwatch, watcher)
+        await asyncio.shield(unwatch)
 
 # @router.get("/", response_model=List[schemas.Trade])
 # def read_trades(
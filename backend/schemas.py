@@ -2,8 +2,8 @@
 Pydantic schemas for request and response models.
 """
 from pydantic import BaseModel
-from datetime import date
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Optional, List, Dict
 from .models import AssetType
 
 class AssetBase(BaseModel):
@@ -72,6 +72,92 @@ class Holding(BaseModel):
     class Config:
         from_attributes = True
 
+class LotHolding(BaseModel):
+    id: int
+    display_name: str
+    method: str
+    position: float
+    open_lots: int
+    open_cost: float
+    mark: float
+    realized_pnl: float
+    unrealized_pnl: float
+
+class HoldingRollupRow(BaseModel):
+    # 0 = grand total, len(group_by) = leaf group, in between = subtotal
+    level: int
+    keys: Dict[str, str]
+    count: int
+    position: float
+    market_value: float
+    mtm_pnl: float
+
+class HoldingRollup(BaseModel):
+    group_by: List[str]
+    rows: List[HoldingRollupRow]
+
+class ShockDefinition(BaseModel):
+    # Selection: every criterion given must match (values within a list are OR-ed);
+    # a shock with no criteria hits the whole book.
+    asset_types: Optional[List[AssetType]] = None
+    issuers: Optional[List[str]] = None
+    ratings: Optional[List[str]] = None
+    asset_ids: Optional[List[int]] = None
+    # Move: new mark = mark * (1 + pct) + points
+    pct: float = 0.0
+    points: float = 0.0
+
+class Scenario(BaseModel):
+    name: str
+    shocks: List[ShockDefinition]
+
+class ScenarioRequest(BaseModel):
+    scenarios: List[Scenario]
+    include_holdings: bool = False
+
+class ScenarioHolding(BaseModel):
+    id: int
+    mark: float
+    market_value: float
+    mtm_pnl: float
+
+class ScenarioResult(BaseModel):
+    name: str
+    shocked_assets: int
+    market_value: float
+    mtm_pnl: float
+    market_value_change: float
+    holdings: Optional[List[ScenarioHolding]] = None
+
+class ScenarioResponse(BaseModel):
+    base_market_value: float
+    base_mtm_pnl: float
+    scenarios: List[ScenarioResult]
+
+class FundValuation(BaseModel):
+    fund: str
+    assets: int
+    market_value: float
+    mtm_pnl: float
+    elapsed_seconds: float
+    holdings: List[Holding]
+
+class FirmValuation(BaseModel):
+    workers: int
+    elapsed_seconds: float
+    market_value: float
+    mtm_pnl: float
+    funds: List[FundValuation]
+
+class FirmValuationJob(BaseModel):
+    id: str
+    status: str  # "pending" | "running" | "done" | "failed"
+    workers: int
+    submitted_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[FirmValuation] = None
+
 class MacroRequest(BaseModel):
     tickers: List[str]
 
@@ -158,6 +244,17 @@ class AssetFetchRequest(BaseModel):
         "from_attributes": True
     }
 
+class SecuritySearchResult(BaseModel):
+    cusip: str
+    issuer: Optional[str] = None
+    deal_name: Optional[str] = None
+    asset_types: List[str]
+    rank: int  # 0 = exact identifier match; lower is better
+
+    model_config = {
+        "from_attributes": True
+    }
+
 
 # -------- Action --------
 class ActionBase(BaseModel):
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 from backend import models
-from backend.database import SessionLocal
+from backend.database import SessionLocal, create_tables
 
 
 def seed_data():
@@ -62,5 +62,6 @@ def seed_data():
 
 
 if __name__ == "__main__":
+    create_tables()
     seed_data()
     print("✅ Database seeded successfully")
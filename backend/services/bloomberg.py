@@ -1,10 +1,19 @@
 # backend/services/bloomberg.py
 
 import os
-import blpapi
+import threading
+import time
+import numpy as np
 import pandas as pd
 import math
-from typing import List, Dict, Any
+from collections import OrderedDict
+from datetime import date
+from typing import List, Dict, Any, Optional, Tuple
+
+from backend.bloomberg import blpapi, pool_for
+from backend.services import history
+from backend.services.blp_batcher import ReferenceBatcher
+from backend.services.blp_decode import DATE, FLOAT, STRING, ReferenceColumns, Schema
 
 ###########################
 # Configuration Constants #
@@ -22,48 +31,179 @@ def get_raw_bloomberg_data(
     fields: List[str],
     host: str = BLOOMBERG_HOST,
     port: int = BLOOMBERG_PORT,
+    schema: Optional[Schema] = None,
 ) -> pd.DataFrame:
-    session_opts = blpapi.SessionOptions()
-    session_opts.setServerHost(host)
-    session_opts.setServerPort(port)
+    """
+    One row per ticker. Fields are decoded with their native type per
+    ``schema`` (default FIELD_TYPES): float columns hold NaN when missing,
+    string and date columns None. Fields not in the schema come back as text.
+    """
+    schema = FIELD_TYPES if schema is None else schema
+    columns = ReferenceColumns(tickers, fields, {f: schema.get(f, STRING) for f in fields})
 
-    session = blpapi.Session(session_opts)
-    if not session.start():
-        raise ConnectionError("Failed to start Bloomberg session.")
-    if not session.openService("//blp/refdata"):
-        raise ConnectionError("Failed to open //blp/refdata service.")
+    # Borrow a warm session (see backend/bloomberg.py) instead of starting one
+    with pool_for(host, port).session() as client:
+        req = client.svc.createRequest("ReferenceDataRequest")
 
-    svc = session.getService("//blp/refdata")
-    req = svc.createRequest("ReferenceDataRequest")
+        for t in tickers:
+            req.getElement("securities").appendValue(t)
+        for f in fields:
+            req.getElement("fields").appendValue(f)
 
-    for t in tickers:
-        req.getElement("securities").appendValue(t)
-    for f in fields:
-        req.getElement("fields").appendValue(f)
+        for msg in client.request(req):
+            if msg.messageType() == blpapi.Name("ReferenceDataResponse"):
+                columns.decode(msg)
 
-    session.sendRequest(req)
+    return columns.to_frame()
 
-    rows: List[List[Any]] = []
-    cols = ["ticker"] + fields
 
-    while True:
-        ev = session.nextEvent()
-        for msg in ev:
-            if msg.messageType() == blpapi.Name("ReferenceDataResponse"):
-                sd = msg.getElement("securityData")
-                for i in range(sd.numValues()):
-                    elm = sd.getValueAsElement(i)
-                    ticker = elm.getElementAsString("security")
-                    fd = elm.getElement("fieldData")
-                    row = [ticker]
-                    for f in fields:
-                        row.append(fd.getElementAsString(f) if fd.hasElement(f) else None)
-                    rows.append(row)
-        if ev.eventType() == blpapi.Event.RESPONSE:
-            break
-
-    session.stop()
-    return pd.DataFrame(rows, columns=cols)
+# Single-security lookups below are coalesced into shared batched requests
+batcher = ReferenceBatcher(get_raw_bloomberg_data)
+
+
+def get_historical_data(
+    tickers: List[str],
+    field: str,
+    start: date,
+    end: date,
+    host: str = BLOOMBERG_HOST,
+    port: int = BLOOMBERG_PORT,
+) -> Dict[str, pd.Series]:
+    """
+    Daily ``field`` values from ``start`` to ``end`` for every ticker in one
+    HistoricalDataRequest, as date-indexed Series. Tickers that come back
+    with a securityError are left out.
+    """
+    out: Dict[str, pd.Series] = {}
+    with pool_for(host, port).session() as client:
+        req = client.svc.createRequest("HistoricalDataRequest")
+        for t in tickers:
+            req.getElement("securities").appendValue(t)
+        req.getElement("fields").appendValue(field)
+        req.set("startDate", start.strftime("%Y%m%d"))
+        req.set("endDate", end.strftime("%Y%m%d"))
+        req.set("periodicitySelection", "DAILY")
+
+        for msg in client.request(req):
+            if msg.messageType() != blpapi.Name("HistoricalDataResponse"):
+                continue
+            # One message per security; securityData is a single element here
+            sd = msg.getElement("securityData")
+            if sd.hasElement("securityError"):
+                continue
+            fd = sd.getElement("fieldData")
+            n = fd.numValues()
+            dates = np.empty(n, dtype="datetime64[D]")
+            values = np.full(n, np.nan)
+            for i in range(n):
+                point = fd.getValueAsElement(i)
+                dates[i] = point.getElementAsDatetime("date")
+                if point.hasElement(field):
+                    values[i] = point.getElementAsFloat(field)
+            out[sd.getElementAsString("security")] = pd.Series(values, index=pd.DatetimeIndex(dates))
+    return out
+
+
+##############################################
+# Field cache: TTL per field class           #
+##############################################
+
+# Descriptive fields change rarely; prices and changes move all day.
+STATIC_FIELDS = {
+    "ISSUER", "DEAL_NAME", "NAME", "SECURITY_DES", "CPN", "LN_CURRENT_MARGIN", "MATURITY",
+    "PAYMENT_RANK", "RTG_MOODY_LONG_TERM", "RTG_MOODY",
+    "RTG_SP_LT_LC_ISSUER_CREDIT", "RTG_SP", "AMT_OUTSTANDING",
+}
+DAILY_FIELDS = {"INTERVAL_HIGH", "INTERVAL_LOW", "CHG_NET_5D", "CHG_NET_1M", "CHG_NET_6M", "CHG_NET_YTD"}
+
+BLP_CACHE_STATIC_TTL = float(os.getenv("BLP_CACHE_STATIC_TTL", 24 * 3600))
+BLP_CACHE_DAILY_TTL = float(os.getenv("BLP_CACHE_DAILY_TTL", 3600))
+BLP_CACHE_LIVE_TTL = float(os.getenv("BLP_CACHE_LIVE_TTL", 5))
+BLP_CACHE_MAX_SECURITIES = int(os.getenv("BLP_CACHE_MAX_SECURITIES", 10000))
+
+
+def field_ttl(field: str) -> float:
+    if field in STATIC_FIELDS:
+        return BLP_CACHE_STATIC_TTL
+    if field in DAILY_FIELDS:
+        return BLP_CACHE_DAILY_TTL
+    return BLP_CACHE_LIVE_TTL
+
+
+class FieldCache:
+    """
+    (security, field) -> value with a per-field TTL, LRU-bounded by security.
+    Missing values are remembered for the live TTL only, so a transient
+    securityError is retried soon.
+    """
+
+    def __init__(self, ttl=field_ttl, max_securities: int = BLP_CACHE_MAX_SECURITIES):
+        self.ttl = ttl
+        self.max_securities = max_securities
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Tuple[Any, float]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.upstream_lookups = 0
+
+    def get(self, security: str, fields: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """Fresh cached values, and the fields that must be fetched."""
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            entry = self._entries.get(security)
+            if entry is not None:
+                self._entries.move_to_end(security)
+            for f in fields:
+                cached = entry.get(f) if entry is not None else None
+                if cached is not None and cached[1] > now:
+                    found[f] = cached[0]
+                else:
+                    missing.append(f)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put(self, security: str, values: Dict[str, Any]) -> None:
+        """Store the values of one upstream lookup."""
+        now = time.monotonic()
+        with self._lock:
+            self.upstream_lookups += 1
+            entry = self._entries.setdefault(security, {})
+            self._entries.move_to_end(security)
+            for f, v in values.items():
+                ttl = self.ttl(f) if v is not None else min(self.ttl(f), BLP_CACHE_LIVE_TTL)
+                entry[f] = (v, now + ttl)
+            while len(self._entries) > self.max_securities:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requested = self.hits + self.misses
+            return {
+                "securities": len(self._entries),
+                "field_hits": self.hits,
+                "field_misses": self.misses,
+                "hit_ratio": self.hits / requested if requested else None,
+                "upstream_lookups": self.upstream_lookups,
+            }
+
+
+field_cache = FieldCache()
+
+
+def cached_lookup(security: str, fields: List[str]) -> Dict[str, Any]:
+    """Raw values for ``fields``; only missing or stale ones go to Bloomberg."""
+    found, missing = field_cache.get(security, fields)
+    if missing:
+        fetched = batcher.lookup(security, missing)
+        field_cache.put(security, fetched)
+        found.update(fetched)
+    return {f: found.get(f) for f in fields}
 
 
 ######################################
@@ -90,13 +230,10 @@ def normalize_macro_df(raw: pd.DataFrame) -> pd.DataFrame:
         "CHG_PCT_6M":    "chg_pct_6m",
         "CHG_PCT_YTD":   "chg_pct_ytd",
     }
+    # Columns arrive as float64 from the typed decoder; nothing to parse
     df = pd.DataFrame({"ticker": raw["ticker"]})
     for blp_col, out_col in rename_map.items():
-        if blp_col in raw.columns:
-            ser = raw[blp_col].astype(str).str.rstrip("%")
-            df[out_col] = pd.to_numeric(ser, errors="coerce")
-        else:
-            df[out_col] = None
+        df[out_col] = raw[blp_col] if blp_col in raw.columns else np.nan
     return df.where(pd.notnull(df), None)
 
 
@@ -142,26 +279,44 @@ STRING_ONLY = {
     "RTG_SP_LT_LC_ISSUER_CREDIT","RTG_SP",
 }
 
+def _present(value: Any) -> Any:
+    """None for missing values (None, NaN, empty string)."""
+    if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def window_lookup(security: str, fields: List[str], last: Optional[float] = None) -> Dict[str, Any]:
+    """
+    ``fields`` from the closes services/history.py already holds (a security
+    that is behind is only queued for backfill). Fields those closes cannot
+    produce (no, failed or too short a history) are asked of Bloomberg.
+    """
+    windows = history.store.windows([security], None if last is None else pd.Series({security: last}))
+    values = windows.loc[security]
+    out = {f: float(values[f]) for f in fields if pd.notna(values[f])}
+    missing = [f for f in fields if f not in out]
+    if missing:
+        out.update(cached_lookup(security, missing))
+    return out
+
+
 def fetch_watchlist_data(cusip: str, asset_type: str) -> Dict[str, Any]:
     security = f"{cusip} Corp"
     fields = FIELD_MAPS.get(asset_type)
     if not fields:
         raise ValueError(f"No FIELD_MAPS entry for asset_type={asset_type!r}")
-    df = get_raw_bloomberg_data([security], fields)
-    row = df.iloc[0]
+    # Change and high/low windows come from the local close history, against
+    # the live PX_LAST; everything else from Bloomberg through the cache
+    derived = [f for f in fields if f in history.WINDOW_FIELDS]
+    live = [f for f in fields if f not in derived]
+    row = cached_lookup(security, live + [history.PRICE_FIELD] if derived else live)
+    if derived:
+        row.update(window_lookup(security, derived, row.get(history.PRICE_FIELD)))
+    # Values are already typed (see FIELD_TYPES); only the keys change
     out: Dict[str, Any] = {"cusip": cusip, "asset_type": asset_type}
     for fld in fields:
-        raw_val = row.get(fld, None)
-        json_key = FIELD_KEY_MAP.get(fld, fld.lower())
-        if fld in STRING_ONLY:
-            out[json_key] = raw_val or None
-        elif isinstance(raw_val, str) and raw_val.endswith("%"):
-            try: out[json_key] = float(raw_val.rstrip("%"))
-            except: out[json_key] = None
-        else:
-            try: val = float(raw_val)
-            except: val = None
-            out[json_key] = None if (isinstance(val, float) and math.isnan(val)) else val
+        out[FIELD_KEY_MAP.get(fld, fld.lower())] = _present(row.get(fld))
     return out
 
 
@@ -201,19 +356,22 @@ def fetch_assetdata(cusip: str, asset_type: str) -> Dict[str, Any]:
     fields = ASSETDATA_FIELD_MAPS.get(asset_type)
     if fields is None:
         raise ValueError(f"Unknown asset_type={asset_type!r}")
-    df = get_raw_bloomberg_data([security], fields)
-    row = df.iloc[0]
+    row = cached_lookup(security, fields)
     out: Dict[str, Any] = {}
     for fld in fields:
-        raw_val = row.get(fld)
-        key = _ASSETDATA_KEY_MAP[fld]
-        if isinstance(raw_val, str):
-            out[key] = raw_val
-        else:
-            try:
-                num = float(raw_val)
-            except:
-                out[key] = None
-            else:
-                out[key] = None if math.isnan(num) else round(num, 2)
+        value = _present(row.get(fld))
+        out[_ASSETDATA_KEY_MAP[fld]] = round(value, 2) if FIELD_TYPES.get(fld) == FLOAT and value is not None else value
     return out
+
+
+###########################################
+# Native field types for typed decoding   #
+###########################################
+
+DATE_FIELDS = {"MATURITY"}
+FIELD_TYPES: Schema = {
+    f: DATE if f in DATE_FIELDS else STRING if f in STRING_ONLY else FLOAT
+    for f in {*FIELDS, *(f for m in (FIELD_MAPS, ASSETDATA_FIELD_MAPS) for fs in m.values() for f in fs)}
+}
+# The live price fetch_watchlist_data adds for the history windows
+FIELD_TYPES[history.PRICE_FIELD] = FLOAT
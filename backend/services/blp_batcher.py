@@ -0,0 +1,171 @@
+# backend/services/blp_batcher.py
+"""
+Request coalescing for single-security Bloomberg reference lookups.
+
+Lookups arriving within ``window`` seconds of the first one in a batch are
+merged into one ReferenceDataRequest carrying the union of their securities
+and fields; each caller gets back only the fields it asked for. A lookup for
+a (security, field set) that is already queued or in flight shares that
+lookup's result instead of adding another.
+
+    batcher = ReferenceBatcher(get_raw_bloomberg_data)
+    row = batcher.lookup("US123456AB12 Corp", ["PX_BID", "PX_ASK"])
+
+``stats()`` reports batch sizes and how long lookups waited for dispatch.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BLP_BATCH_WINDOW_MS = float(os.getenv("BLP_BATCH_WINDOW_MS", 10))
+BLP_BATCH_MAX_SECURITIES = int(os.getenv("BLP_BATCH_MAX_SECURITIES", 200))
+# Batches sent concurrently; more than the session pool size only queues
+BLP_BATCH_WORKERS = int(os.getenv("BLP_BATCH_WORKERS", os.getenv("BLP_POOL_SIZE", 4)))
+BLP_BATCH_TIMEOUT = float(os.getenv("BLP_BATCH_TIMEOUT", 60))
+
+# Recent batches kept for the percentile metrics
+METRICS_WINDOW = 1000
+
+LookupKey = Tuple[str, FrozenSet[str]]
+
+
+class ReferenceBatcher:
+    """Coalesces concurrent lookups into batched reference requests."""
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str], List[str]], pd.DataFrame],
+        window: float = BLP_BATCH_WINDOW_MS / 1000,
+        max_securities: int = BLP_BATCH_MAX_SECURITIES,
+        workers: int = BLP_BATCH_WORKERS,
+    ):
+        self.fetch = fetch
+        self.window = window
+        self.max_securities = max_securities
+        self.workers = workers
+        self._cond = threading.Condition()
+        self._queue: Dict[LookupKey, Tuple[Future, float]] = {}  # insertion ordered
+        self._inflight: Dict[LookupKey, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self.lookups = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self._sizes: deque = deque(maxlen=METRICS_WINDOW)
+        self._waits: deque = deque(maxlen=METRICS_WINDOW)
+
+    # ----- callers -----
+
+    def submit(self, security: str, fields: List[str]) -> Future:
+        """Queue a lookup; resolves to {field: raw value} for ``fields``."""
+        key = (security, frozenset(fields))
+        with self._cond:
+            self.lookups += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = Future()
+            self._inflight[key] = future
+            self._queue[key] = (future, time.monotonic())
+            self._ensure_dispatcher()
+            self._cond.notify()
+        return future
+
+    def lookup(self, security: str, fields: List[str], timeout: float = BLP_BATCH_TIMEOUT) -> Dict:
+        row = self.submit(security, fields).result(timeout)
+        return {f: row.get(f) for f in fields}
+
+    # ----- dispatch -----
+
+    def _ensure_dispatcher(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._executor = self._executor or ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="blp-batch"
+            )
+            self._thread = threading.Thread(target=self._dispatch_loop, name="blp-batcher", daemon=True)
+            self._thread.start()
+
+    def _take_batch(self) -> List[Tuple[LookupKey, Future, float]]:
+        """Wait for a lookup, then for the window (or a full batch) to close."""
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            opened = next(iter(self._queue.values()))[1]
+            while True:
+                securities = {key[0] for key in self._queue}
+                remaining = opened + self.window - time.monotonic()
+                if remaining <= 0 or len(securities) >= self.max_securities:
+                    break
+                self._cond.wait(remaining)
+            batch, securities = [], set()
+            for key in list(self._queue):
+                if key[0] not in securities and len(securities) >= self.max_securities:
+                    break
+                securities.add(key[0])
+                future, queued = self._queue.pop(key)
+                batch.append((key, future, queued))
+            return batch
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            batch = self._take_batch()
+            sent = time.monotonic()
+            with self._cond:
+                self.batches += 1
+                self._sizes.append(len(batch))
+                self._waits.extend(sent - queued for _, _, queued in batch)
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[Tuple[LookupKey, Future, float]]) -> None:
+        securities = list(dict.fromkeys(key[0] for key, _, _ in batch))
+        fields = sorted(set().union(*(key[1] for key, _, _ in batch)))
+        try:
+            df = self.fetch(securities, fields)
+            rows = {
+                row["ticker"]: row
+                for row in df.astype(object).where(df.notna(), None).to_dict("records")
+            }
+        except BaseException as exc:
+            with self._cond:
+                self.failed_batches += 1
+                for key, future, _ in batch:
+                    self._inflight.pop(key, None)
+            for _, future, _ in batch:
+                future.set_exception(exc)
+            return
+        with self._cond:
+            for key, _, _ in batch:
+                self._inflight.pop(key, None)
+        for key, future, _ in batch:
+            # A security Bloomberg did not return resolves to all-None fields
+            row = rows.get(key[0], {})
+            future.set_result({f: row.get(f) for f in key[1]})
+
+    # ----- metrics -----
+
+    def stats(self) -> Dict:
+        with self._cond:
+            sizes = np.asarray(self._sizes, dtype=float)
+            waits = np.asarray(self._waits, dtype=float) * 1000
+            return {
+                "window_ms": self.window * 1000,
+                "lookups": self.lookups,
+                "coalesced": self.coalesced,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "queued": len(self._queue),
+                "in_flight": len(self._inflight),
+                "batch_size_mean": float(sizes.mean()) if len(sizes) else None,
+                "batch_size_max": int(sizes.max()) if len(sizes) else None,
+                "wait_ms_p50": float(np.percentile(waits, 50)) if len(waits) else None,
+                "wait_ms_p99": float(np.percentile(waits, 99)) if len(waits) else None,
+            }
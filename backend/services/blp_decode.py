@@ -0,0 +1,109 @@
+# backend/services/blp_decode.py
+"""
+Typed decoding of ReferenceDataResponse messages.
+
+Each field present in a security's ``fieldData`` is read once, with the
+getter for its native type (float, date or string), straight into a column
+preallocated for the requested securities:
+a float64 column (NaN when missing) or an object column (None when missing).
+The per-field kind comes from a schema; fields not in it decode as floats.
+Nothing is formatted to a string and parsed back.
+"""
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+FLOAT, DATE, STRING = "float", "date", "string"
+
+Schema = Dict[str, str]
+
+
+def field_schema(fields: Iterable[str], strings: Iterable[str] = (), dates: Iterable[str] = ()) -> Schema:
+    strings, dates = set(strings), set(dates)
+    return {f: DATE if f in dates else STRING if f in strings else FLOAT for f in fields}
+
+
+def _float(element) -> float:
+    try:
+        return element.getValueAsFloat()
+    except Exception:
+        # e.g. a percentage served as text; parsed once here, not per caller
+        try:
+            return float(element.getValueAsString().rstrip("%"))
+        except ValueError:
+            return np.nan
+
+
+def _date(element) -> Optional[date]:
+    try:
+        value = element.getValueAsDatetime()
+    except Exception:
+        return None
+    return value.date() if isinstance(value, datetime) else value
+
+
+READERS = {
+    FLOAT: _float,
+    DATE: _date,
+    STRING: lambda element: element.getValueAsString(),
+}
+
+
+class ReferenceColumns:
+    """Decoded reference data: one row per requested security, one column per field."""
+
+    def __init__(self, securities: List[str], fields: List[str], schema: Schema):
+        self.securities = list(securities)
+        self.fields = list(fields)
+        self.schema = {f: schema.get(f, FLOAT) for f in self.fields}
+        n = len(self.securities)
+        self.tickers = list(self.securities)
+        # Plain lists while decoding (item assignment on an ndarray costs far
+        # more per cell); converted to typed arrays once in to_frame()
+        self.columns: Dict[str, list] = {
+            f: [np.nan if kind == FLOAT else None] * n for f, kind in self.schema.items()
+        }
+        self.errors: Dict[str, str] = {}
+        self._rows = {s: i for i, s in enumerate(self.securities)}
+        self._targets = {f: (self.columns[f], READERS[kind]) for f, kind in self.schema.items()}
+
+    def decode(self, message) -> None:
+        """Fill the columns from one ReferenceDataResponse message."""
+        data = message.getElement("securityData")
+        for i in range(data.numValues()):
+            sd = data.getValueAsElement(i)
+            security = sd.getElementAsString("security")
+            row = self._row(sd, security)
+            if sd.hasElement("securityError"):
+                self.errors[security] = sd.getElement("securityError").getElementAsString("message")
+            # Only the fields present are visited, each with one typed read
+            for element in sd.getElement("fieldData").elements():
+                target = self._targets.get(str(element.name()))
+                if target is not None:
+                    column, read = target
+                    column[row] = read(element)
+
+    def _row(self, sd, security: str) -> int:
+        if sd.hasElement("sequenceNumber"):
+            row = sd.getElementAsInteger("sequenceNumber")
+            if 0 <= row < len(self.securities):
+                return row
+        row = self._rows.get(security)
+        if row is None:
+            # Not in the request (e.g. a normalized ticker): grow by one row
+            row = len(self.tickers)
+            self._rows[security] = row
+            self.tickers.append(security)
+            for f, column in self.columns.items():
+                column.append(np.nan if self.schema[f] == FLOAT else None)
+        return row
+
+    def to_frame(self) -> pd.DataFrame:
+        # Explicit object Series: pandas would otherwise infer ``str`` and turn None into NaN
+        columns = {
+            f: pd.Series(values, dtype=np.float64 if self.schema[f] == FLOAT else object)
+            for f, values in self.columns.items()
+        }
+        return pd.DataFrame({"ticker": pd.Series(self.tickers, dtype=object), **columns})
@@ -0,0 +1,108 @@
+# backend/services/cache.py
+"""
+In-process holdings result cache keyed by a book version counter.
+
+Every write path in crud that can change a valuation (trade and asset
+create/update/delete, which includes mark updates) calls ``bump_book_version``
+after committing. Cached results are only served while the version they were
+computed under is still current; the first read after a bump clears the
+cache.
+
+Variants (as-of dates, rollup dimensions, per-user filters) share one bounded
+LRU so memory stays capped. The counter lives in this process only: a
+deployment running several workers needs each write to reach every worker
+(or a shared counter) before this cache is safe there.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+HOLDINGS_CACHE_SIZE = int(os.getenv("HOLDINGS_CACHE_SIZE", 64))
+
+
+class BookVersion:
+    """Monotonic counter of committed writes to the book."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+class VersionedLRUCache:
+    """LRU cache whose entries are all dropped when the book version moves."""
+
+    def __init__(self, version: BookVersion, maxsize: int = HOLDINGS_CACHE_SIZE):
+        self._version = version
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._entries_version = version.value
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _sync_version(self, version: int) -> None:
+        if version != self._entries_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._entries_version = version
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        # Read the version before computing: a write racing with the
+        # computation bumps it, so the result can never outlive that write.
+        version = self._version.value
+        with self._lock:
+            self._sync_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            if version == self._version.value:
+                self._sync_version(version)
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "book_version": self._version.value,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+book_version = BookVersion()
+holdings_cache = VersionedLRUCache(book_version)
+
+
+def bump_book_version() -> int:
+    return book_version.bump()
@@ -0,0 +1,97 @@
+# backend/services/export.py
+"""
+Streaming NDJSON / CSV exports.
+
+Rows are pulled from the database in chunks (``yield_per``) and encoded as
+they arrive, so memory stays flat regardless of the size of the book and the
+client receives the first bytes immediately.
+
+Records are JSON-safe dicts (``model_dump(mode="json")``). Each export opens
+its own session: the response body is produced after the endpoint returns,
+when the request-scoped session may already be closed.
+"""
+import csv
+import io
+import json
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+
+EXPORT_CHUNK_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def rows_from_new_session(fetch: Callable[[Session], Iterable[Dict]]) -> Iterator[Dict]:
+    """Run ``fetch`` against a fresh session that lives as long as the stream."""
+    db = SessionLocal()
+    try:
+        yield from fetch(db)
+    finally:
+        db.close()
+
+
+def encode_ndjson(records: Iterable[Dict], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    buf: List[str] = []
+    for record in records:
+        buf.append(json.dumps(record))
+        if len(buf) >= chunk_size:
+            yield ("\n".join(buf) + "\n").encode()
+            buf.clear()
+    if buf:
+        yield ("\n".join(buf) + "\n").encode()
+
+
+def encode_csv(
+    records: Iterable[Dict],
+    columns: List[str],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    pending = 0
+    for record in records:
+        writer.writerow(record)
+        pending += 1
+        if pending >= chunk_size:
+            yield out.getvalue().encode()
+            out.seek(0)
+            out.truncate()
+            pending = 0
+    if out.tell():
+        yield out.getvalue().encode()
+
+
+def streaming_response(
+    records: Iterable[Dict],
+    columns: List[str],
+    fmt: str,
+    filename: str,
+) -> StreamingResponse:
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format {fmt!r}")
+    body = encode_csv(records, columns) if fmt == "csv" else encode_ndjson(records)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+def model_records(items: Iterable, schema) -> Iterator[Dict]:
+    """Serialize ORM rows (or schema instances) through a Pydantic schema."""
+    for item in items:
+        obj = item if isinstance(item, schema) else schema.model_validate(item)
+        yield obj.model_dump(mode="json")
+
+
+def export_columns(schema) -> List[str]:
+    return list(schema.model_fields)
@@ -0,0 +1,206 @@
+# backend/services/firm.py
+"""
+Firm valuation: holdings and PnL for every fund, computed in parallel.
+
+The book is split by ``Trade.fund_alloc``. Each fund is valued in its own
+worker process of a ``ProcessPoolExecutor``: the worker opens its own DB
+connection, replays that fund's trades into positions, and values them with
+the same engine as the holdings endpoint. The per-fund results are merged
+into one report. With ``workers=1`` the funds are valued one after the other
+in the calling process, which is the baseline the benchmark compares against.
+Workers are started from a forkserver (spawned on Windows), so they never
+inherit the API process's threads or connections.
+
+    python -m backend.services.firm [workers]
+    python -m backend.benchmarks.firm [workers] [repeats]
+
+Background runs started from the API are tracked in an in-process registry
+(see ``submit_job`` / ``run_job``).
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.services import holdings as holdings_engine
+from backend.services import positions
+
+FIRM_VALUATION_WORKERS = int(os.getenv("FIRM_VALUATION_WORKERS", os.cpu_count() or 1))
+
+# Finished jobs kept for polling; the oldest are dropped first.
+MAX_JOBS = 20
+
+
+def fund_names(db: Session) -> List[str]:
+    """Every fund with at least one trade ("" for unallocated trades)."""
+    fund = func.coalesce(models.Trade.fund_alloc, "")
+    return list(db.scalars(select(fund).distinct().order_by(fund)))
+
+
+def value_fund(db: Session, fund: str) -> schemas.FundValuation:
+    """Replay one fund's trades and value the resulting book."""
+    t0 = time.perf_counter()
+    source = positions.replay_statement(
+        func.coalesce(models.Trade.fund_alloc, "") == fund
+    ).cte("fund_positions")
+    rows = [
+        row
+        for row in db.execute(holdings_engine.holdings_statement(source))
+        if row.first_trade_id is not None  # assets this fund never traded
+    ]
+    holdings = holdings_engine.build_holdings(rows)
+    return schemas.FundValuation(
+        fund=fund,
+        assets=len(holdings),
+        market_value=sum(h.market_value for h in holdings),
+        mtm_pnl=sum(h.mtm_pnl for h in holdings),
+        elapsed_seconds=time.perf_counter() - t0,
+        holdings=holdings,
+    )
+
+
+# ----- WORKER PROCESS -----
+
+def _mp_context():
+    # Never a fork of the (multithreaded) API process: a fork can copy locks
+    # held by other threads, e.g. the refdata refresher or the Bloomberg pump,
+    # and deadlock the child on them. forkserver is POSIX-only; Windows spawns.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _init_worker() -> None:
+    # Importing the database module gives each worker its own fresh engine;
+    # the tables already exist, so it runs no DDL
+    import backend.database  # noqa: F401
+
+
+def _value_fund_in_worker(fund: str) -> schemas.FundValuation:
+    from backend.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return value_fund(db, fund)
+    finally:
+        db.close()
+
+
+def value_firm(db: Session, workers: Optional[int] = None) -> schemas.FirmValuation:
+    """Value every fund, across ``workers`` processes, and merge the results."""
+    workers = max(1, workers or FIRM_VALUATION_WORKERS)
+    t0 = time.perf_counter()
+    funds = fund_names(db)
+
+    if workers == 1 or len(funds) <= 1:
+        workers = 1
+        results = [value_fund(db, fund) for fund in funds]
+    else:
+        workers = min(workers, len(funds))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context(), initializer=_init_worker) as pool:
+            results = list(pool.map(_value_fund_in_worker, funds))
+
+    return schemas.FirmValuation(
+        workers=workers,
+        elapsed_seconds=time.perf_counter() - t0,
+        market_value=sum(r.market_value for r in results),
+        mtm_pnl=sum(r.mtm_pnl for r in results),
+        funds=results,
+    )
+
+
+# ----- BACKGROUND JOBS -----
+
+_jobs: "OrderedDict[str, schemas.FirmValuationJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def submit_job(workers: Optional[int] = None) -> schemas.FirmValuationJob:
+    """Register a pending firm valuation; run it with ``run_job``."""
+    job = schemas.FirmValuationJob(
+        id=uuid.uuid4().hex,
+        status="pending",
+        workers=max(1, workers or FIRM_VALUATION_WORKERS),
+        submitted_at=datetime.utcnow(),
+    )
+    with _jobs_lock:
+        _jobs[job.id] = job
+        while len(_jobs) > MAX_JOBS:
+            _jobs.popitem(last=False)
+    return job
+
+
+def get_job(job_id: str) -> Optional[schemas.FirmValuationJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs() -> List[schemas.FirmValuationJob]:
+    """Jobs newest first, without their (potentially large) results."""
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    return [job.model_copy(update={"result": None}) for job in reversed(jobs)]
+
+
+def _update_job(job_id: str, **changes) -> None:
+    with _jobs_lock:
+        if job_id in _jobs:
+            _jobs[job_id] = _jobs[job_id].model_copy(update=changes)
+
+
+def run_job(job_id: str) -> None:
+    """Execute a submitted job on a fresh session (runs after the response)."""
+    from backend.database import SessionLocal
+
+    job = get_job(job_id)
+    if job is None:
+        return
+    _update_job(job_id, status="running")
+    db = SessionLocal()
+    try:
+        result = value_firm(db, job.workers)
+    except Exception as exc:
+        _update_job(job_id, status="failed", error=str(exc), finished_at=datetime.utcnow())
+    else:
+        _update_job(job_id, status="done", result=result, finished_at=datetime.utcnow())
+    finally:
+        db.close()
+
+
+def main(argv: List[str]) -> int:
+    from backend.database import SessionLocal, create_tables
+
+    create_tables()
+
+    workers = int(argv[0]) if argv else None
+    db = SessionLocal()
+    try:
+        report = value_firm(db, workers)
+    finally:
+        db.close()
+
+    for fund in report.funds:
+        print(
+            f"{fund.fund or '(unallocated)':<20} {fund.assets:>7} assets  "
+            f"MV {fund.market_value:>20,.2f}  PnL {fund.mtm_pnl:>20,.2f}  "
+            f"{fund.elapsed_seconds:6.2f}s"
+        )
+    print(
+        f"{'FIRM':<20} {sum(f.assets for f in report.funds):>7} assets  "
+        f"MV {report.market_value:>20,.2f}  PnL {report.mtm_pnl:>20,.2f}  "
+        f"{report.elapsed_seconds:6.2f}s on {report.workers} worker(s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
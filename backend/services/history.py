@@ -0,0 +1,392 @@
+# backend/services/history.py
+"""
+Local store of daily closes, and the change / high-low windows derived from it.
+
+``CHG_NET_*``, ``CHG_PCT_*`` and ``INTERVAL_HIGH``/``INTERVAL_LOW`` are all
+functions of a security's daily closes and its current price, so instead of
+asking Bloomberg for each of them, ``HistoryStore`` keeps the closes and
+computes the windows locally, column-wise over every requested security at
+once (``window_fields``).
+
+Closes are kept per security for ``HISTORY_LOOKBACK_DAYS`` and persisted as
+one Arrow IPC file (security, date, close) under HISTORY_CACHE_DIR, the same
+format as the reference extracts. The store remembers the date range it has
+already requested for each security, so a refresh only asks for the days
+after it (and any older ones a longer lookback needs); securities missing
+the same range share one HistoricalDataRequest of up to
+``HISTORY_BATCH_SIZE`` tickers.
+
+Readers on the request path (``windows``) never call Bloomberg: they read
+the stored closes and queue any security that is behind. The macro snapshot
+thread backfills the queue together with its own tickers on each refresh
+(``backfill_requested``); the CLI backfills everything known.
+
+    python -m backend.services.history backfill [ticker ...]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+HISTORY_CACHE_DIR = os.getenv("HISTORY_CACHE_DIR", "backend/data/.cache")
+HISTORY_LOOKBACK_DAYS = int(os.getenv("HISTORY_LOOKBACK_DAYS", 400))
+# Calendar days behind INTERVAL_HIGH / INTERVAL_LOW (52 weeks)
+HISTORY_INTERVAL_DAYS = int(os.getenv("HISTORY_INTERVAL_DAYS", 365))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", 500))
+
+PRICE_FIELD = "PX_LAST"
+
+# Change windows: a number of trading days, or a calendar offset
+WINDOWS: Dict[str, Any] = {
+    "1D": 1,
+    "5D": 5,
+    "1M": pd.DateOffset(months=1),
+    "6M": pd.DateOffset(months=6),
+    "YTD": "YTD",
+}
+WINDOW_FIELDS = {
+    *(f"CHG_NET_{w}" for w in WINDOWS),
+    *(f"CHG_PCT_{w}" for w in WINDOWS),
+    "INTERVAL_HIGH",
+    "INTERVAL_LOW",
+}
+
+# (tickers, field, start, end) -> {ticker: date-indexed closes}
+Fetch = Callable[[List[str], str, date, date], Dict[str, pd.Series]]
+
+
+def last_close_day(today: Optional[date] = None) -> date:
+    """The most recent weekday before ``today``: the last complete close."""
+    day = (today or date.today()) - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def _close_at_or_before(closes: pd.DataFrame, when: pd.Timestamp) -> pd.Series:
+    """Row of forward-filled ``closes`` on or before ``when`` (NaN before the first date)."""
+    pos = closes.index.searchsorted(when, side="right") - 1
+    if pos < 0:
+        return pd.Series(np.nan, index=closes.columns)
+    return closes.iloc[pos]
+
+
+def window_fields(
+    closes: pd.DataFrame,
+    last: Optional[pd.Series] = None,
+    as_of: Optional[date] = None,
+    interval_days: int = HISTORY_INTERVAL_DAYS,
+) -> pd.DataFrame:
+    """
+    Change and high/low windows for every column of ``closes`` (dates x
+    securities), one row per security.
+
+    ``last`` is the current price per security (e.g. a live ``PX_LAST``);
+    without it, or where it is missing, the latest close stands in and is
+    compared with the closes before it.
+    """
+    columns = [f"CHG_NET_{w}" for w in WINDOWS] + [f"CHG_PCT_{w}" for w in WINDOWS] + ["INTERVAL_HIGH", "INTERVAL_LOW"]
+    if closes.empty:
+        return pd.DataFrame(index=closes.columns, columns=columns, dtype=float)
+    closes = closes.sort_index().ffill()
+    latest = closes.iloc[-1]
+    live = pd.Series(np.nan, index=closes.columns) if last is None else last.reindex(closes.columns).astype(float)
+    # A security without a live price is measured from its latest close,
+    # against the closes before it; one with a live price against all of them.
+    stale = live.isna()
+    current = live.where(~stale, latest)
+    today = pd.Timestamp(as_of or (closes.index[-1] if stale.all() else date.today()))
+
+    def reference(window) -> pd.Series:
+        if isinstance(window, int):
+            # n trading days back: the n-th latest close, or one further
+            # when the latest close is itself the current price
+            return closes.shift(window - 1).iloc[-1].where(~stale, closes.shift(window).iloc[-1])
+        if window == "YTD":
+            return _close_at_or_before(closes, pd.Timestamp(today.year, 1, 1) - pd.Timedelta(days=1))
+        return _close_at_or_before(closes, today - window)
+
+    out = {}
+    for name, window in WINDOWS.items():
+        ref = reference(window)
+        out[f"CHG_NET_{name}"] = current - ref
+        out[f"CHG_PCT_{name}"] = (current - ref) / ref * 100
+    recent = closes.loc[today - pd.Timedelta(days=interval_days):]
+    out["INTERVAL_HIGH"] = np.fmax(recent.max(), current)
+    out["INTERVAL_LOW"] = np.fmin(recent.min(), current)
+    return pd.DataFrame(out, columns=columns)
+
+
+def _replace_atomically(path: str, write) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+class HistoryStore:
+    """
+    Daily closes per security, appended incrementally from Bloomberg.
+
+    ``backfill`` is the only writer (serialized by a lock); readers take the
+    per-security Series, which are replaced, never mutated.
+    """
+
+    def __init__(
+        self,
+        fetch: Optional[Fetch] = None,
+        cache_dir: str = HISTORY_CACHE_DIR,
+        field: str = PRICE_FIELD,
+        lookback_days: int = HISTORY_LOOKBACK_DAYS,
+        batch_size: int = HISTORY_BATCH_SIZE,
+    ):
+        self._fetch = fetch
+        self.path = os.path.join(cache_dir, "history.arrow")
+        self.field = field
+        self.lookback_days = lookback_days
+        self.batch_size = batch_size
+        # Serializes loads and backfills (held across the Bloomberg requests)
+        self._lock = threading.Lock()
+        # Held only while _series / _coverage change or are copied, so readers
+        # never wait on a backfill's requests
+        self._series_lock = threading.Lock()
+        self._series: Dict[str, pd.Series] = {}
+        self._coverage: Dict[str, Tuple[date, date]] = {}
+        # security -> last close day it failed for; not retried until the next one
+        self._failed: Dict[str, date] = {}
+        self._loaded = False
+        # securities readers found behind, for the next backfill_requested()
+        self._requested: Set[str] = set()
+        self._requested_lock = threading.Lock()
+        self.requests = 0
+        self.securities_fetched = 0
+        self.errors: Dict[str, str] = {}
+        self.last_backfill: Optional[datetime] = None
+
+    def fetch(self, tickers: List[str], start: date, end: date) -> Dict[str, pd.Series]:
+        if self._fetch is not None:
+            return self._fetch(tickers, self.field, start, end)
+        from backend.services.bloomberg import get_historical_data
+
+        return get_historical_data(tickers, self.field, start, end)
+
+    # ----- persistence -----
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                self._load()
+
+    def _load(self) -> None:
+        """Read the persisted closes once; caller holds ``_lock``."""
+        if self._loaded:
+            return
+        try:
+            self._read()
+        finally:
+            self._loaded = True
+
+    def _read(self) -> None:
+        try:
+            table = pa.ipc.open_file(pa.memory_map(self.path, "r")).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return
+        metadata = table.schema.metadata or {}
+        if metadata.get(b"field", b"").decode() != self.field:
+            return
+        coverage = json.loads(metadata.get(b"coverage", b"{}"))
+        securities = table.column("security").combine_chunks()
+        codes = securities.indices.to_numpy(zero_copy_only=False)
+        names = securities.dictionary.to_pylist()
+        dates = table.column("date").to_numpy().astype("datetime64[ns]")
+        closes = table.column("close").to_numpy()
+        # Rows are grouped by security: split at the boundaries
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        series = {
+            names[codes[lo]]: pd.Series(closes[lo:hi], index=pd.DatetimeIndex(dates[lo:hi]))
+            for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(codes)])
+            if hi > lo
+        }
+        with self._series_lock:
+            self._series.update(series)
+            for security, (start, end) in coverage.items():
+                self._coverage[security] = (date.fromisoformat(start), date.fromisoformat(end))
+
+    def _save(self) -> None:
+        series = [(s, self._series[s]) for s in sorted(self._series)]
+        lengths = [len(v) for _, v in series]
+        table = pa.Table.from_arrays(
+            [
+                pa.DictionaryArray.from_arrays(
+                    pa.array(np.repeat(np.arange(len(series), dtype=np.int32), lengths)),
+                    pa.array([s for s, _ in series], type=pa.string()),
+                ),
+                pa.array(np.concatenate([v.index.values for _, v in series] or [np.array([], "datetime64[ns]")]).astype("datetime64[D]")),
+                pa.array(np.concatenate([v.to_numpy(float) for _, v in series] or [np.array([])]), type=pa.float64()),
+            ],
+            names=["security", "date", "close"],
+        ).replace_schema_metadata({
+            "field": self.field,
+            "coverage": json.dumps({s: [a.isoformat(), b.isoformat()] for s, (a, b) in self._coverage.items()}),
+        })
+
+        def write(tmp):
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        _replace_atomically(self.path, write)
+
+    # ----- incremental backfill -----
+
+    def _missing(self, security: str, start: date, end: date) -> List[Tuple[date, date]]:
+        covered = self._coverage.get(security)
+        if covered is None:
+            return [(start, end)]
+        ranges = []
+        if covered[1] < end:
+            ranges.append((covered[1] + timedelta(days=1), end))
+        if covered[0] > start:
+            ranges.append((start, covered[0] - timedelta(days=1)))
+        return ranges
+
+    def _append(self, security: str, closes: pd.Series, fetched: Tuple[date, date], start: date) -> None:
+        old = self._series.get(security)
+        merged = closes if old is None else pd.concat([old, closes])
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        self._series[security] = merged.loc[pd.Timestamp(start):]
+        covered = self._coverage.get(security, fetched)
+        self._coverage[security] = (max(min(covered[0], fetched[0]), start), max(covered[1], fetched[1]))
+
+    def backfill(self, securities: Iterable[str], today: Optional[date] = None) -> int:
+        """
+        Fetch the closes ``securities`` are missing through the last complete
+        close; securities missing the same dates share a request. Returns the
+        number of HistoricalDataRequests sent.
+        """
+        end = last_close_day(today)
+        start = end - timedelta(days=self.lookback_days)
+        with self._lock:
+            self._load()
+            wanted: Dict[Tuple[date, date], List[str]] = {}
+            for security in dict.fromkeys(securities):
+                if self._failed.get(security) == end:
+                    continue
+                for span in self._missing(security, start, end):
+                    wanted.setdefault(span, []).append(security)
+            sent = 0
+            try:
+                for (lo, hi), group in wanted.items():
+                    for i in range(0, len(group), self.batch_size):
+                        chunk = group[i:i + self.batch_size]
+                        fetched = self.fetch(chunk, lo, hi)
+                        sent += 1
+                        self.securities_fetched += len(chunk)
+                        for security in chunk:
+                            if security in fetched:
+                                with self._series_lock:
+                                    self._append(security, fetched[security].dropna(), (lo, hi), start)
+                                self.errors.pop(security, None)
+                            else:
+                                # securityError: retried after the next close
+                                self._failed[security] = end
+                                self.errors[security] = f"no history for {lo}..{hi}"
+            finally:
+                self.requests += sent
+                if sent:
+                    self.last_backfill = datetime.utcnow()
+                    self._save()
+        return sent
+
+    def request(self, securities: Iterable[str]) -> None:
+        """Queue ``securities`` for the next ``backfill_requested``."""
+        with self._requested_lock:
+            self._requested.update(securities)
+
+    def backfill_requested(self, securities: Iterable[str] = (), today: Optional[date] = None) -> int:
+        """Backfill ``securities`` and every queued one, sharing requests."""
+        with self._requested_lock:
+            queued, self._requested = self._requested, set()
+        try:
+            return self.backfill([*securities, *queued], today)
+        except Exception:
+            self.request(queued)  # keep them for the next attempt
+            raise
+
+    # ----- reads -----
+
+    def behind(self, securities: Iterable[str], today: Optional[date] = None) -> List[str]:
+        """Securities whose stored closes stop before the last complete close."""
+        end = last_close_day(today)
+        self._ensure_loaded()
+        with self._series_lock:
+            coverage = {s: self._coverage.get(s) for s in securities}
+        return [
+            s for s, covered in coverage.items()
+            if self._failed.get(s) != end and (covered is None or covered[1] < end)
+        ]
+
+    def closes(self, securities: Iterable[str]) -> pd.DataFrame:
+        """Stored closes as dates x securities (NaN where a security has none)."""
+        self._ensure_loaded()
+        with self._series_lock:
+            series = {s: self._series[s] for s in dict.fromkeys(securities) if s in self._series}
+        if not series:
+            return pd.DataFrame(columns=list(dict.fromkeys(securities)), dtype=float)
+        return pd.DataFrame(series).reindex(columns=list(dict.fromkeys(securities)))
+
+    def windows(self, securities: List[str], last: Optional[pd.Series] = None, today: Optional[date] = None) -> pd.DataFrame:
+        """
+        ``window_fields`` from the stored closes only; securities that are
+        behind are queued for the next batched backfill, not fetched here.
+        """
+        behind = self.behind(securities, today)
+        if behind:
+            self.request(behind)
+        return window_fields(self.closes(securities), last, as_of=today)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._series_lock:
+            series = list(self._series.values())
+        return {
+            "securities": len(series),
+            "points": sum(len(s) for s in series),
+            "requests": self.requests,
+            "queued": len(self._requested),
+            "securities_fetched": self.securities_fetched,
+            "last_backfill": self.last_backfill,
+            "errors": dict(self.errors),
+        }
+
+
+store = HistoryStore()
+
+
+def main(argv: List[str]) -> int:
+    command = argv[0] if argv else "backfill"
+    if command != "backfill":
+        print(f"Unknown command {command!r}; expected 'backfill'")
+        return 2
+    tickers = argv[1:]
+    if not tickers:
+        from backend.services.macro import MACRO_GROUPS
+        from backend.services import refdata
+
+        refdata.store.warm()
+        tickers = [t for _, group in MACRO_GROUPS for t in group]
+        tickers += [c for t in refdata.store.snapshot.tables.values() for c in t.index]
+    t0 = time.perf_counter()
+    sent = store.backfill(tickers)
+    print(f"{len(tickers):,} securities: {sent} request(s) in {time.perf_counter() - t0:.2f}s -> {store.path}")
+    print(store.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
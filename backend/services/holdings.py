@@ -0,0 +1,137 @@
+# backend/services/holdings.py
+"""
+Set-based holdings engine.
+
+Net position, gross cost and average cost are computed for every asset with a
+single grouped aggregation joined to ``assets``, so building the book costs a
+constant number of round-trips regardless of asset count. The direction-aware
+CASE expressions below are shared with the positions replay.
+"""
+from typing import Iterator, List
+
+from sqlalchemy import Float, Numeric, case, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.services import valuation
+
+# Directions that add to the position; everything else reduces it.
+LONG_DIRECTIONS = ("Buy Long", "Cover Short")
+# Directions whose notional counts towards the cost basis.
+COST_DIRECTIONS = ("Buy Long", "Sell Short")
+
+# Wide enough to hold sums of quantity * price without truncation.
+AGG_NUMERIC = Numeric(38, 10)
+
+
+def signed_quantity(trade=models.Trade):
+    """+quantity for long-side directions, -quantity otherwise."""
+    return case(
+        (trade.direction.in_(LONG_DIRECTIONS), trade.quantity),
+        else_=-trade.quantity,
+    )
+
+
+def cost_notional(trade=models.Trade):
+    """quantity * price for cost-side directions, 0 otherwise."""
+    return case(
+        (trade.direction.in_(COST_DIRECTIONS), trade.quantity * trade.price),
+        else_=0,
+    )
+
+
+def holdings_statement(source=None):
+    """
+    One SELECT returning, per asset:
+      id, display_name, type, issuer, mark,
+      position, total_cost, first_trade_id, fund_alloc, sub_alloc
+    where fund/sub_alloc come from the asset's first (lowest id) trade.
+
+    Reads the materialized ``positions`` table (see services/positions.py),
+    so the cost is O(assets) rather than O(trades). Numbers come back as
+    floats, ready for the float64 valuation kernel.
+
+    ``source`` may be any selectable shaped like ``positions`` (asset_id,
+    fund_alloc, sub_alloc, net_quantity, cost_sum, first_trade_id), e.g. an
+    as-of reconstruction from services/snapshots.py.
+    """
+    P = models.Position.__table__ if source is None else source
+    agg = (
+        select(
+            P.c.asset_id.label("asset_id"),
+            type_coerce(func.sum(P.c.net_quantity), Float).label("position"),
+            type_coerce(func.sum(P.c.cost_sum), Float).label("total_cost"),
+            func.min(P.c.first_trade_id).label("first_trade_id"),
+        )
+        .group_by(P.c.asset_id)
+        .subquery("position_agg")
+    )
+    first_position = P.alias("first_position")
+
+    return (
+        select(
+            models.Asset.id,
+            models.Asset.display_name,
+            models.Asset.type,
+            models.Asset.issuer,
+            type_coerce(models.Asset.mark, Float).label("mark"),
+            agg.c.position,
+            agg.c.total_cost,
+            agg.c.first_trade_id,
+            first_position.c.fund_alloc,
+            first_position.c.sub_alloc,
+        )
+        .outerjoin(agg, agg.c.asset_id == models.Asset.id)
+        .outerjoin(
+            first_position,
+            (first_position.c.asset_id == agg.c.asset_id)
+            & (first_position.c.first_trade_id == agg.c.first_trade_id),
+        )
+        .order_by(models.Asset.id)
+    )
+
+
+def build_holdings(rows) -> List[schemas.Holding]:
+    """Value aggregated rows with the vectorized kernel and wrap them as Holdings."""
+    rows = list(rows)
+    position = valuation.as_column(r.position for r in rows)
+    total_cost = valuation.as_column(r.total_cost for r in rows)
+    mark = valuation.as_column(r.mark for r in rows)
+    scale = valuation.price_scale(r.type for r in rows)
+
+    avg_cost = valuation.average_cost(total_cost, position)
+    market_value, pnl = valuation.value_book(position, avg_cost, mark, scale)
+
+    holdings: List[schemas.Holding] = []
+    for i, row in enumerate(rows):
+        has_trades = row.first_trade_id is not None
+        holdings.append(
+            schemas.Holding(
+                id=row.id,
+                fund=(row.fund_alloc or "") if has_trades else "",
+                sub_alloc=(row.sub_alloc or "") if has_trades else "",
+                display_name=row.display_name,
+                position=float(position[i]),
+                mark=float(mark[i]),
+                market_value=float(market_value[i]),
+                cost_basis=float(avg_cost[i]),
+                mtm_pnl=float(pnl[i]),
+                type=row.type,
+                issuer=row.issuer or "",
+            )
+        )
+    return holdings
+
+
+def get_holdings(db: Session, source=None) -> List[schemas.Holding]:
+    """Build the full book in a single round-trip."""
+    return build_holdings(db.execute(holdings_statement(source)).all())
+
+
+def iter_holdings(db: Session, source=None, chunk_size: int = 1000) -> Iterator[schemas.Holding]:
+    """Stream the book, valuing ``chunk_size`` rows per vectorized pass."""
+    result = db.execute(
+        holdings_statement(source).execution_options(yield_per=chunk_size)
+    )
+    for chunk in result.partitions():
+        yield from build_holdings(chunk)
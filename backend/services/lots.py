@@ -0,0 +1,166 @@
+# backend/services/lots.py
+"""
+Lot accounting engine: FIFO, LIFO and weighted-average cost.
+
+Trades are processed in one pass sorted by (asset_id, trade_date, id). Each
+asset keeps its open lots in a deque of [signed quantity, price] pairs; a
+trade in the opposite direction of the open lots closes them (oldest first
+for FIFO, newest first for LIFO) and books realized PnL, and any remainder
+opens a new lot. The average method collapses the lots into one running
+(quantity, average price) pair.
+
+PnL respects the per-100 quoting of BOND_LIKE_TYPES via the price scale
+from services/valuation.py. ``python -m backend.benchmarks.lots`` times the
+engine on a synthetic 1M-trade book.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, List, Tuple
+
+from sqlalchemy import Float, select, type_coerce
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.services import valuation
+from backend.services.holdings import LONG_DIRECTIONS
+
+METHODS = ("fifo", "lifo", "average")
+
+# (asset_id, direction, quantity, price), sorted by asset_id, trade_date, id
+TradeRow = Tuple[int, str, float, float]
+
+
+@dataclass
+class LotBook:
+    """Open lots and realized PnL (in price units, unscaled) for one asset."""
+    lots: Deque[List[float]] = field(default_factory=deque)
+    realized: float = 0.0
+
+    @property
+    def position(self) -> float:
+        return sum(q for q, _ in self.lots)
+
+    @property
+    def open_cost(self) -> float:
+        """Average price of the open lots, 0 when flat."""
+        qty = self.position
+        return sum(q * p for q, p in self.lots) / qty if qty else 0.0
+
+
+def _apply_lots(book: LotBook, qty: float, price: float, lifo: bool) -> None:
+    lots = book.lots
+    while qty and lots:
+        lot = lots[-1] if lifo else lots[0]
+        lot_qty = lot[0]
+        if (lot_qty > 0) == (qty > 0):
+            break  # same direction: nothing to close
+        closed = min(abs(qty), abs(lot_qty))
+        sign = 1.0 if lot_qty > 0 else -1.0
+        book.realized += closed * (price - lot[1]) * sign
+        lot[0] = lot_qty - closed * sign
+        qty += closed * sign
+        if lot[0] == 0:
+            if lifo:
+                lots.pop()
+            else:
+                lots.popleft()
+    if qty:
+        lots.append([qty, price])
+
+
+def _apply_average(book: LotBook, qty: float, price: float) -> None:
+    lots = book.lots
+    if not lots:
+        lots.append([qty, price])
+        return
+    lot = lots[0]
+    held, avg = lot
+    if (held > 0) == (qty > 0):
+        total = held + qty
+        lot[1] = (avg * held + price * qty) / total
+        lot[0] = total
+        return
+    closed = min(abs(qty), abs(held))
+    sign = 1.0 if held > 0 else -1.0
+    book.realized += closed * (price - avg) * sign
+    remaining = qty + closed * sign
+    lot[0] = held - closed * sign
+    if lot[0] == 0:
+        lots.clear()
+        if remaining:
+            lots.append([remaining, price])
+
+
+def process_trades(rows: Iterable[TradeRow], method: str = "fifo") -> Dict[int, LotBook]:
+    """Run the lot engine over trades sorted by (asset_id, trade_date, id)."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown lot method {method!r}; expected one of {METHODS}")
+    lifo = method == "lifo"
+    average = method == "average"
+    long_dirs = frozenset(LONG_DIRECTIONS)
+
+    books: Dict[int, LotBook] = {}
+    current_id = None
+    book = None
+    for asset_id, direction, quantity, price in rows:
+        if asset_id != current_id:
+            current_id = asset_id
+            book = books[asset_id] = LotBook()
+        qty = quantity if direction in long_dirs else -quantity
+        if average:
+            _apply_average(book, qty, price)
+        else:
+            _apply_lots(book, qty, price, lifo)
+    return books
+
+
+def trades_statement():
+    T = models.Trade
+    return (
+        select(
+            T.asset_id,
+            T.direction,
+            type_coerce(T.quantity, Float),
+            type_coerce(T.price, Float),
+        )
+        .order_by(T.asset_id, T.trade_date, T.id)
+    )
+
+
+def get_lot_holdings(db: Session, method: str = "fifo") -> List[schemas.LotHolding]:
+    """Per-asset position, open-lot cost and realized / unrealized PnL."""
+    books = process_trades(
+        db.execute(trades_statement().execution_options(yield_per=10_000)).tuples(),
+        method,
+    )
+    assets = db.execute(
+        select(
+            models.Asset.id,
+            models.Asset.display_name,
+            models.Asset.type,
+            type_coerce(models.Asset.mark, Float),
+        ).order_by(models.Asset.id)
+    ).all()
+
+    empty = LotBook()
+    holdings: List[schemas.LotHolding] = []
+    for asset_id, display_name, asset_type, mark in assets:
+        book = books.get(asset_id, empty)
+        scale = valuation.PRICE_SCALE.get(getattr(asset_type, "value", asset_type), 1.0)
+        position = book.position
+        open_cost = book.open_cost
+        mark = mark or 0.0
+        holdings.append(
+            schemas.LotHolding(
+                id=asset_id,
+                display_name=display_name,
+                method=method,
+                position=position,
+                open_lots=len(book.lots),
+                open_cost=open_cost,
+                mark=mark,
+                realized_pnl=book.realized * scale,
+                unrealized_pnl=(mark - open_cost) * position * scale,
+            )
+        )
+    return holdings
@@ -0,0 +1,147 @@
+# backend/services/macro.py
+"""
+Background snapshot of the macro dashboard.
+
+A single thread fetches every ticker in ``MACRO_GROUPS`` with one
+ReferenceDataRequest each ``MACRO_REFRESH_SECONDS`` (just ``LAST_PRICE``; the
+change columns are computed from the close history in services/history.py,
+which only goes back to Bloomberg once a day), normalizes it and swaps
+the result in as an immutable snapshot. ``/api/macro/`` only reads the
+current snapshot, so page loads never reach Bloomberg. A failed refresh
+keeps the previous snapshot and records the error.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.services import history
+
+MACRO_REFRESH_SECONDS = float(os.getenv("MACRO_REFRESH_SECONDS", 30))
+
+# Dashboard groups and their tickers
+MACRO_GROUPS: List[Tuple[str, List[str]]] = [
+    ("Equities",    ["ESA Index", "NQA Index", "RTYA Index"]),
+    ("Volatility",  ["VIX Index", "MOVE Index"]),
+    ("Credit",      ["IG/Gen Corp", "HY/GEN SPRD Corp"]),
+    ("Rates",       ["GT2 Govt", "GT5 Govt", "GT10 Govt", "GT30 Govt"]),
+    ("Commodities", ["CLA Comdty", "GCA Comdty"]),
+    ("Currencies",  ["DXY Curncy", "EUR Curncy", "GBP Curncy", "JPY Curncy", "BTC Curncy"]),
+]
+
+# Served until the first successful refresh (e.g. without a Bloomberg session)
+DEMO_ROWS = [
+    {"ticker": "ESA Index", "last_price": 5000, "chg_net_1d": 12, "chg_pct_1d": 0.24, "chg_pct_5d": 1.2, "chg_pct_1m": 3.1, "chg_pct_6m": 8.4, "chg_pct_ytd": 12.3, "group": "Equities"},
+    {"ticker": "VIX Index", "last_price": 16.3, "chg_net_1d": -0.4, "chg_pct_1d": -2.4, "chg_pct_5d": -5.1, "chg_pct_1m": -8.3, "chg_pct_6m": -12.7, "chg_pct_ytd": -20.1, "group": "Volatility"},
+    {"ticker": "DXY Curncy", "last_price": 104.7, "chg_net_1d": 0.2, "chg_pct_1d": 0.19, "chg_pct_5d": 0.8, "chg_pct_1m": -0.5, "chg_pct_6m": 1.1, "chg_pct_ytd": 2.3, "group": "Currencies"},
+]
+
+
+@dataclass(frozen=True)
+class MacroSnapshot:
+    rows: Tuple[Dict[str, Any], ...]
+    as_of: Optional[datetime]  # None for the demo rows
+    fetched_monotonic: Optional[float] = None
+
+    def age_seconds(self) -> Optional[float]:
+        if self.fetched_monotonic is None:
+            return None
+        return time.monotonic() - self.fetched_monotonic
+
+
+def _fill_from_bloomberg(raw, fields: List[str]):
+    """Request the ``fields`` the close history left empty, for just those tickers."""
+    from backend.services.bloomberg import get_raw_bloomberg_data
+
+    gaps = raw[fields].isna()
+    if not gaps.any().any():
+        return raw
+    tickers = raw.loc[gaps.any(axis=1), "ticker"].tolist()
+    fetched = get_raw_bloomberg_data(tickers, [f for f in fields if gaps[f].any()]).set_index("ticker")
+    filled = raw.set_index("ticker")
+    for f in fetched.columns:
+        filled[f] = filled[f].fillna(fetched[f])
+    return filled.reset_index()
+
+
+def fetch_rows() -> List[Dict[str, Any]]:
+    """Every group in one ReferenceDataRequest, normalized, in dashboard order."""
+    from backend.bloomberg import REQUEST_ERRORS
+    from backend.services.bloomberg import FIELDS, get_raw_bloomberg_data, normalize_macro_df
+
+    tickers = [t for _, group in MACRO_GROUPS for t in group]
+    raw = get_raw_bloomberg_data(tickers, ["LAST_PRICE"])
+    try:
+        # Also brings in the securities the watchlist queued as behind
+        history.store.backfill_requested(tickers)
+    except REQUEST_ERRORS:
+        pass  # use the stored closes; the gaps are requested below
+    windows = history.store.windows(tickers, raw.set_index("ticker")["LAST_PRICE"])
+    raw = _fill_from_bloomberg(raw.join(windows, on="ticker"), [f for f in FIELDS if f != "LAST_PRICE"])
+    df = normalize_macro_df(raw)
+    by_ticker = {row["ticker"]: row for row in df.to_dict("records")}
+    rows = []
+    for group_name, group in MACRO_GROUPS:
+        for ticker in group:
+            if ticker in by_ticker:
+                rows.append({**by_ticker[ticker], "group": group_name})
+    return rows
+
+
+class MacroSnapshotService:
+    """Refreshes the macro snapshot on a fixed schedule in one background thread."""
+
+    def __init__(self, interval: float = MACRO_REFRESH_SECONDS):
+        self.interval = interval
+        self.snapshot = MacroSnapshot(rows=tuple(DEMO_ROWS), as_of=None)
+        self.last_error: Optional[str] = None
+        self.last_attempt: Optional[datetime] = None
+        self.refreshes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> bool:
+        """Fetch and publish a new snapshot; keeps the old one on failure."""
+        self.last_attempt = datetime.utcnow()
+        try:
+            rows = fetch_rows()
+        except ImportError as exc:
+            # No blpapi in this environment: nothing to retry
+            self.last_error = f"Bloomberg unavailable: {exc}"
+            self._stop.set()
+            return False
+        except Exception as exc:
+            self.last_error = str(exc)
+            return False
+        self.snapshot = MacroSnapshot(
+            rows=tuple(rows), as_of=datetime.utcnow(), fetched_monotonic=time.monotonic()
+        )
+        self.last_error = None
+        self.refreshes += 1
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="macro-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+
+service = MacroSnapshotService()
@@ -0,0 +1,273 @@
+# backend/services/marketdata.py
+"""
+Real-time watchlist prices from ``//blp/mktdata`` subscriptions.
+
+One subscription is opened per distinct CUSIP across every connected client:
+``SubscriptionManager`` reference-counts CUSIPs, subscribing on the first
+watcher and unsubscribing after the last one leaves. Ticks are reduced to the
+fields that actually changed and fanned out to each watcher, which coalesces
+them until its socket is ready to send, so a client receives one compact
+``{cusip: {field: value}}`` delta per flush.
+
+The tick source runs its own Bloomberg session (backend/bloomberg.py); with
+``BLP_FAKE=1`` the fake session ticks a random walk from the reference
+extracts.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+MKTDATA_SERVICE = "//blp/mktdata"
+
+# Bloomberg field -> watchlist response field
+TICK_FIELDS = {
+    "PX_BID": "px_bid",
+    "PX_ASK": "px_ask",
+    "YLD_CNV_BID": "yld_cnv_bid",
+}
+
+# Seconds a watcher gathers ticks before sending one delta
+WATCHLIST_WS_FLUSH_SECONDS = float(os.getenv("WATCHLIST_WS_FLUSH_MS", 100)) / 1000
+MKTDATA_RECONNECT_SECONDS = float(os.getenv("MKTDATA_RECONNECT_SECONDS", 5))
+
+Values = Dict[str, float]
+
+
+def topic_for(cusip: str) -> str:
+    # Watchlist CUSIPs may already carry a yellow key ("... Corp")
+    security = cusip if " " in cusip else f"{cusip} Corp"
+    return f"{MKTDATA_SERVICE}/ticker/{security}"
+
+
+class BlpTickSource:
+    """Subscriptions on a dedicated //blp/mktdata session, pumped by one thread."""
+
+    def __init__(self, fields: Iterable[str] = TICK_FIELDS):
+        self.fields = list(fields)
+        self.on_tick: Optional[Callable[[str, Values], None]] = None
+        self._lock = threading.Lock()
+        self._client = None
+        self._topics: Set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.failures: Dict[str, str] = {}
+        self.reconnects = 0
+
+    def _subscriptions(self, blpapi, cusips: Iterable[str]):
+        subscriptions = blpapi.SubscriptionList()
+        for cusip in cusips:
+            subscriptions.add(topic_for(cusip), self.fields, "", blpapi.CorrelationId(cusip))
+        return subscriptions
+
+    def _connect(self):
+        from backend.bloomberg import BloombergClient, blpapi
+
+        client = BloombergClient(service=MKTDATA_SERVICE)
+        with self._lock:
+            self._client = client
+            topics = list(self._topics)
+        if topics:
+            client.session.subscribe(self._subscriptions(blpapi, topics))
+        return client
+
+    def start(self, on_tick: Callable[[str, Values], None]) -> None:
+        self.on_tick = on_tick
+        if self._running:
+            return
+        self._connect()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="mktdata-pump", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def subscribe(self, cusips: List[str]) -> None:
+        from backend.bloomberg import blpapi
+
+        with self._lock:
+            self._topics.update(cusips)
+            client = self._client
+        # A dropped session only records the topics; _connect resubscribes them
+        if client is not None and client.alive and cusips:
+            client.session.subscribe(self._subscriptions(blpapi, cusips))
+
+    def unsubscribe(self, cusips: List[str]) -> None:
+        from backend.bloomberg import blpapi
+
+        with self._lock:
+            self._topics.difference_update(cusips)
+            client = self._client
+        if client is not None and client.alive and cusips:
+            client.session.unsubscribe(self._subscriptions(blpapi, cusips))
+
+    def _run(self) -> None:
+        from backend.bloomberg import blpapi
+
+        while self._running:
+            client = self._client
+            try:
+                if client is None or not client.alive:
+                    time.sleep(MKTDATA_RECONNECT_SECONDS)
+                    client = self._connect()
+                    self.reconnects += 1
+                self._pump(blpapi, client)
+            except Exception as exc:
+                # Dropped session: resubscribe every topic on a new one
+                if client is not None:
+                    client.close()
+                self.failures["session"] = str(exc)
+
+    def _pump(self, blpapi, client) -> None:
+        ev = client.session.nextEvent(500)
+        kind = ev.eventType()
+        for msg in ev:
+            if kind in (blpapi.Event.SESSION_STATUS, blpapi.Event.SERVICE_STATUS):
+                client._check_status(msg)
+                continue
+            cids = msg.correlationIds()
+            if not cids:
+                continue
+            cusip = cids[0].value()
+            if kind == blpapi.Event.SUBSCRIPTION_DATA:
+                values = {f: msg.getElement(f).getValueAsFloat() for f in self.fields if msg.hasElement(f)}
+                if values and self.on_tick is not None:
+                    self.on_tick(cusip, values)
+            elif kind == blpapi.Event.SUBSCRIPTION_STATUS and str(msg.messageType()) == "SubscriptionFailure":
+                self.failures[cusip] = str(msg)
+
+
+class Watcher:
+    """One client's pending delta, filled from tick threads and drained on its event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, flush_seconds: float = WATCHLIST_WS_FLUSH_SECONDS):
+        self.loop = loop
+        self.flush_seconds = flush_seconds
+        self.cusips: Set[str] = set()
+        self._pending: Dict[str, Values] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, cusip: str, delta: Values) -> None:
+        """Thread-safe: merge a delta for delivery on the watcher's loop."""
+        self.loop.call_soon_threadsafe(self._merge, cusip, delta)
+
+    def _merge(self, cusip: str, delta: Values) -> None:
+        self._pending.setdefault(cusip, {}).update(delta)
+        self._ready.set()
+
+    async def next_delta(self) -> Dict[str, Values]:
+        """Wait for ticks, gather for one flush interval, return them merged."""
+        await self._ready.wait()
+        await asyncio.sleep(self.flush_seconds)
+        self._ready.clear()
+        pending, self._pending = self._pending, {}
+        return pending
+
+
+class SubscriptionManager:
+    """Reference-counted subscriptions shared by every watcher."""
+
+    def __init__(self, source: BlpTickSource):
+        self.source = source
+        self._lock = threading.Lock()
+        # Serializes opening/closing the source, which can block on Bloomberg;
+        # _lock only guards the refcounts and is never held across it
+        self._start_lock = threading.Lock()
+        # Held across a refcount change and the matching source call, so
+        # subscribes and unsubscribes reach the source in refcount order
+        self._order_lock = threading.Lock()
+        self._refs: Dict[str, int] = {}
+        self._watchers: Dict[str, Set[Watcher]] = {}
+        self._last: Dict[str, Values] = {}
+        self._started = False
+        self.ticks = 0
+        self.deltas = 0
+
+    def _ensure_started(self) -> None:
+        if self._started:
+            return
+        with self._start_lock:
+            if not self._started:
+                self.source.start(self.on_tick)
+                self._started = True
+
+    def watch(self, watcher: Watcher, cusips: Iterable[str]) -> Dict[str, Values]:
+        """Add ``cusips`` to a watcher; returns the last known values for them."""
+        self._ensure_started()
+        with self._order_lock:
+            with self._lock:
+                new, first = [], []
+                for cusip in set(cusips) - watcher.cusips:
+                    watcher.cusips.add(cusip)
+                    self._watchers.setdefault(cusip, set()).add(watcher)
+                    self._refs[cusip] = self._refs.get(cusip, 0) + 1
+                    new.append(cusip)
+                    if self._refs[cusip] == 1:
+                        first.append(cusip)
+                snapshot = {c: dict(self._last[c]) for c in new if c in self._last}
+            if first:
+                self.source.subscribe(first)
+        return snapshot
+
+    def unwatch(self, watcher: Watcher, cusips: Optional[Iterable[str]] = None) -> None:
+        """Drop ``cusips`` (default: all) from a watcher."""
+        last = []
+        with self._order_lock:
+            with self._lock:
+                for cusip in set(watcher.cusips if cusips is None else cusips) & watcher.cusips:
+                    watcher.cusips.discard(cusip)
+                    self._watchers[cusip].discard(watcher)
+                    self._refs[cusip] -= 1
+                    if self._refs[cusip] == 0:
+                        del self._refs[cusip], self._watchers[cusip]
+                        self._last.pop(cusip, None)
+                        last.append(cusip)
+            if last:
+                self.source.unsubscribe(last)
+
+    def on_tick(self, cusip: str, values: Values) -> None:
+        """Source callback: push the fields that changed to every watcher of ``cusip``."""
+        with self._lock:
+            self.ticks += 1
+            if cusip not in self._refs:
+                return  # late tick after the last unwatch; don't resurrect _last
+            current = self._last.setdefault(cusip, {})
+            delta = {}
+            for field, value in values.items():
+                key = TICK_FIELDS.get(field, field.lower())
+                if current.get(key) != value:
+                    delta[key] = value
+            if not delta:
+                return
+            current.update(delta)
+            watchers = list(self._watchers.get(cusip, ()))
+            self.deltas += len(watchers)
+        for watcher in watchers:
+            watcher.push(cusip, delta)
+
+    def stop(self) -> None:
+        with self._start_lock:
+            if self._started:
+                self.source.stop()
+                self._started = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "subscriptions": len(self._refs),
+                "watchers": len({w for ws in self._watchers.values() for w in ws}),
+                "ticks": self.ticks,
+                "deltas": self.deltas,
+                "failures": dict(self.source.failures),
+            }
+
+
+manager = SubscriptionManager(BlpTickSource())
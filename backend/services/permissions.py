@@ -0,0 +1,114 @@
+# backend/services/permissions.py
+"""
+Compiled, in-process permission sets per user.
+
+``check_permission`` and the admin checks used to walk ``user.roles`` ->
+``role.actions`` through lazy loads on every request. ``PermissionResolver``
+compiles a user's role and action names into a frozen ``Permissions`` with
+one query the first time the user is seen, and serves it from memory after
+that, so the authorization path does no SQL.
+
+``/access/roles/{id}/actions`` and ``/access/users/{id}/roles`` invalidate
+the affected entries once their change has committed. A role change can
+affect any user, so it drops every entry. Like the holdings cache
+(services/cache.py) this cache lives in one process, so entries also expire
+after ``PERMISSIONS_CACHE_TTL`` seconds. That bounds how long a worker that
+did not see the change keeps serving a stale set.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, object_session
+
+from backend import models
+
+PERMISSIONS_CACHE_TTL = float(os.getenv("PERMISSIONS_CACHE_TTL", 60))
+
+ADMIN_ROLE = "admin"
+
+
+@dataclass(frozen=True)
+class Permissions:
+    user_id: int
+    roles: FrozenSet[str]
+    actions: FrozenSet[str]
+
+    @property
+    def is_admin(self) -> bool:
+        return ADMIN_ROLE in self.roles
+
+    def allows(self, action: str) -> bool:
+        return action in self.actions
+
+
+def compile_permissions(db: Session, user_id: int) -> Permissions:
+    """Role and action names for ``user_id`` in one query."""
+    rows = db.execute(
+        select(models.Role.name, models.Action.name)
+        .select_from(models.user_roles)
+        .join(models.Role, models.Role.id == models.user_roles.c.role_id)
+        .outerjoin(models.role_actions, models.role_actions.c.role_id == models.Role.id)
+        .outerjoin(models.Action, models.Action.id == models.role_actions.c.action_id)
+        .where(models.user_roles.c.user_id == user_id)
+    ).all()
+    return Permissions(
+        user_id=user_id,
+        roles=frozenset(role for role, _ in rows if role is not None),
+        actions=frozenset(action for _, action in rows if action is not None),
+    )
+
+
+class PermissionResolver:
+    """user id -> ``Permissions``, compiled on first use and cached."""
+
+    def __init__(self, ttl: float = PERMISSIONS_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[Permissions, float]] = {}
+        # bumped by every invalidation; a compile that raced one is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user: models.User, db: Optional[Session] = None) -> Permissions:
+        """The user's permissions; compiled through ``db`` (default: the user's session) on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(user.id)
+            if cached is not None and cached[1] > now:
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            generation = self._generation
+        permissions = compile_permissions(db or object_session(user), user.id)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user.id] = (permissions, now + self.ttl)
+        return permissions
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drop one user's entry, or every entry (e.g. after a role's actions change)."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "users": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+resolver = PermissionResolver()
@@ -0,0 +1,287 @@
+# backend/services/positions.py
+"""
+Incremental maintenance of the materialized ``positions`` table.
+
+Every trade write applies a signed delta to the (asset_id, fund_alloc,
+sub_alloc) row it touches inside the caller's transaction, so holdings can be
+read from ``positions`` without scanning the trade history.
+
+Run ``python -m backend.services.positions verify`` to replay ``trades`` and
+report drift, or ``rebuild`` to recompute the table from scratch.
+"""
+import sys
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, type_coerce, update
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import upsert_insert
+from backend.services.cache import bump_book_version
+from backend.services.holdings import (
+    AGG_NUMERIC,
+    COST_DIRECTIONS,
+    LONG_DIRECTIONS,
+    cost_notional,
+    signed_quantity,
+)
+
+# Differences below half a quantity tick (Numeric(20, 4)) plus a relative
+# epsilon are float noise from the SQLite backend, not drift.
+DRIFT_ABS_TOLERANCE = Decimal("0.00005")
+DRIFT_REL_TOLERANCE = Decimal("1e-9")
+
+PositionKey = Tuple[int, str, str]
+
+
+@dataclass(frozen=True)
+class TradeContribution:
+    """What a single trade adds to its position row."""
+    trade_id: int
+    asset_id: int
+    fund_alloc: str
+    sub_alloc: str
+    quantity: Decimal
+    cost: Decimal
+
+    @property
+    def key(self) -> PositionKey:
+        return (self.asset_id, self.fund_alloc, self.sub_alloc)
+
+
+def _dec(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _close(expected: Decimal, actual: Decimal) -> bool:
+    return abs(expected - actual) <= DRIFT_ABS_TOLERANCE + DRIFT_REL_TOLERANCE * abs(expected)
+
+
+def contribution(trade: models.Trade) -> TradeContribution:
+    """Capture a trade's contribution (call before mutating the trade)."""
+    qty = _dec(trade.quantity)
+    price = _dec(trade.price)
+    return TradeContribution(
+        trade_id=trade.id,
+        asset_id=trade.asset_id,
+        fund_alloc=trade.fund_alloc or "",
+        sub_alloc=trade.sub_alloc or "",
+        quantity=qty if trade.direction in LONG_DIRECTIONS else -qty,
+        cost=qty * price if trade.direction in COST_DIRECTIONS else Decimal(0),
+    )
+
+
+def _key_filter(table, key: PositionKey):
+    asset_id, fund_alloc, sub_alloc = key
+    return (
+        (table.asset_id == asset_id)
+        & (table.fund_alloc == fund_alloc)
+        & (table.sub_alloc == sub_alloc)
+    )
+
+
+def add(db: Session, c: TradeContribution) -> None:
+    """Apply a trade's contribution (delta +1)."""
+    P = models.Position
+    first_trade_id = case(
+        (P.first_trade_id.is_(None) | (P.first_trade_id > c.trade_id), c.trade_id),
+        else_=P.first_trade_id,
+    )
+    row = dict(
+        asset_id=c.asset_id,
+        fund_alloc=c.fund_alloc,
+        sub_alloc=c.sub_alloc,
+        net_quantity=c.quantity,
+        cost_sum=c.cost,
+        trade_count=1,
+        first_trade_id=c.trade_id,
+    )
+    upsert = upsert_insert(db)
+    if upsert is not None:
+        # One statement, so concurrent first trades for a key cannot both
+        # insert and trip uq_position_key
+        stmt = upsert(P).values(**row)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[P.asset_id, P.fund_alloc, P.sub_alloc],
+            set_={
+                "net_quantity": P.net_quantity + stmt.excluded.net_quantity,
+                "cost_sum": P.cost_sum + stmt.excluded.cost_sum,
+                "trade_count": P.trade_count + 1,
+                "first_trade_id": first_trade_id,
+            },
+        ))
+        return
+
+    result = db.execute(
+        update(P)
+        .where(_key_filter(P, c.key))
+        .values(
+            net_quantity=P.net_quantity + c.quantity,
+            cost_sum=P.cost_sum + c.cost,
+            trade_count=P.trade_count + 1,
+            first_trade_id=first_trade_id,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(P).values(**row))
+
+
+def remove(db: Session, c: TradeContribution) -> None:
+    """Reverse a trade's contribution (delta -1)."""
+    P = models.Position
+    T = models.Trade
+    db.execute(
+        update(P)
+        .where(_key_filter(P, c.key))
+        .values(
+            net_quantity=P.net_quantity - c.quantity,
+            cost_sum=P.cost_sum - c.cost,
+            trade_count=P.trade_count - 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # min() is not invertible: if the removed trade was the first one for
+    # this key, look up the next one (indexed on trades.asset_id).
+    next_first = (
+        select(func.min(T.id))
+        .where(
+            (T.asset_id == c.asset_id)
+            & (func.coalesce(T.fund_alloc, "") == c.fund_alloc)
+            & (func.coalesce(T.sub_alloc, "") == c.sub_alloc)
+            & (T.id != c.trade_id)
+        )
+        .scalar_subquery()
+    )
+    db.execute(
+        update(P)
+        .where(_key_filter(P, c.key) & (P.first_trade_id == c.trade_id))
+        .values(first_trade_id=next_first)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(P)
+        .where(_key_filter(P, c.key) & (P.trade_count <= 0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def remove_asset(db: Session, asset_id: int) -> None:
+    """Drop every position row for an asset (its trades are going with it)."""
+    db.execute(
+        delete(models.Position)
+        .where(models.Position.asset_id == asset_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# ----- REPLAY / REBUILD -----
+
+def replay_statement(*criteria):
+    """
+    Positions recomputed from the trade history, one row per key.
+    Optional ``criteria`` restrict the trades replayed (e.g. a date window).
+    """
+    T = models.Trade
+    fund = func.coalesce(T.fund_alloc, "")
+    sub = func.coalesce(T.sub_alloc, "")
+    return (
+        select(
+            T.asset_id,
+            fund.label("fund_alloc"),
+            sub.label("sub_alloc"),
+            type_coerce(func.sum(signed_quantity()), AGG_NUMERIC).label("net_quantity"),
+            type_coerce(func.sum(cost_notional()), AGG_NUMERIC).label("cost_sum"),
+            func.count(T.id).label("trade_count"),
+            func.min(T.id).label("first_trade_id"),
+        )
+        .where(*criteria)
+        .group_by(T.asset_id, fund, sub)
+    )
+
+
+def rebuild(db: Session) -> int:
+    """Recompute ``positions`` from ``trades``. Returns the number of rows."""
+    P = models.Position
+    db.execute(delete(P).execution_options(synchronize_session=False))
+    stmt = replay_statement()
+    db.execute(
+        insert(P).from_select(
+            ["asset_id", "fund_alloc", "sub_alloc", "net_quantity",
+             "cost_sum", "trade_count", "first_trade_id"],
+            stmt,
+        )
+    )
+    db.commit()
+    bump_book_version()
+    return db.scalar(select(func.count()).select_from(P))
+
+
+def ensure_built(db: Session) -> None:
+    """Backfill an empty positions table when trades already exist."""
+    has_positions = db.scalar(select(models.Position.id).limit(1)) is not None
+    has_trades = db.scalar(select(models.Trade.id).limit(1)) is not None
+    if has_trades and not has_positions:
+        rebuild(db)
+
+
+def verify(db: Session) -> List[Dict[str, object]]:
+    """
+    Replay ``trades`` and compare against ``positions``.
+    Returns one dict per drifting key (empty list when consistent).
+    """
+    expected: Dict[PositionKey, tuple] = {
+        (r.asset_id, r.fund_alloc, r.sub_alloc): (
+            _dec(r.net_quantity or 0), _dec(r.cost_sum or 0), r.trade_count, r.first_trade_id
+        )
+        for r in db.execute(replay_statement())
+    }
+    actual: Dict[PositionKey, tuple] = {
+        (p.asset_id, p.fund_alloc, p.sub_alloc): (
+            _dec(p.net_quantity or 0), _dec(p.cost_sum or 0), p.trade_count, p.first_trade_id
+        )
+        for p in db.query(models.Position)
+    }
+
+    drift: List[Dict[str, object]] = []
+    for key in sorted(expected.keys() | actual.keys()):
+        exp: Optional[tuple] = expected.get(key)
+        act: Optional[tuple] = actual.get(key)
+        if exp and act:
+            if (
+                _close(exp[0], act[0])
+                and _close(exp[1], act[1])
+                and exp[2:] == act[2:]
+            ):
+                continue
+        drift.append({"key": key, "expected": exp, "actual": act})
+    return drift
+
+
+def main(argv: List[str]) -> int:
+    from backend.database import SessionLocal, create_tables
+
+    create_tables()
+
+    command = argv[0] if argv else "verify"
+    db = SessionLocal()
+    try:
+        if command == "rebuild":
+            print(f"Rebuilt positions: {rebuild(db)} rows")
+            return 0
+        if command == "verify":
+            drift = verify(db)
+            for d in drift:
+                print(f"DRIFT {d['key']}: expected={d['expected']} actual={d['actual']}")
+            print(f"{len(drift)} drifting position(s)")
+            return 1 if drift else 0
+        print("usage: python -m backend.services.positions [verify|rebuild]")
+        return 2
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,450 @@
+# backend/services/refdata.py
+"""
+Reference data (Bloomberg workbook extracts) indexed by CUSIP.
+
+Parsing xlsx is slow, so each workbook is ingested once into a typed Arrow
+IPC file plus a JSON sidecar mapping CUSIP -> row number, both under
+REFDATA_CACHE_DIR. API processes memory-map the Arrow file: N workers share
+one page-cached copy instead of each holding a parsed DataFrame. A lookup is
+a dict access into the sidecar index and a one-row slice of the mapped table.
+
+Readers use an immutable ``RefSnapshot``. In the API, ``RefDataRefresher``
+polls the workbooks in a background thread, ingests changed files once they
+have stopped changing, and swaps a new snapshot in; a workbook that fails to
+parse keeps serving its previous version. Elsewhere (no refresher running)
+the store checks the workbook's mtime on lookup and refreshes inline. The
+extracts can also be rebuilt with ``python -m backend.services.refdata
+ingest``; ``python -m backend.benchmarks.refdata`` compares the store with
+parsing the xlsx.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+# Workbook per asset type (paths relative to the repository root, like the
+# rest of the app's data files).
+REFDATA_FILES = {
+    "Corporate Bond": "backend/data/bonds.xlsx",
+    "Government Bond": "backend/data/bonds.xlsx",
+    "Term Loan": "backend/data/loans.xlsx",
+    "Revolver": "backend/data/loans.xlsx",
+}
+
+REFDATA_CACHE_DIR = os.getenv("REFDATA_CACHE_DIR", "backend/data/.cache")
+
+# How often the background refresher checks the workbooks for changes.
+REFDATA_POLL_SECONDS = float(os.getenv("REFDATA_POLL_SECONDS", 5))
+
+# The workbooks carry two banner rows above the column headers.
+HEADER_ROW = 2
+
+# Bumped when ingest changes how columns are typed, so older extracts are rebuilt
+EXTRACT_FORMAT = b"2"
+
+Record = Dict[str, Any]
+
+
+# ----- INGEST -----
+
+def cache_paths(xlsx_path: str, cache_dir: str = REFDATA_CACHE_DIR) -> Tuple[str, str]:
+    """(Arrow IPC file, CUSIP index sidecar) for a workbook."""
+    stem = os.path.splitext(os.path.basename(xlsx_path))[0]
+    return (
+        os.path.join(cache_dir, f"{stem}.arrow"),
+        os.path.join(cache_dir, f"{stem}.cusips.json"),
+    )
+
+
+# Field metadata marking a float64 column whose workbook cells were a mix of
+# ints and floats: readers return its integral values as int, as the cells were
+INTEGRAL_AS_INT = b"integral_as_int"
+
+
+def _typed_field(name: str, values: pd.Series) -> Tuple[pa.Field, pa.Array]:
+    """
+    int64 / float64 / timestamp when every non-null cell has that kind, else
+    string. Lookups return the same Python values a parse of the workbook
+    would (openpyxl reads whole numbers as int).
+    """
+    present = values.dropna()
+    kinds = {type(v) for v in present}
+    if kinds and kinds <= {int}:
+        return pa.field(name, pa.int64()), pa.array(values.astype("Int64"), type=pa.int64())
+    if kinds and kinds <= {int, float}:
+        metadata = {INTEGRAL_AS_INT: b"1"} if int in kinds else None
+        array = pa.array(values.astype(float), type=pa.float64(), from_pandas=True)
+        return pa.field(name, pa.float64(), metadata=metadata), array
+    if kinds and all(issubclass(k, datetime) for k in kinds):
+        array = pa.array([None if pd.isna(v) else v for v in values], type=pa.timestamp("us"))
+        return pa.field(name, pa.timestamp("us")), array
+    return pa.field(name, pa.string()), pa.array(
+        [None if pd.isna(v) else str(v) for v in values], type=pa.string()
+    )
+
+
+def _integral_as_int(value):
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+def _replace_atomically(path: str, write) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def ingest(xlsx_path: str, cache_dir: str = REFDATA_CACHE_DIR) -> float:
+    """
+    Convert a workbook into its Arrow file and CUSIP sidecar.
+    Returns the ingest time in seconds.
+    """
+    t0 = time.perf_counter()
+    before = os.stat(xlsx_path)
+    source_mtime = before.st_mtime
+    df = pd.read_excel(xlsx_path, header=HEADER_ROW)
+    after = os.stat(xlsx_path)
+    if (after.st_mtime, after.st_size) != (before.st_mtime, before.st_size):
+        raise RuntimeError(f"{xlsx_path} changed while it was being read")
+    if "ID" not in df.columns:
+        raise ValueError(f"{xlsx_path} has no ID column")
+
+    # The first data row holds the Bloomberg field mnemonics (ID, ISSUER,
+    # CPN, ...). Keep it as schema metadata rather than as a security.
+    mnemonics: Dict[str, str] = {}
+    if len(df) and df["ID"].iloc[0] == "ID":
+        mnemonics = {col: str(df[col].iloc[0]) for col in df.columns if pd.notna(df[col].iloc[0])}
+        df = df.iloc[1:].reset_index(drop=True)
+
+    fields, arrays = zip(*(_typed_field(str(col), df[col]) for col in df.columns))
+    table = pa.Table.from_arrays(list(arrays), schema=pa.schema(fields)).replace_schema_metadata({
+        "source": xlsx_path,
+        "source_mtime": repr(source_mtime),
+        "format": EXTRACT_FORMAT,
+        "mnemonics": json.dumps(mnemonics),
+    })
+
+    index: Dict[str, int] = {}
+    for row, cusip in enumerate(df["ID"]):
+        if isinstance(cusip, str):
+            index.setdefault(cusip, row)  # first occurrence wins
+
+    os.makedirs(cache_dir, exist_ok=True)
+    arrow_path, index_path = cache_paths(xlsx_path, cache_dir)
+
+    def write_arrow(tmp):
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    def write_index(tmp):
+        with open(tmp, "w") as fh:
+            json.dump({"source_mtime": source_mtime, "rows": table.num_rows, "cusips": index}, fh)
+
+    # Arrow first: a reader only trusts the pair once the sidecar matches.
+    _replace_atomically(arrow_path, write_arrow)
+    _replace_atomically(index_path, write_index)
+    return time.perf_counter() - t0
+
+
+# ----- MEMORY-MAPPED TABLES -----
+
+@dataclass(frozen=True)
+class RefTable:
+    """A memory-mapped workbook extract and its CUSIP index."""
+    path: str
+    mtime: float
+    table: pa.Table
+    index: Dict[str, int]
+    mnemonics: Dict[str, str]
+    loaded_at: datetime
+
+    @cached_property
+    def int_columns(self) -> List[str]:
+        """float64 columns whose integral values were int cells in the workbook."""
+        return [f.name for f in self.table.schema if f.metadata and INTEGRAL_AS_INT in f.metadata]
+
+    def get(self, cusip: str) -> Optional[Record]:
+        row = self.index.get(cusip)
+        if row is None:
+            return None
+        record = self.table.slice(row, 1).to_pylist()[0]
+        for col in self.int_columns:
+            record[col] = _integral_as_int(record[col])
+        return record
+
+    def _pandas(self, table: pa.Table) -> pd.DataFrame:
+        # Integer columns with nulls stay int (object) rather than float64
+        df = table.to_pandas(integer_object_nulls=True)
+        for col in self.int_columns:
+            # object dtype: map() would infer float64 again
+            df[col] = pd.Series([_integral_as_int(v) for v in df[col]], index=df.index, dtype=object)
+        return df
+
+    def frame(self, cusips: Iterable[str]) -> pd.DataFrame:
+        """Rows for the known ``cusips`` (one each), gathered in one take()."""
+        rows = sorted({self.index[c] for c in cusips if c in self.index})
+        return self._pandas(self.table.take(pa.array(rows, type=pa.int64())))
+
+    def to_pandas(self) -> pd.DataFrame:
+        return self._pandas(self.table)
+
+
+def open_table(xlsx_path: str, source_mtime: float, cache_dir: str = REFDATA_CACHE_DIR) -> Optional[RefTable]:
+    """Map the cached extract, or None when it is missing or stale."""
+    arrow_path, index_path = cache_paths(xlsx_path, cache_dir)
+    try:
+        with open(index_path) as fh:
+            sidecar = json.load(fh)
+        if sidecar["source_mtime"] != source_mtime:
+            return None
+        # read_all() on a memory map is zero-copy: the columns stay backed
+        # by the shared page cache.
+        table = pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+    except (FileNotFoundError, ValueError, KeyError, pa.ArrowInvalid):
+        return None
+    metadata = table.schema.metadata or {}
+    if float(metadata.get(b"source_mtime", b"nan")) != source_mtime:
+        return None
+    if metadata.get(b"format") != EXTRACT_FORMAT:
+        return None
+    return RefTable(
+        path=xlsx_path,
+        mtime=source_mtime,
+        table=table,
+        index=sidecar["cusips"],
+        mnemonics=json.loads(metadata.get(b"mnemonics", b"{}")),
+        loaded_at=datetime.utcnow(),
+    )
+
+
+@dataclass(frozen=True)
+class RefSnapshot:
+    """An immutable, consistent set of tables; replaced wholesale on refresh."""
+    version: int
+    loaded_at: Optional[datetime]
+    tables: Dict[str, RefTable]
+
+
+class RefDataStore:
+    """
+    CUSIP lookups over the reference workbooks.
+
+    Readers take the current ``RefSnapshot`` (a single reference read) and
+    never parse. New snapshots are built aside and swapped in by ``refresh``,
+    normally from the ``RefDataRefresher`` thread. Without a refresher
+    (``watching`` false: scripts, the CLI) a lookup checks the workbook's
+    mtime and refreshes it inline.
+    """
+
+    def __init__(self, files: Dict[str, str] = REFDATA_FILES, cache_dir: str = REFDATA_CACHE_DIR):
+        self.files = files
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()  # serializes writers only
+        self._snapshot = RefSnapshot(version=0, loaded_at=None, tables={})
+        self.watching = False
+        self.loads = 0
+        self.ingests = 0
+        self.ingest_seconds: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        # called with each newly published snapshot (e.g. the security_master ETL)
+        self.listeners: List[Callable[[RefSnapshot], None]] = []
+
+    @property
+    def snapshot(self) -> RefSnapshot:
+        return self._snapshot
+
+    def sources(self) -> List[str]:
+        return sorted(set(self.files.values()))
+
+    def path_for(self, asset_type: str) -> Optional[str]:
+        """Workbook for ``asset_type``, or None when unmapped or missing."""
+        path = self.files.get(asset_type)
+        if not path or not os.path.exists(path):
+            return None
+        return path
+
+    def _load(self, path: str, mtime: float) -> Optional[RefTable]:
+        table = open_table(path, mtime, self.cache_dir)
+        if table is None:
+            try:
+                self.ingest_seconds[path] = ingest(path, self.cache_dir)
+            except ValueError:
+                return None  # not a reference workbook (no ID column)
+            self.ingests += 1
+            table = open_table(path, mtime, self.cache_dir)
+        self.loads += 1
+        return table
+
+    def refresh(self, paths: Optional[Iterable[str]] = None) -> bool:
+        """
+        Reload the given workbooks (default: all) whose mtime moved, then
+        publish a new snapshot. A workbook that fails to parse (e.g. caught
+        mid-write) keeps its previous table. Returns True when swapped.
+        """
+        with self._lock:
+            current = self._snapshot
+            tables = dict(current.tables)
+            changed = False
+            for path in paths if paths is not None else self.sources():
+                try:
+                    mtime = os.stat(path).st_mtime
+                except FileNotFoundError:
+                    changed |= tables.pop(path, None) is not None
+                    continue
+                if path in tables and tables[path].mtime == mtime:
+                    continue
+                try:
+                    table = self._load(path, mtime)
+                except Exception as exc:
+                    self.errors[path] = f"{type(exc).__name__}: {exc}"
+                    continue
+                self.errors.pop(path, None)
+                if table is not None:
+                    tables[path] = table
+                    changed = True
+            if not changed:
+                return False
+            # a single reference assignment: readers see old or new, never a mix
+            snapshot = self._snapshot = RefSnapshot(
+                version=current.version + 1,
+                loaded_at=datetime.utcnow(),
+                tables=tables,
+            )
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as exc:
+                self.errors[getattr(listener, "__name__", "listener")] = f"{type(exc).__name__}: {exc}"
+        return True
+
+    def table(self, asset_type: str) -> Optional[RefTable]:
+        path = self.files.get(asset_type)
+        if path is None:
+            return None
+        if not self.watching:
+            self.refresh([path])
+        return self._snapshot.tables.get(path)
+
+    def lookup(self, cusip: str, asset_type: str) -> Optional[Record]:
+        """The record for ``cusip``, or None when unknown."""
+        table = self.table(asset_type)
+        if table is None:
+            return None
+        return table.get(cusip)
+
+    def warm(self) -> None:
+        """Ingest stale extracts and map every workbook (app startup)."""
+        self.refresh()
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "loaded_at": snapshot.loaded_at,
+            "watching": self.watching,
+            "loads": self.loads,
+            "ingests": self.ingests,
+            "errors": dict(self.errors),
+            "tables": {
+                path: {
+                    "rows": t.table.num_rows,
+                    "source_mtime": t.mtime,
+                    "loaded_at": t.loaded_at,
+                    "mapped_bytes": t.table.nbytes,
+                    "ingest_seconds": self.ingest_seconds.get(path),
+                }
+                for path, t in snapshot.tables.items()
+            },
+        }
+
+
+class RefDataRefresher:
+    """
+    Polls the reference workbooks and refreshes the store off the request
+    path. A changed file is only loaded once its (mtime, size) has held
+    still for one poll, so a workbook that is still being copied in is not
+    picked up half-written.
+    """
+
+    def __init__(self, store: "RefDataStore", interval: float = REFDATA_POLL_SECONDS):
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Dict[str, Tuple[float, int]] = {}
+        self.last_poll: Optional[datetime] = None
+
+    def poll(self) -> bool:
+        """One pass: refresh the workbooks that changed and have settled."""
+        tables = self.store.snapshot.tables
+        seen: Dict[str, Tuple[float, int]] = {}
+        settled = []
+        for path in self.store.sources():
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                if path in tables:
+                    settled.append(path)  # removed: drop it from the snapshot
+                continue
+            seen[path] = (st.st_mtime, st.st_size)
+            if path in tables and tables[path].mtime == st.st_mtime:
+                continue
+            if self._pending.get(path) == seen[path]:
+                settled.append(path)
+        self._pending = seen
+        self.last_poll = datetime.utcnow()
+        return self.store.refresh(settled) if settled else False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as exc:  # keep polling; surfaced on the status endpoint
+                self.store.errors["refresher"] = f"{type(exc).__name__}: {exc}"
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.store.watching = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="refdata-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.store.watching = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+
+store = RefDataStore()
+refresher = RefDataRefresher(store)
+
+
+def main(argv: List[str]) -> int:
+    command = argv[0] if argv else "ingest"
+    if command != "ingest":
+        print(f"Unknown command {command!r}; expected 'ingest'")
+        return 2
+    for path in sorted(set(REFDATA_FILES.values())):
+        if not os.path.exists(path):
+            print(f"{path}: missing, skipped")
+            continue
+        print(f"{path}: ingested in {ingest(path):.2f}s -> {cache_paths(path)[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,162 @@
+# backend/services/rollups.py
+"""
+Server-side holdings rollups.
+
+Positions are aggregated in SQL at the granularity the requested dimensions
+need (per asset, plus fund/sub-allocation when grouped on), valued with the
+vectorized kernel, then summed per group with subtotals and a grand total.
+The client receives dozens of rows instead of the flat book.
+"""
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.services import valuation
+
+MISSING = "N/A"
+# Dimensions of positions whose asset row is gone
+UNKNOWN = "Unknown"
+
+# Dimensions a rollup can group by
+DIMENSIONS = ("fund_alloc", "sub_alloc", "type", "issuer", "rating", "maturity_bucket")
+
+# (upper bound in years, label); anything beyond the last bound is "10Y+"
+MATURITY_BUCKETS = [
+    (0.0, "Matured"),
+    (1.0, "<1Y"),
+    (3.0, "1-3Y"),
+    (5.0, "3-5Y"),
+    (10.0, "5-10Y"),
+]
+
+
+def rollup_statement(dimensions: Sequence[str], source=None):
+    """
+    Positions aggregated per asset (and per fund / sub_alloc when grouped on).
+    Outer-joined to ``assets``, so positions without an asset row still count
+    towards the totals (with null asset columns).
+    """
+    P = models.Position.__table__ if source is None else source
+    A = models.Asset
+    columns = [
+        P.c.asset_id.label("asset_id"),
+        A.type,
+        A.issuer,
+        A.sp_cfr,
+        A.moodys_cfr,
+        A.maturity,
+        type_coerce(A.mark, Float).label("mark"),
+        type_coerce(func.sum(P.c.net_quantity), Float).label("position"),
+        type_coerce(func.sum(P.c.cost_sum), Float).label("total_cost"),
+    ]
+    # A.id keeps the asset columns functionally dependent on the grouping
+    group_by = [P.c.asset_id, A.id]
+    for split in ("fund_alloc", "sub_alloc"):
+        if split in dimensions:
+            columns.append(P.c[split])
+            group_by.append(P.c[split])
+    return (
+        select(*columns)
+        .select_from(P.outerjoin(A, A.id == P.c.asset_id))
+        .group_by(*group_by)
+    )
+
+
+def maturity_bucket(maturity: pd.Series, today: date) -> np.ndarray:
+    """Vectorized maturity bucketing relative to ``today``."""
+    years = (pd.to_datetime(maturity) - pd.Timestamp(today)).dt.days.to_numpy(dtype=float) / 365.25
+    conditions = [years <= bound for bound, _ in MATURITY_BUCKETS]
+    labels = [label for _, label in MATURITY_BUCKETS]
+    buckets = np.select(conditions, labels, default="10Y+").astype(object)
+    buckets[np.isnan(years)] = MISSING
+    return buckets
+
+
+def rating(df: pd.DataFrame) -> pd.Series:
+    """S&P CFR, falling back to Moody's CFR (blank ratings count as missing)."""
+    sp, moodys = df["sp_cfr"], df["moodys_cfr"]
+    return sp.mask(sp.eq("")).fillna(moodys.mask(moodys.eq("")))
+
+
+def valued_frame(df: pd.DataFrame, dimensions: Sequence[str], today: date) -> pd.DataFrame:
+    """Add market_value / mtm_pnl and the derived dimension columns."""
+    if df.empty:
+        return df
+
+    position = df["position"].to_numpy(dtype=float)
+    total_cost = df["total_cost"].to_numpy(dtype=float)
+    mark = np.nan_to_num(df["mark"].to_numpy(dtype=float))
+    scale = valuation.price_scale(df["type"])
+    avg_cost = valuation.average_cost(total_cost, position)
+    df["market_value"], df["mtm_pnl"] = valuation.value_book(position, avg_cost, mark, scale)
+
+    # assets.type is not nullable, so a null type means no asset row
+    orphaned = df["type"].isna().to_numpy()
+    df["type"] = df["type"].map(lambda t: getattr(t, "value", t))
+    df["rating"] = rating(df)
+    if "maturity_bucket" in dimensions:
+        df["maturity_bucket"] = maturity_bucket(df["maturity"], today)
+    for dim in dimensions:
+        if dim not in ("fund_alloc", "sub_alloc"):
+            df[dim] = df[dim].astype(object)
+            df.loc[orphaned, dim] = UNKNOWN
+        df[dim] = df[dim].replace("", np.nan).fillna(MISSING).astype(str)
+    return df
+
+
+def _sort_key(keys: Dict[str, str], dimensions: Sequence[str]):
+    # children sort before their subtotal, the grand total sorts last
+    return [(0, keys[d]) if d in keys else (1, "") for d in dimensions]
+
+
+def get_rollup(
+    db: Session,
+    dimensions: Sequence[str],
+    source=None,
+    today: Optional[date] = None,
+) -> schemas.HoldingRollup:
+    for dim in dimensions:
+        if dim not in DIMENSIONS:
+            raise ValueError(f"Unknown rollup dimension {dim!r}")
+    dimensions = list(dict.fromkeys(dimensions))  # de-duplicate, keep order
+
+    result = db.execute(rollup_statement(dimensions, source))
+    df = pd.DataFrame(result.all(), columns=list(result.keys()))
+    df = valued_frame(df, dimensions, today or date.today())
+
+    measures = ["position", "market_value", "mtm_pnl"]
+    rows: List[schemas.HoldingRollupRow] = []
+    if not df.empty:
+        for level in range(1, len(dimensions) + 1):
+            dims = dimensions[:level]
+            grouped = df.groupby(dims, sort=False).agg(
+                count=("position", "size"),
+                **{m: (m, "sum") for m in measures},
+            )
+            for key, values in grouped.iterrows():
+                key = key if isinstance(key, tuple) else (key,)
+                rows.append(
+                    schemas.HoldingRollupRow(
+                        level=level,
+                        keys=dict(zip(dims, key)),
+                        count=int(values["count"]),
+                        **{m: float(values[m]) for m in measures},
+                    )
+                )
+
+    totals = df[measures].sum() if not df.empty else {m: 0.0 for m in measures}
+    rows.append(
+        schemas.HoldingRollupRow(
+            level=0,
+            keys={},
+            count=len(df),
+            **{m: float(totals[m]) for m in measures},
+        )
+    )
+    rows.sort(key=lambda r: _sort_key(r.keys, dimensions))
+    return schemas.HoldingRollup(group_by=dimensions, rows=rows)
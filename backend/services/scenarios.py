@@ -0,0 +1,112 @@
+# backend/services/scenarios.py
+"""
+Batch scenario / shock revaluation.
+
+The book is loaded once (per-asset position, cost and mark). Each scenario
+is reduced to a per-asset multiplier and offset on the mark, stacked into
+(scenarios x assets) matrices, and every scenario is revalued in a single
+matrix-vector product against the scaled positions. Per-100 versus per-unit
+quoting follows BOND_LIKE_TYPES through the valuation price scale.
+``Asset.mark`` is never modified.
+"""
+from typing import List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from backend import schemas
+from backend.services import rollups, valuation
+
+
+def load_book(db: Session) -> pd.DataFrame:
+    """Per-asset book with the columns the shock selectors need."""
+    result = db.execute(rollups.rollup_statement([]))
+    df = pd.DataFrame(result.all(), columns=list(result.keys()))
+    if df.empty:
+        return df
+    df["type"] = df["type"].map(lambda t: getattr(t, "value", t))
+    df["rating"] = rollups.rating(df)
+    return df
+
+
+def shock_mask(df: pd.DataFrame, shock: schemas.ShockDefinition) -> np.ndarray:
+    mask = np.ones(len(df), dtype=bool)
+    if shock.asset_types is not None:
+        mask &= df["type"].isin([t.value for t in shock.asset_types]).to_numpy()
+    if shock.issuers is not None:
+        mask &= df["issuer"].isin(shock.issuers).to_numpy()
+    if shock.ratings is not None:
+        mask &= df["rating"].isin(shock.ratings).to_numpy()
+    if shock.asset_ids is not None:
+        mask &= df["asset_id"].isin(shock.asset_ids).to_numpy()
+    return mask
+
+
+def run_scenarios(db: Session, request: schemas.ScenarioRequest) -> schemas.ScenarioResponse:
+    df = load_book(db)
+    n_scenarios = len(request.scenarios)
+
+    if df.empty:
+        empty = [
+            schemas.ScenarioResult(
+                name=s.name, shocked_assets=0, market_value=0.0, mtm_pnl=0.0,
+                market_value_change=0.0, holdings=[] if request.include_holdings else None,
+            )
+            for s in request.scenarios
+        ]
+        return schemas.ScenarioResponse(base_market_value=0.0, base_mtm_pnl=0.0, scenarios=empty)
+
+    position = df["position"].to_numpy(dtype=float)
+    mark = np.nan_to_num(df["mark"].to_numpy(dtype=float))
+    scale = valuation.price_scale(df["type"])
+    avg_cost = valuation.average_cost(df["total_cost"].to_numpy(dtype=float), position)
+    scaled_pos = scale * position
+
+    base_mv, base_pnl = valuation.value_book(position, avg_cost, mark, scale)
+    base_mv_total = float(base_mv.sum())
+    cost_total = float(avg_cost @ scaled_pos)
+
+    # shocked mark = mark * multiplier + offset, one row per scenario
+    multiplier = np.ones((n_scenarios, len(df)))
+    offset = np.zeros((n_scenarios, len(df)))
+    for i, scenario in enumerate(request.scenarios):
+        for shock in scenario.shocks:
+            mask = shock_mask(df, shock)
+            factor = 1.0 + shock.pct
+            multiplier[i, mask] *= factor
+            offset[i, mask] = offset[i, mask] * factor + shock.points
+    shocked = mark * multiplier + offset
+
+    mv_totals = shocked @ scaled_pos
+    pnl_totals = mv_totals - cost_total
+    shocked_counts = ((multiplier != 1.0) | (offset != 0.0)).sum(axis=1)
+
+    results: List[schemas.ScenarioResult] = []
+    for i, scenario in enumerate(request.scenarios):
+        holdings = None
+        if request.include_holdings:
+            mv_row = shocked[i] * scaled_pos
+            pnl_row = (shocked[i] - avg_cost) * scaled_pos
+            holdings = [
+                schemas.ScenarioHolding(
+                    id=int(asset_id), mark=float(m), market_value=float(v), mtm_pnl=float(p)
+                )
+                for asset_id, m, v, p in zip(df["asset_id"], shocked[i], mv_row, pnl_row)
+            ]
+        results.append(
+            schemas.ScenarioResult(
+                name=scenario.name,
+                shocked_assets=int(shocked_counts[i]),
+                market_value=float(mv_totals[i]),
+                mtm_pnl=float(pnl_totals[i]),
+                market_value_change=float(mv_totals[i]) - base_mv_total,
+                holdings=holdings,
+            )
+        )
+
+    return schemas.ScenarioResponse(
+        base_market_value=base_mv_total,
+        base_mtm_pnl=float(base_pnl.sum()),
+        scenarios=results,
+    )
@@ -0,0 +1,221 @@
+# backend/services/search.py
+"""
+Typeahead search over the reference extracts (CUSIP, issuer, deal name).
+
+Each workbook gets its own in-memory index:
+
+  * a sorted vocabulary of the uppercase word tokens of the three fields,
+    each with a posting array of rows, so a query token is a prefix range
+    found by bisection;
+  * a trigram index over the identifier, so a bare 9-character CUSIP finds
+    the ISIN-style ``ID`` it is embedded in.
+
+Query tokens are AND-ed; matches are ranked: exact identifier, identifier
+prefix, identifier substring, issuer / deal name starting with the query,
+then any token-prefix match. The index follows the reference snapshots: when
+a new one is published only the workbooks whose table changed are
+re-indexed. ``python -m backend.benchmarks.search`` times it on 100k rows.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.services import refdata
+
+SEARCH_LIMIT = 20
+
+# Rows gathered per query before ranking; keeps one- and two-letter queries
+# (and tokens such as "CORP" that appear on every row) fast.
+MAX_CANDIDATES = 2000
+
+_TOKEN = re.compile(r"[A-Z0-9]+")
+
+# Ranks, best first
+EXACT_ID, ID_PREFIX, ID_SUBSTRING, FIELD_PREFIX, TOKEN_PREFIX = range(5)
+
+
+def normalize(text: Optional[str]) -> str:
+    return " ".join(_TOKEN.findall((text or "").upper()))
+
+
+def tokens(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall((text or "").upper())
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    cusip: str
+    issuer: Optional[str]
+    deal_name: Optional[str]
+    asset_types: Tuple[str, ...]
+    rank: int
+
+
+class WorkbookIndex:
+    """Prefix and trigram index over one reference workbook."""
+
+    def __init__(
+        self,
+        asset_types: Sequence[str],
+        cusips: Sequence[Optional[str]],
+        issuers: Sequence[Optional[str]],
+        deal_names: Sequence[Optional[str]],
+    ):
+        self.asset_types = tuple(asset_types)
+        self.cusips = [c or "" for c in cusips]
+        self.issuers = list(issuers)
+        self.deal_names = list(deal_names)
+        self.ids = [normalize(c).replace(" ", "") for c in self.cusips]
+        self.issuer_keys = [normalize(v) for v in self.issuers]
+        self.deal_keys = [normalize(v) for v in self.deal_names]
+
+        self.words: List[str] = []
+        postings: Dict[str, List[int]] = {}
+        grams: Dict[str, List[int]] = {}
+        for row in range(len(self.cusips)):
+            words = set(tokens(self.cusips[row]))
+            words.update(self.issuer_keys[row].split())
+            words.update(self.deal_keys[row].split())
+            for word in words:
+                postings.setdefault(word, []).append(row)
+            for gram in trigrams(self.ids[row]):
+                grams.setdefault(gram, []).append(row)
+            # " TOKEN TOKEN ..." so a token prefix is a substring test
+            self.words.append(" " + " ".join(words))
+        self.vocab = sorted(postings)
+        self.postings = [np.asarray(postings[w], dtype=np.int32) for w in self.vocab]
+        self.counts = np.concatenate([[0], np.cumsum([len(p) for p in self.postings])])
+        self.grams = {g: np.asarray(rows, dtype=np.int32) for g, rows in grams.items()}
+
+    @classmethod
+    def from_table(cls, table: refdata.RefTable, asset_types: Sequence[str]) -> "WorkbookIndex":
+        columns = table.table.column_names
+
+        def column(name):
+            return table.table.column(name).to_pylist() if name in columns else [None] * table.table.num_rows
+
+        return cls(asset_types, column("ID"), column("Issuer"), column("Asset (Deal Name)"))
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self.vocab, prefix)
+        return lo, bisect_left(self.vocab, prefix + "\uffff", lo)
+
+    def _prefix_rows(self, lo: int, hi: int) -> np.ndarray:
+        parts, total = [], 0
+        for i in range(lo, hi):
+            parts.append(self.postings[i][:MAX_CANDIDATES - total])
+            total += len(parts[-1])
+            if total >= MAX_CANDIDATES:
+                break
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int32)
+
+    def _id_substring_rows(self, needle: str) -> List[int]:
+        postings = [self.grams.get(g) for g in trigrams(needle)]
+        if not postings or any(p is None for p in postings):
+            return []
+        rows = min(postings, key=len)[:MAX_CANDIDATES]
+        return [int(r) for r in rows if needle in self.ids[r]]
+
+    def search(self, query: str) -> Dict[int, int]:
+        """Matching rows -> rank."""
+        words = tokens(query)
+        if not words:
+            return {}
+        key = " ".join(words)
+        compact = "".join(words)
+
+        # Candidates come from the most selective token; the others are
+        # checked per row against its token string.
+        ranges = {w: self._prefix_range(w) for w in words}
+        seed = min(words, key=lambda w: self.counts[ranges[w][1]] - self.counts[ranges[w][0]])
+        others = [" " + w for w in words if w != seed]
+        rows = self._prefix_rows(*ranges[seed]).tolist()
+        if others:
+            rows = [r for r in rows if all(w in self.words[r] for w in others)]
+        ranked = dict.fromkeys(rows, TOKEN_PREFIX)
+        if len(compact) >= 3:
+            for r in self._id_substring_rows(compact):
+                ranked[r] = ID_SUBSTRING
+
+        for r in ranked:
+            ident = self.ids[r]
+            if ident == compact:
+                ranked[r] = EXACT_ID
+            elif ident.startswith(compact):
+                ranked[r] = ID_PREFIX
+            elif ranked[r] == TOKEN_PREFIX and (
+                self.issuer_keys[r].startswith(key) or self.deal_keys[r].startswith(key)
+            ):
+                ranked[r] = FIELD_PREFIX
+        return ranked
+
+    def hit(self, row: int, rank: int) -> SearchHit:
+        return SearchHit(
+            cusip=self.cusips[row],
+            issuer=self.issuers[row],
+            deal_name=self.deal_names[row],
+            asset_types=self.asset_types,
+            rank=rank,
+        )
+
+
+def top_hits(indexes: Sequence[WorkbookIndex], query: str, limit: int = SEARCH_LIMIT) -> List[SearchHit]:
+    """Best ``limit`` matches across workbooks, by rank then issuer, deal, CUSIP."""
+    candidates = []
+    for n, wb in enumerate(indexes):
+        candidates.extend(
+            (rank, wb.issuer_keys[row], wb.deal_keys[row], wb.cusips[row], n, row)
+            for row, rank in wb.search(query).items()
+        )
+    return [indexes[n].hit(row, rank) for rank, *_, n, row in heapq.nsmallest(limit, candidates)]
+
+
+class SearchIndex:
+    """Per-workbook indexes for a reference snapshot, swapped as a whole."""
+
+    def __init__(self, store: refdata.RefDataStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, Tuple[refdata.RefTable, WorkbookIndex]] = {}
+        self.version: Optional[int] = None
+        self.rebuilds = 0
+
+    def update(self, snapshot: refdata.RefSnapshot) -> None:
+        """Re-index only the workbooks whose table changed in ``snapshot``."""
+        with self._lock:
+            if self.version is not None and snapshot.version <= self.version:
+                return
+            asset_types: Dict[str, List[str]] = {}
+            for asset_type, path in self.store.files.items():
+                asset_types.setdefault(path, []).append(asset_type)
+            indexes = {}
+            for path, table in snapshot.tables.items():
+                current = self._indexes.get(path)
+                if current is not None and current[0] is table:
+                    indexes[path] = current
+                else:
+                    indexes[path] = (table, WorkbookIndex.from_table(table, asset_types.get(path, [])))
+                    self.rebuilds += 1
+            self._indexes = indexes
+            self.version = snapshot.version
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[SearchHit]:
+        if not self.store.watching:
+            self.store.refresh()
+        snapshot = self.store.snapshot
+        if self.version != snapshot.version:
+            self.update(snapshot)
+
+        return top_hits([wb for _, wb in self._indexes.values()], query, limit)
+
+
+index = SearchIndex(refdata.store)
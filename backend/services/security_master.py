@@ -0,0 +1,214 @@
+# backend/services/security_master.py
+"""
+ETL of the Bloomberg reference extracts into the ``security_master`` table.
+
+Each workbook (read from the memory-mapped extracts in services/refdata.py)
+is loaded once per asset type it serves, keyed by (cusip, asset_type), so
+``assets`` and ``watchlist`` can join reference fields in SQL. Every row is
+hashed; only new or changed rows are written, with chunked multi-row
+``INSERT ... ON CONFLICT DO UPDATE`` upserts (SQLite and Postgres; other
+databases get executemany UPDATEs and INSERTs), and keys that disappeared
+from the extract are deleted.
+
+    python -m backend.services.security_master
+    python -m backend.benchmarks.security_master [rows]
+"""
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, bindparam, delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import upsert_insert
+from backend.services import refdata
+
+UPSERT_CHUNK_SIZE = 1000
+
+# Workbook column -> security_master column
+SECURITY_MASTER_COLUMNS = {
+    "ID": "cusip",
+    "Issuer": "issuer",
+    "Asset (Deal Name)": "deal_name",
+    "Spread/Coupon": "spread_coupon",
+    "Maturity": "maturity",
+    "Bid Price": "px_bid",
+    "Offer Price": "px_ask",
+    "YTW": "ytw",
+    "DM/Zspread": "dm_zspread",
+    "1d Net Px Chg": "chg_net_1d",
+    "5d Net Px Chg": "chg_net_5d",
+    "30d Net Px Chg": "chg_net_1m",
+    "6m Net Px Chg": "chg_net_6m",
+    "YTD Net Px Chg": "chg_net_ytd",
+    "12m High": "interval_high",
+    "12m Low": "interval_low",
+    "Payment Rank": "payment_rank",
+    "Moody CFR": "moodys_cfr",
+    "Moody Asset": "moodys_asset",
+    "S&P CFR": "sp_cfr",
+    "S&P Asset": "sp_asset",
+    "Amount Outstanding": "amount_outstanding",
+}
+DATA_COLUMNS = [c for c in SECURITY_MASTER_COLUMNS.values() if c != "cusip"]
+FLOAT_COLUMNS = [
+    c.name for c in models.SecurityMaster.__table__.columns
+    if isinstance(c.type, Float)
+]
+
+
+def transform(extract: pd.DataFrame) -> pd.DataFrame:
+    """Rename, type and hash an extract; one row per CUSIP (first wins)."""
+    df = extract.rename(columns=SECURITY_MASTER_COLUMNS).reindex(columns=list(SECURITY_MASTER_COLUMNS.values()))
+    df = df[df["cusip"].notna()].drop_duplicates("cusip", keep="first")
+    for col in FLOAT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").replace([np.inf, -np.inf], np.nan)
+    df["amount_outstanding"] = pd.to_numeric(df["amount_outstanding"], errors="coerce").round().astype("Int64")
+    df["maturity"] = pd.to_datetime(df["maturity"], format="%m/%d/%Y", errors="coerce").dt.date
+    hashes = pd.util.hash_pandas_object(df[DATA_COLUMNS], index=False).to_numpy()
+    df["row_hash"] = [f"{h:016x}" for h in hashes]
+    return df.reset_index(drop=True)
+
+
+def _records(df: pd.DataFrame) -> List[Dict]:
+    """Parameter dicts with None for missing values, built column-wise."""
+    columns = []
+    for col in df.columns:
+        values = df[col].astype(object)
+        columns.append(values.where(values.notna(), None).tolist())
+    keys = list(df.columns)
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+UPDATED_COLUMNS = DATA_COLUMNS + ["source", "row_hash", "updated_at"]
+
+
+def _upsert_statement(db: Session):
+    """Multi-row upsert on (cusip, asset_type), or None where the dialect has no ON CONFLICT."""
+    upsert = upsert_insert(db)
+    if upsert is None:
+        return None
+    table = models.SecurityMaster.__table__
+    stmt = upsert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.cusip, table.c.asset_type],
+        set_={col: stmt.excluded[col] for col in UPDATED_COLUMNS},
+    )
+
+
+def _write_portable(db: Session, records: List[Dict], new: List[bool], chunk_size: int) -> None:
+    """executemany UPDATE of known keys and INSERT of new ones, for other dialects."""
+    table = models.SecurityMaster.__table__
+    # Key parameters need names that don't collide with the SET columns
+    update_stmt = (
+        update(table)
+        .where(table.c.cusip == bindparam("key_cusip"), table.c.asset_type == bindparam("key_asset_type"))
+        .values({col: bindparam(col) for col in UPDATED_COLUMNS})
+    )
+    inserts = [r for r, is_new in zip(records, new) if is_new]
+    updates = [
+        dict(r, key_cusip=r["cusip"], key_asset_type=r["asset_type"])
+        for r, is_new in zip(records, new) if not is_new
+    ]
+    for start in range(0, len(updates), chunk_size):
+        db.execute(update_stmt, updates[start:start + chunk_size])
+    for start in range(0, len(inserts), chunk_size):
+        db.execute(insert(table), inserts[start:start + chunk_size])
+
+
+def load(
+    db: Session,
+    extract: pd.DataFrame,
+    asset_type: models.AssetType,
+    source: str,
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+) -> Dict[str, int]:
+    """Upsert one extract for one asset type. Commits; returns row counts."""
+    SM = models.SecurityMaster
+    df = transform(extract)
+    existing = dict(
+        db.execute(select(SM.cusip, SM.row_hash).where(SM.asset_type == asset_type)).all()
+    )
+    known = df["cusip"].map(existing)
+    changed = df[known.isna() | (known != df["row_hash"])]
+    stale = list(existing.keys() - set(df["cusip"]))
+
+    if len(changed):
+        # updated_at is a naive UTC column
+        updated_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        records = _records(changed.assign(asset_type=asset_type, source=source, updated_at=updated_at))
+        stmt = _upsert_statement(db)
+        if stmt is None:
+            _write_portable(db, records, known[changed.index].isna().tolist(), chunk_size)
+        else:
+            for start in range(0, len(records), chunk_size):
+                db.execute(stmt, records[start:start + chunk_size])
+    for start in range(0, len(stale), chunk_size):
+        db.execute(
+            delete(SM)
+            .where(SM.asset_type == asset_type, SM.cusip.in_(stale[start:start + chunk_size]))
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+    inserted = int(known.isna().sum())
+    return {
+        "rows": len(df),
+        "inserted": inserted,
+        "updated": len(changed) - inserted,
+        "unchanged": len(df) - len(changed),
+        "deleted": len(stale),
+    }
+
+
+def sync(db: Session, snapshot: Optional[refdata.RefSnapshot] = None) -> Dict[str, Dict[str, int]]:
+    """Load every mapped workbook of a reference snapshot (default: current)."""
+    if snapshot is None:
+        refdata.store.warm()
+        snapshot = refdata.store.snapshot
+    frames: Dict[str, pd.DataFrame] = {}
+    results: Dict[str, Dict[str, int]] = {}
+    for asset_type, path in refdata.store.files.items():
+        table = snapshot.tables.get(path)
+        if table is None:
+            continue
+        if path not in frames:
+            frames[path] = table.to_pandas()
+        results[asset_type] = load(db, frames[path], models.AssetType(asset_type), path)
+    return results
+
+
+def sync_on_refresh(snapshot: refdata.RefSnapshot) -> None:
+    """RefDataStore listener: load each new reference snapshot."""
+    from backend.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        sync(db, snapshot)
+    finally:
+        db.close()
+
+
+def main(argv: List[str]) -> int:
+    from backend.database import SessionLocal, create_tables
+
+    create_tables()
+
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        results = sync(db)
+    finally:
+        db.close()
+    for asset_type, counts in results.items():
+        print(f"{asset_type:<20} " + "  ".join(f"{k}={v}" for k, v in counts.items()))
+    print(f"security_master synced in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,182 @@
+# backend/services/snapshots.py
+"""
+As-of-date positions backed by end-of-day checkpoints.
+
+``position_snapshots`` holds a copy of the positions book at the end of a
+given day, on a trade-date or settle-date basis. Positions as of date X are
+the nearest checkpoint on or before X plus only the trades dated after it,
+so the work per query is bounded by the checkpoint interval rather than the
+length of the trade history.
+
+Trade writes dated on or before an existing checkpoint invalidate that
+checkpoint and every later one (see ``invalidate``).
+
+Write checkpoints with:
+
+    python -m backend.services.snapshots [YYYY-MM-DD] [--basis trade_date|settle_date|both]
+    python -m backend.services.snapshots --backfill YYYY-MM-DD YYYY-MM-DD [--every N]
+"""
+import sys
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services import positions
+
+BASES = ("trade_date", "settle_date")
+
+POSITION_COLUMNS = [
+    "asset_id", "fund_alloc", "sub_alloc", "net_quantity",
+    "cost_sum", "trade_count", "first_trade_id",
+]
+
+
+def _date_column(basis: str):
+    if basis not in BASES:
+        raise ValueError(f"Unknown basis {basis!r}; expected one of {BASES}")
+    return getattr(models.Trade, basis)
+
+
+def nearest_snapshot(db: Session, as_of: date, basis: str) -> Optional[date]:
+    """Latest checkpoint date on or before ``as_of`` for ``basis``."""
+    S = models.PositionSnapshot
+    return db.scalar(
+        select(func.max(S.snapshot_date))
+        .where((S.basis == basis) & (S.snapshot_date <= as_of))
+    )
+
+
+def as_of_statement(snapshot_date: Optional[date], as_of: date, basis: str):
+    """
+    Positions as of ``as_of``: checkpoint rows at ``snapshot_date`` (if any)
+    plus a replay of trades in (snapshot_date, as_of], one row per key.
+    """
+    S = models.PositionSnapshot
+    date_col = _date_column(basis)
+
+    window = [date_col <= as_of]
+    if snapshot_date is not None:
+        window.append(date_col > snapshot_date)
+    parts = [positions.replay_statement(*window)]
+
+    if snapshot_date is not None:
+        parts.append(
+            select(
+                S.asset_id, S.fund_alloc, S.sub_alloc, S.net_quantity,
+                S.cost_sum, S.trade_count, S.first_trade_id,
+            ).where((S.basis == basis) & (S.snapshot_date == snapshot_date))
+        )
+
+    combined = union_all(*parts).subquery("as_of_parts")
+    return select(
+        combined.c.asset_id,
+        combined.c.fund_alloc,
+        combined.c.sub_alloc,
+        func.sum(combined.c.net_quantity).label("net_quantity"),
+        func.sum(combined.c.cost_sum).label("cost_sum"),
+        func.sum(combined.c.trade_count).label("trade_count"),
+        func.min(combined.c.first_trade_id).label("first_trade_id"),
+    ).group_by(combined.c.asset_id, combined.c.fund_alloc, combined.c.sub_alloc)
+
+
+def positions_as_of(db: Session, as_of: date, basis: str = "trade_date"):
+    """A CTE shaped like ``positions`` holding the book as of ``as_of``."""
+    snapshot_date = nearest_snapshot(db, as_of, basis)
+    return as_of_statement(snapshot_date, as_of, basis).cte("positions_as_of")
+
+
+def write_checkpoint(db: Session, as_of: date, basis: str = "trade_date") -> int:
+    """Write (or replace) the end-of-day checkpoint for ``as_of``. Returns row count."""
+    S = models.PositionSnapshot
+    stmt = as_of_statement(nearest_snapshot(db, as_of - timedelta(days=1), basis), as_of, basis)
+    source = stmt.subquery("checkpoint_src")
+
+    db.execute(
+        delete(S)
+        .where((S.basis == basis) & (S.snapshot_date == as_of))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        insert(S).from_select(
+            ["basis", "snapshot_date"] + POSITION_COLUMNS,
+            select(
+                literal(basis), literal(as_of),
+                *[source.c[name] for name in POSITION_COLUMNS],
+            ),
+        )
+    )
+    db.commit()
+    return db.scalar(
+        select(func.count()).select_from(S)
+        .where((S.basis == basis) & (S.snapshot_date == as_of))
+    )
+
+
+def invalidate(db: Session, trade_date: date, settle_date: date) -> None:
+    """
+    Drop checkpoints a trade write dated ``trade_date``/``settle_date`` makes
+    stale. Runs inside the caller's transaction.
+    """
+    S = models.PositionSnapshot
+    db.execute(
+        delete(S)
+        .where(
+            ((S.basis == "trade_date") & (S.snapshot_date >= trade_date))
+            | ((S.basis == "settle_date") & (S.snapshot_date >= settle_date))
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def remove_asset(db: Session, asset_id: int) -> None:
+    """Drop an asset from every checkpoint."""
+    db.execute(
+        delete(models.PositionSnapshot)
+        .where(models.PositionSnapshot.asset_id == asset_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def backfill(db: Session, start: date, end: date, every: int = 1, bases=BASES) -> int:
+    """Write checkpoints from ``start`` to ``end`` every ``every`` days."""
+    written = 0
+    day = start
+    while day <= end:
+        for basis in bases:
+            written += write_checkpoint(db, day, basis)
+        day += timedelta(days=every)
+    return written
+
+
+def main(argv: List[str]) -> int:
+    from backend.database import SessionLocal, create_tables
+
+    create_tables()
+
+    bases = BASES
+    if "--basis" in argv:
+        i = argv.index("--basis")
+        bases = BASES if argv[i + 1] == "both" else (argv[i + 1],)
+        del argv[i:i + 2]
+
+    db = SessionLocal()
+    try:
+        if argv and argv[0] == "--backfill":
+            start, end = date.fromisoformat(argv[1]), date.fromisoformat(argv[2])
+            every = int(argv[argv.index("--every") + 1]) if "--every" in argv else 1
+            print(f"Wrote {backfill(db, start, end, every, bases)} snapshot rows")
+            return 0
+
+        day = date.fromisoformat(argv[0]) if argv else date.today()
+        for basis in bases:
+            print(f"{day} [{basis}]: {write_checkpoint(db, day, basis)} positions")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
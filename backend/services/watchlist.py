@@ -0,0 +1,81 @@
+# backend/services/watchlist.py
+"""
+Batched watchlist enrichment.
+
+Items are grouped by the reference workbook their asset type maps to; each
+group gathers all of its CUSIPs from the CUSIP-indexed store in one pass and
+is joined to the items with a single merge. Columns are renamed with one
+mapping and NaN / inf are cleared column-wise, so the cost grows with the
+number of distinct workbooks rather than the number of items.
+"""
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from backend.services import refdata
+
+# Reference workbook column -> watchlist response field
+WATCHLIST_COLUMNS = {
+    "Issuer": "issuer",
+    "Asset (Deal Name)": "deal_name",
+    "Spread/Coupon": "spread_coupon",
+    "Maturity": "maturity",
+    "Bid Price": "px_bid",
+    "Offer Price": "px_ask",
+    "YTW": "yld_cnv_bid",
+    "DM/Zspread": "dm_zspread",
+    "1d Net Px Chg": "chg_net_1d",
+    "5d Net Px Chg": "chg_net_5d",
+    "30d Net Px Chg": "chg_net_1m",
+    "6m Net Px Chg": "chg_net_6m",
+    "YTD Net Px Chg": "chg_net_ytd",
+    "12m High": "interval_high",
+    "12m Low": "interval_low",
+    "Payment Rank": "payment_rank",
+    "Moody CFR": "rtg_moody_long_term",
+    "Moody Asset": "rtg_moody",
+    "S&P CFR": "rtg_sp_lt_lc_issuer_credit",
+    "S&P Asset": "rtg_sp",
+    "Amount Outstanding": "amt_outstanding",
+}
+DATA_FIELDS = list(WATCHLIST_COLUMNS.values())
+ITEM_FIELDS = ["id", "cusip", "created_by", "asset_type"]
+
+
+def _reference_frame(table: refdata.RefTable, cusips: Iterable[str]) -> pd.DataFrame:
+    ref = table.frame(cusips)
+    columns = ["ID"] + [c for c in WATCHLIST_COLUMNS if c in ref.columns]
+    return ref[columns].rename(columns=WATCHLIST_COLUMNS)
+
+
+def enrich(items: List[Dict], store: refdata.RefDataStore = refdata.store) -> List[Dict]:
+    """
+    Merge reference data into watchlist items (dicts with ITEM_FIELDS),
+    preserving their order. Items without reference data get None fields
+    and an ``error``.
+    """
+    if not items:
+        return []
+    frame = pd.DataFrame(items, columns=ITEM_FIELDS)
+    frame["_row"] = np.arange(len(frame))
+    frame["_source"] = frame["asset_type"].map(lambda t: store.path_for(t))
+
+    parts = []
+    for _, group in frame.groupby("_source", sort=False, dropna=False):
+        table = store.table(group["asset_type"].iloc[0])
+        if table is None:
+            parts.append(group)
+            continue
+        ref = _reference_frame(table, group["cusip"].unique())
+        parts.append(group.merge(ref, how="left", left_on="cusip", right_on="ID"))
+
+    merged = pd.concat(parts, ignore_index=True).sort_values("_row")
+    merged = merged.reindex(columns=ITEM_FIELDS + ["ID"] + DATA_FIELDS)
+
+    data = merged[DATA_FIELDS].replace([np.inf, -np.inf], np.nan).astype(object)
+    error = merged["id"].astype(str) + " Bloomberg data not found"
+    out = pd.concat([merged[ITEM_FIELDS], data.where(data.notna(), None)], axis=1)
+    # object dtype keeps None (a str column would turn it back into NaN)
+    out["error"] = pd.Series(np.where(merged["ID"].isna(), error, None), index=out.index, dtype=object)
+    return out.to_dict("records")
@@ -0,0 +1,11 @@
+# tests/conftest.py
+"""
+Tests run offline: the in-process fake blpapi (backend/fake_blpapi.py) stands
+in for Bloomberg and the database is a throwaway SQLite file. Both have to be
+chosen before anything under ``backend`` is imported.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("BLP_FAKE", "1")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='oms-tests-')}/oms.db")
@@ -0,0 +1,169 @@
+# tests/test_bloomberg_pool.py
+import threading
+import time
+from contextlib import ExitStack
+
+import pytest
+
+from backend import fake_blpapi
+from backend.bloomberg import BloombergClient, SessionPool
+
+
+class Factory:
+    """BloombergClient factory over the fake blpapi that can be told to fail."""
+
+    def __init__(self, client_class=BloombergClient):
+        self.client_class = client_class
+        self.calls = 0
+        self.failing = False
+
+    def __call__(self):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError("Failed to start Bloomberg session")
+        return self.client_class()
+
+
+def drop_connection(client):
+    """Queue the status event a real session sees when the terminal goes away."""
+    event = fake_blpapi.Event(fake_blpapi.Event.SESSION_STATUS, [fake_blpapi.Message("SessionConnectionDown")])
+    client.session._events.put(event)
+
+
+def test_dead_session_is_discarded_on_borrow():
+    pool = SessionPool(Factory(), size=2)
+    with pool.session() as first:
+        pass
+    drop_connection(first)
+
+    with pool.session() as second:
+        assert second is not first
+        assert second.bulk_fetch(["VIX Index"], ["PX_LAST"])["VIX Index"]["PX_LAST"] is not None
+    assert not first.alive
+    assert not first.session._started
+    assert pool.stats()["discarded"] == 1
+    assert pool.stats()["open"] == 1
+
+
+def test_healthy_session_is_reused():
+    factory = Factory()
+    pool = SessionPool(factory, size=2)
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        assert second is first
+    assert factory.calls == 1
+
+
+def test_borrower_that_raises_gets_a_replacement():
+    pool = SessionPool(Factory(), size=1)
+    with pytest.raises(ValueError):
+        with pool.session() as abandoned:
+            raise ValueError("parse error mid-request")
+
+    with pool.session() as replacement:
+        assert replacement is not abandoned
+    assert not abandoned.alive
+    assert pool.stats()["discarded"] == 1
+    assert pool.stats()["open"] == 1
+
+
+def test_backoff_after_failed_connect_fails_fast():
+    factory = Factory()
+    factory.failing = True
+    pool = SessionPool(factory, size=1, backoff=0.2, backoff_max=0.4)
+
+    with pytest.raises(ConnectionError, match="Failed to start"):
+        with pool.session():
+            pass
+    t0 = time.monotonic()
+    with pytest.raises(ConnectionError, match="retrying in"):
+        with pool.session():
+            pass
+    assert time.monotonic() - t0 < 0.1
+    assert factory.calls == 1
+    assert pool.stats()["open"] == 0
+
+    # The next failure doubles the delay, capped at backoff_max
+    time.sleep(0.25)
+    with pytest.raises(ConnectionError, match="Failed to start"):
+        with pool.session():
+            pass
+    assert pool._delay == 0.4
+
+    factory.failing = False
+    time.sleep(0.45)
+    with pool.session():
+        pass
+    assert pool.stats()["retry_in"] == 0
+    assert pool.stats()["connect_failures"] == 2
+
+
+def test_size_caps_concurrent_borrows():
+    factory = Factory()
+    pool = SessionPool(factory, size=2, timeout=0.1)
+    with ExitStack() as borrowed:
+        held = [borrowed.enter_context(pool.session()) for _ in range(2)]
+        with pytest.raises(TimeoutError):
+            with pool.session():
+                pass
+        assert pool.stats()["open"] == 2
+        assert pool.stats()["waits"] >= 1
+
+    with pool.session() as client:
+        assert client in held
+    assert factory.calls == 2
+
+
+def test_waiting_borrower_gets_the_released_session():
+    pool = SessionPool(Factory(), size=1, timeout=5)
+    got = []
+    with pool.session() as first:
+        waiter = threading.Thread(target=lambda: got.append(pool._acquire()))
+        waiter.start()
+        time.sleep(0.05)
+        assert not got
+    waiter.join(5)
+    assert got == [first]
+
+
+def test_discarded_session_is_closed_outside_the_lock():
+    closing, resume = threading.Event(), threading.Event()
+
+    class SlowClose(BloombergClient):
+        def close(self):
+            closing.set()
+            resume.wait(5)
+            super().close()
+
+    pool = SessionPool(Factory(SlowClose), size=2, timeout=1)
+
+    def abandon():
+        with pytest.raises(ValueError):
+            with pool.session():
+                raise ValueError
+
+    abandoning = threading.Thread(target=abandon)
+    abandoning.start()
+    try:
+        assert closing.wait(5)
+        # Another borrower gets through while the dead session is still stopping
+        t0 = time.monotonic()
+        with pool.session():
+            pass
+        assert time.monotonic() - t0 < 0.5
+        assert pool.stats()["discarded"] == 1
+    finally:
+        resume.set()
+        abandoning.join(5)
+
+
+def test_closed_pool_refuses_borrows():
+    pool = SessionPool(Factory(), size=1)
+    with pool.session() as client:
+        pass
+    pool.close()
+    assert not client.alive
+    with pytest.raises(RuntimeError):
+        with pool.session():
+            pass
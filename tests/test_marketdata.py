@@ -0,0 +1,193 @@
+# tests/test_marketdata.py
+import asyncio
+import threading
+from typing import Dict, List
+
+import pytest
+
+from backend.services.marketdata import BlpTickSource, SubscriptionManager, Watcher
+
+
+class StubSource:
+    """Records the calls SubscriptionManager makes instead of talking to Bloomberg."""
+
+    def __init__(self):
+        self.calls: List[tuple] = []
+        self.live: Dict[str, int] = {}
+        self.failures: Dict[str, str] = {}
+        self.on_tick = None
+
+    def start(self, on_tick):
+        self.on_tick = on_tick
+        self.calls.append(("start",))
+
+    def stop(self):
+        self.calls.append(("stop",))
+
+    def subscribe(self, cusips):
+        self.calls.append(("subscribe", sorted(cusips)))
+        for cusip in cusips:
+            self.live[cusip] = self.live.get(cusip, 0) + 1
+
+    def unsubscribe(self, cusips):
+        self.calls.append(("unsubscribe", sorted(cusips)))
+        for cusip in cusips:
+            self.live[cusip] -= 1
+            if not self.live[cusip]:
+                del self.live[cusip]
+
+    def count(self, kind):
+        return sum(1 for call in self.calls if call[0] == kind)
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def source():
+    return StubSource()
+
+
+@pytest.fixture
+def manager(source):
+    return SubscriptionManager(source)
+
+
+def drain(loop, watcher):
+    """Run the watcher's pending merges and return what it would send."""
+    loop.run_until_complete(asyncio.sleep(0))
+    pending, watcher._pending = watcher._pending, {}
+    watcher._ready.clear()
+    return pending
+
+
+def test_one_subscription_per_cusip(loop, source, manager):
+    watchers = [Watcher(loop) for _ in range(30)]
+    for watcher in watchers:
+        manager.watch(watcher, ["912828XG0"])
+
+    assert source.calls.count(("subscribe", ["912828XG0"])) == 1
+    assert source.count("start") == 1
+    assert manager.stats()["subscriptions"] == 1
+    assert manager.stats()["watchers"] == 30
+
+    for watcher in watchers[:-1]:
+        manager.unwatch(watcher)
+    assert source.count("unsubscribe") == 0
+
+    manager.unwatch(watchers[-1])
+    assert source.calls[-1] == ("unsubscribe", ["912828XG0"])
+    assert source.count("unsubscribe") == 1
+    assert manager.stats()["subscriptions"] == 0
+
+
+def test_watch_is_idempotent_per_watcher(loop, source, manager):
+    watcher = Watcher(loop)
+    manager.watch(watcher, ["A", "B"])
+    manager.watch(watcher, ["A", "B", "C"])
+    manager.unwatch(watcher, ["A"])
+
+    assert source.live == {"B": 1, "C": 1}
+    assert watcher.cusips == {"B", "C"}
+
+
+def test_only_changed_fields_are_pushed(loop, manager):
+    watcher = Watcher(loop)
+    manager.watch(watcher, ["A"])
+
+    manager.on_tick("A", {"PX_BID": 99.5, "PX_ASK": 100.0})
+    assert drain(loop, watcher) == {"A": {"px_bid": 99.5, "px_ask": 100.0}}
+
+    manager.on_tick("A", {"PX_BID": 99.5, "PX_ASK": 100.25})
+    assert drain(loop, watcher) == {"A": {"px_ask": 100.25}}
+
+    manager.on_tick("A", {"PX_BID": 99.5, "PX_ASK": 100.25})
+    assert drain(loop, watcher) == {}
+    assert manager.stats()["ticks"] == 3
+    assert manager.stats()["deltas"] == 2
+
+
+def test_ticks_coalesce_into_one_delta(loop, manager):
+    watcher = Watcher(loop, flush_seconds=0)
+    manager.watch(watcher, ["A", "B"])
+
+    manager.on_tick("A", {"PX_BID": 1.0})
+    manager.on_tick("A", {"PX_BID": 2.0, "PX_ASK": 3.0})
+    manager.on_tick("B", {"YLD_CNV_BID": 4.5})
+
+    delta = loop.run_until_complete(watcher.next_delta())
+    assert delta == {"A": {"px_bid": 2.0, "px_ask": 3.0}, "B": {"yld_cnv_bid": 4.5}}
+
+
+def test_late_watcher_gets_last_values(loop, manager):
+    first, late = Watcher(loop), Watcher(loop)
+    manager.watch(first, ["A"])
+    manager.on_tick("A", {"PX_BID": 1.0})
+
+    assert manager.watch(late, ["A"]) == {"A": {"px_bid": 1.0}}
+
+
+def test_tick_after_last_unwatch_is_dropped(loop, manager):
+    watcher = Watcher(loop)
+    manager.watch(watcher, ["A"])
+    manager.unwatch(watcher)
+
+    manager.on_tick("A", {"PX_BID": 1.0})
+    assert manager.watch(Watcher(loop), ["A"]) == {}
+
+
+def test_source_calls_follow_refcount_order(loop, source, manager):
+    """A concurrent unwatch 1->0 and watch 0->1 must leave the CUSIP subscribed."""
+    unsubscribing, resume = threading.Event(), threading.Event()
+    unsubscribe = source.unsubscribe
+
+    def slow_unsubscribe(cusips):
+        unsubscribing.set()
+        resume.wait(5)
+        unsubscribe(cusips)
+
+    source.unsubscribe = slow_unsubscribe
+    leaving, joining = Watcher(loop), Watcher(loop)
+    manager.watch(leaving, ["A"])
+
+    unwatch = threading.Thread(target=manager.unwatch, args=(leaving,))
+    unwatch.start()
+    assert unsubscribing.wait(5)
+    watch = threading.Thread(target=manager.watch, args=(joining, ["A"]))
+    watch.start()
+    resume.set()
+    unwatch.join(5)
+    watch.join(5)
+
+    assert [c for c in source.calls if c[0] != "start"] == [
+        ("subscribe", ["A"]), ("unsubscribe", ["A"]), ("subscribe", ["A"]),
+    ]
+    assert source.live == {"A": 1}
+
+
+def test_stop_allows_restart(loop, source, manager):
+    manager.watch(Watcher(loop), ["A"])
+    manager.stop()
+    manager.watch(Watcher(loop), ["B"])
+
+    assert [c[0] for c in source.calls if c[0] in ("start", "stop")] == ["start", "stop", "start"]
+
+
+def test_dropped_session_only_records_topics():
+    class DeadClient:
+        alive = False
+
+        @property
+        def session(self):
+            raise AssertionError("subscribed on a stopped session")
+
+    source = BlpTickSource()
+    source._client = DeadClient()
+    source.subscribe(["A", "B"])
+    source.unsubscribe(["B"])
+
+    assert source._topics == {"A"}
@@ -0,0 +1,89 @@
+# tests/test_valuation.py
+import math
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from backend.models import AssetType
+from backend.services import valuation
+
+BOND_LIKE = [t.value for t in AssetType if t.value in valuation.BOND_LIKE_TYPES]
+UNIT_PRICED = [t.value for t in AssetType if t.value not in valuation.BOND_LIKE_TYPES]
+
+
+def random_book(rows: int, rng: random.Random):
+    """Columns as the holdings query returns them: Decimals, with None for missing values."""
+    position, total_cost, mark, types = [], [], [], []
+    for _ in range(rows):
+        roll = rng.random()
+        if roll < 0.1:
+            qty = Decimal(0)
+        elif roll < 0.15:
+            qty = None
+        else:
+            qty = Decimal(str(round(rng.uniform(-1e9, 1e9), 4)))
+        price = Decimal(str(round(rng.uniform(0.01, 1e4), 4)))
+        position.append(qty)
+        total_cost.append(None if qty is None else qty * price * Decimal(str(round(rng.uniform(0.5, 1.5), 4))))
+
+        roll = rng.random()
+        if roll < 0.05:
+            mark.append(None)
+        elif roll < 0.1:
+            mark.append(math.nan)
+        else:
+            mark.append(Decimal(str(round(rng.uniform(0.01, 1e4), 4))))
+        types.append(rng.choice(BOND_LIKE if rng.random() < 0.5 else UNIT_PRICED))
+    return position, total_cost, mark, types
+
+
+def value_kernel(position, total_cost, mark, types):
+    pos = valuation.as_column(position)
+    avg = valuation.average_cost(valuation.as_column(total_cost), pos)
+    market_value, pnl = valuation.value_book(pos, avg, valuation.as_column(mark), valuation.price_scale(types))
+    return avg, market_value, pnl
+
+
+def assert_parity(book):
+    reference = [valuation.value_decimal(*row) for row in zip(*book)]
+    for i, got in enumerate(value_kernel(*book)):
+        want = np.array([float(r[i]) for r in reference])
+        np.testing.assert_allclose(
+            got, want, rtol=valuation.REL_TOLERANCE, atol=valuation.ABS_TOLERANCE, equal_nan=True
+        )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_kernel_matches_decimal_on_random_books(seed):
+    assert_parity(random_book(2_000, random.Random(seed)))
+
+
+def test_kernel_matches_decimal_at_the_documented_bounds():
+    position = [Decimal("1e12"), Decimal("-1e12"), Decimal("1e12"), Decimal("-0.0001")]
+    total_cost = [Decimal("1e17"), Decimal("-3e17"), Decimal("1e14"), Decimal("-0.0001")]
+    mark = [Decimal("999999.9999"), Decimal("0.0001"), Decimal("1e6"), Decimal("1e6")]
+    types = ["Corporate Bond", "Stock", "Term Loan", "Equity"]
+    assert_parity((position, total_cost, mark, types))
+
+
+def test_bond_like_types_are_quoted_per_100():
+    scale = valuation.price_scale([AssetType.CORPORATE_BOND, "Revolver", AssetType.STOCK, "Equity", "Unknown"])
+    assert scale.tolist() == [0.01, 0.01, 1.0, 1.0, 1.0]
+
+    _, market_value, pnl = value_kernel([Decimal(1_000)], [Decimal(95_000)], [Decimal(101)], ["Government Bond"])
+    assert market_value.tolist() == pytest.approx([1_010.0])
+    assert pnl.tolist() == pytest.approx([60.0])
+
+
+def test_flat_positions_and_missing_marks():
+    avg, market_value, pnl = value_kernel(
+        [Decimal(0), None, Decimal(-50)],
+        [Decimal(10), None, Decimal(-5_000)],
+        [Decimal(100), Decimal(100), None],
+        ["Stock", "Stock", "Stock"],
+    )
+    assert avg.tolist() == [0.0, 0.0, 100.0]
+    assert market_value.tolist() == [0.0, 0.0, 0.0]
+    assert pnl.tolist() == [0.0, 0.0, 5_000.0]